@@ -2,18 +2,13 @@ import streamlit as st
 from streamlit_calendar import calendar
 import datetime
 import time
-from supabase import create_client
+from gymapp import db, perf, profiles, schedule, sync
 # from dotenv import load_dotenv
 from pathlib import Path
 import os
 
-# --- Load Supabase config ---
-# load_dotenv(dotenv_path=Path("/Users/dmaje23/Documents/dev/envfiles/gymapp/gym_app_secrets.env"))
-SUPABASE_URL = st.secrets["SUPABASE_URL"]
-SUPABASE_KEY = st.secrets["SUPABASE_KEY"]
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
-
 st.set_page_config(page_title="CBI Gym App", layout="centered")
+perf.start_run("home")
 st.title("🏋️ Welcome to the CBI Gym App")
 
 # --- Authentication check ---
@@ -26,13 +21,16 @@ if not user or not access_token or not user_id:
     st.page_link("pages/1_Login.py", label="🔑 Login or Sign Up")
     st.stop()
 
-# --- Fetch coach status and name, create profile if missing ---
-profile_resp = supabase.table("users").select("coach, name").eq("id", user_id).maybe_single().execute()
-profile = profile_resp.data if profile_resp and hasattr(profile_resp, "data") else None
+# --- Pick up session changes made elsewhere (one request, only when due) ---
+sync.ensure_listener()
+sync.pull()
+
+# --- Coach status and name (cached at login), create profile if missing ---
+profile = profiles.get(user_id)
 if not profile:
     # Auto-create a default profile for the user if missing
     user_name = getattr(user, "user_metadata", {}).get("name", user.email)
-    supabase.table("users").insert({
+    db.table("users").insert({
         "id": user_id,
         "name": user_name,
         "date_of_birth": None,
@@ -48,19 +46,14 @@ name = profile.get("name", user.email if user else "User")
 
 st.success(f"Logged in as {name} ({'Coach' if is_coach else 'Athlete'})")
 
-# --- Fetch relevant scheduled workouts ---
+# --- Fetch scheduled workouts for the date window the calendar is showing ---
 today = datetime.date.today()
 today_str = today.strftime("%Y-%m-%d")
+window = st.session_state.get("calendar_window") or schedule.default_window(today)
 events = []
 
 if is_coach:
-    sw_resp = supabase.table("scheduled_workouts") \
-        .select("id, scheduled_date, notes") \
-        .eq("user_id", user_id) \
-        .gte("scheduled_date", today_str) \
-        .order("scheduled_date") \
-        .execute()
-    sessions = sw_resp.data or []
+    sessions = schedule.coach_sessions(user_id, *window)
     for s in sessions:
         events.append({
             "title": s.get("notes") or "(No Title)",
@@ -71,28 +64,17 @@ if is_coach:
             "extendedProps": { "scheduled_workout_id": s["id"] },
         })
 else:
-    att_resp = supabase.table("scheduled_workout_attendees") \
-        .select("scheduled_workout_id") \
-        .eq("user_id", user_id) \
-        .execute()
-    sw_ids = [a["scheduled_workout_id"] for a in (att_resp.data or [])]
-    if sw_ids:
-        sw_resp = supabase.table("scheduled_workouts") \
-            .select("id, scheduled_date, notes") \
-            .in_("id", sw_ids) \
-            .gte("scheduled_date", today_str) \
-            .order("scheduled_date") \
-            .execute()
-        sessions = sw_resp.data or []
-        for s in sessions:
-            events.append({
-                "title": s.get("notes") or "(No Title)",
-                "color": "#38b000",
-                "start": s["scheduled_date"],
-                "end": s["scheduled_date"],
-                "scheduled_workout_id": s["id"],
-                "extendedProps": { "scheduled_workout_id": s["id"] },
-            })
+    # Attendee -> session join happens server-side in one request
+    sessions = schedule.athlete_sessions(user_id, *window)
+    for s in sessions:
+        events.append({
+            "title": s.get("notes") or "(No Title)",
+            "color": "#38b000",
+            "start": s["scheduled_date"],
+            "end": s["scheduled_date"],
+            "scheduled_workout_id": s["id"],
+            "extendedProps": { "scheduled_workout_id": s["id"] },
+        })
 
 # --- Calendar CSS: Smaller, white event text
 custom_css = """
@@ -115,41 +97,51 @@ calendar_options = {
 
 st.title("📅 Your Gym Sessions")
 if not events:
-    st.info("No scheduled sessions found.")
-else:
-    state = calendar(
-        events=events,
-        options=calendar_options,
-        custom_css=custom_css,
-        key="calendar_nav_demo"
+    st.info("No scheduled sessions in this period.")
+state = calendar(
+    events=events,
+    options=calendar_options,
+    custom_css=custom_css,
+    callbacks=["dateClick", "eventClick", "select", "datesSet"],
+    key="calendar_nav_demo"
+)
+
+# --- Navigating to another range loads just that window ---
+shown = schedule.visible_window(state)
+if shown and not schedule.covers(window, shown):
+    st.session_state["calendar_window"] = shown
+    st.rerun()
+
+if state.get("eventClick") and state["eventClick"].get("event"):
+    event = state["eventClick"]["event"]
+    event_title = event.get("title", "")
+    event_date = event.get("start", "")
+
+    session_id = (
+        event.get("scheduled_workout_id")
+        or event.get("extendedProps", {}).get("scheduled_workout_id")
     )
-    if state.get("eventClick") and state["eventClick"].get("event"):
-        event = state["eventClick"]["event"]
-        event_title = event.get("title", "")
-        event_date = event.get("start", "")
-
-        session_id = (
-            event.get("scheduled_workout_id")
-            or event.get("extendedProps", {}).get("scheduled_workout_id")
-        )
-
-        if is_coach and session_id:
-            st.session_state["editing_session_id"] = session_id
-            st.success(f"Editing: {event_title} ...")
-            time.sleep(1)
-            st.switch_page("pages/3_Coach_Workout_Plans.py")
-        elif not is_coach and session_id:
-            st.session_state["workout_date"] = event_date
-            st.session_state["scheduled_workout_id"] = session_id
-            st.success(f"Logging: {event_title} ...")
-            time.sleep(1)
-            st.switch_page("pages/2_Athlete_Workouts.py")
+
+    if is_coach and session_id:
+        st.session_state["editing_session_id"] = session_id
+        st.success(f"Editing: {event_title} ...")
+        time.sleep(1)
+        st.switch_page("pages/3_Coach_Workout_Plans.py")
+    elif not is_coach and session_id:
+        st.session_state["workout_date"] = event_date
+        st.session_state["scheduled_workout_id"] = session_id
+        st.success(f"Logging: {event_title} ...")
+        time.sleep(1)
+        st.switch_page("pages/2_Athlete_Workouts.py")
+
+perf.panel(is_coach)
 
 # --- Log Out button ---
 if st.button("Log Out"):
     for key in [
         "user", "access_token", "refresh_token",
-        "user_id", "workout_date", "scheduled_workout_id", "editing_session_id"
+        "user_id", "workout_date", "scheduled_workout_id", "editing_session_id",
+        "calendar_window"
     ]:
         if key in st.session_state:
             del st.session_state[key]
@@ -0,0 +1,306 @@
+"""Headless page benchmarks against the in-memory Supabase stand-in.
+
+Each scenario drives a page with Streamlit's ``AppTest`` and measures one
+interaction: round trips, rows and bytes moved, and wall time. Pages run
+against ``gymapp.fake_supabase`` seeded with a realistic program, with
+``--latency`` seconds added to every request.
+
+Run from the repository root::
+
+    python benchmarks/bench_pages.py
+    python benchmarks/bench_pages.py --latency 0.05 --athletes 150
+
+Exits with status 1 if any interaction needs more round trips than its
+budget in ``SCENARIOS``, so it can gate changes to the data-access code.
+UI pauses (``time.sleep``) and ``st.switch_page`` are stubbed out, so the
+wall time reflects data access and rendering only and each page can be
+run as its own entrypoint. The workout outbox is a temporary file, and its
+background flusher is not started: uploads are measured on their own.
+Session sync pulls only when a scenario raises a change event, and the
+change listener is not started either.
+"""
+import argparse
+import datetime
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+# A throwaway outbox, flushed explicitly by the scenarios rather than in the background
+os.environ["OUTBOX_PATH"] = os.path.join(tempfile.mkdtemp(prefix="gymapp-bench-"), "outbox.sqlite3")
+# No timed sync pulls; scenarios raise change events instead
+os.environ["SYNC_INTERVAL"] = "3600"
+# Keep per-call perf lines out of the results table
+os.environ["PERF_LOG"] = "off"
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from gymapp import cache, db, outbox, schedule, sync  # noqa: E402
+from gymapp.fake_supabase import FakeSupabase  # noqa: E402
+
+
+def _login(at, fake, user):
+    email = next(e for e, u in fake.auth_users.items() if u["id"] == user["id"])
+    at.session_state["user"] = SimpleNamespace(id=user["id"], email=email, user_metadata={"name": user["name"]})
+    at.session_state["user_id"] = user["id"]
+    at.session_state["access_token"] = f"fake-access-{user['id']}"
+    at.session_state["refresh_token"] = f"fake-refresh-{user['id']}"
+    # Issued as if by a sign-in, so rpcs see the caller like auth.uid()
+    fake.auth_tokens[f"fake-access-{user['id']}"] = fake.auth_users[email]
+    fake.auth_tokens[f"fake-refresh-{user['id']}"] = fake.auth_users[email]
+
+
+def _coach(fake):
+    return next(u for u in fake.tables["users"] if u["coach"])
+
+
+def _athlete_session(fake):
+    """An athlete and a past session they attend but have not logged."""
+    today = datetime.date.today().isoformat()
+    logged = {(w["user_id"], w["scheduled_workout_id"]) for w in fake.tables["workouts"]}
+    sessions = {s["id"]: s for s in fake.tables["scheduled_workouts"]}
+    for a in fake.tables["scheduled_workout_attendees"]:
+        session = sessions[a["scheduled_workout_id"]]
+        if session["scheduled_date"] < today and (a["user_id"], session["id"]) not in logged:
+            user = next(u for u in fake.tables["users"] if u["id"] == a["user_id"])
+            return user, session
+    raise RuntimeError("seed data has no unlogged past session")
+
+
+def _button(at, label):
+    return next(b for b in at.button if b.label == label)
+
+
+# --- Scenarios: setup(at, fake) runs unmeasured, interact(at, fake) is measured ---
+
+def home_coach(at, fake):
+    _login(at, fake, _coach(fake))
+
+
+def home_coach_remote_edit_setup(at, fake):
+    home_coach(at, fake)
+    at.run()
+    # Another app server renames a session on the calendar; its change event wakes the sync
+    coach = _coach(fake)
+    start, end = schedule.default_window(datetime.date.today())
+    session = next(s for s in fake.tables["scheduled_workouts"]
+                   if s["user_id"] == coach["id"] and start <= s["scheduled_date"] <= end)
+    unsubscribe = fake.subscribe(sync.SYNC_TABLES, sync.notify)
+    fake.table("scheduled_workouts").update({"notes": "Renamed elsewhere"}).eq("id", session["id"]).execute()
+    unsubscribe()
+
+
+def home_athlete(at, fake):
+    user, _ = _athlete_session(fake)
+    _login(at, fake, user)
+
+
+def athlete_log_setup(at, fake):
+    user, session = _athlete_session(fake)
+    _login(at, fake, user)
+    at.session_state["scheduled_workout_id"] = session["id"]
+    at.session_state["workout_date"] = session["scheduled_date"]
+
+
+def athlete_log_submit_setup(at, fake):
+    athlete_log_setup(at, fake)
+    at.run()
+    # AppTest cannot edit a data_editor, so fill the sets in the per-set layout
+    at.toggle(key="compact_log").set_value(False).run()
+    for field in at.number_input:
+        field.set_value(60)
+
+
+def athlete_log_grid_submit_setup(at, fake):
+    athlete_log_setup(at, fake)
+    at.run()
+
+
+def athlete_log_submit(at, fake):
+    _button(at, "✅ Save Workout").click()
+
+
+def athlete_log_upload_setup(at, fake):
+    athlete_log_submit_setup(at, fake)
+    athlete_log_submit(at, fake)
+    at.run()
+
+
+def athlete_log_upload(at, fake):
+    outbox.flush()
+
+
+def progress_setup(at, fake):
+    # The athlete with the longest history
+    counts = {}
+    for w in fake.tables["workouts"]:
+        counts[w["user_id"]] = counts.get(w["user_id"], 0) + 1
+    user = next(u for u in fake.tables["users"] if u["id"] == max(counts, key=counts.get))
+    _login(at, fake, user)
+
+
+def coach_plan_setup(at, fake):
+    _login(at, fake, _coach(fake))
+
+
+def coach_add_exercise_setup(at, fake):
+    coach_plan_setup(at, fake)
+    at.run()
+
+
+def coach_add_exercise(at, fake):
+    _button(at, "Add Exercise").click()
+
+
+def coach_save_new_setup(at, fake):
+    coach_plan_setup(at, fake)
+    at.run()
+    names = [e["name"] for e in fake.tables["exercises"]]
+    for i in range(10):
+        _button(at, "Add Exercise").click().run()
+        at.selectbox(key=f"exercise_name_{i}").set_value(names[i]).run()
+        at.number_input(key=f"sets_{i}").set_value(4).run()
+    squad = next(sq for sq in fake.tables["squads"] if sq["coach_id"] == _coach(fake)["id"])
+    at.multiselect(key="athlete_multiselect_new_squads").set_value([squad["id"]]).run()
+
+
+def coach_browse_setup(at, fake):
+    # The coach with the most sessions, so there is an older page to load
+    counts = {}
+    for s in fake.tables["scheduled_workouts"]:
+        counts[s["user_id"]] = counts.get(s["user_id"], 0) + 1
+    coach = next(u for u in fake.tables["users"] if u["id"] == max(counts, key=counts.get))
+    _login(at, fake, coach)
+    at.run()
+
+
+def coach_older_page(at, fake):
+    _button(at, "Older ›").click()
+
+
+def coach_search_athletes(at, fake):
+    at.text_input(key="athlete_multiselect_new_search").input("athlete 01")
+
+
+def coach_save(at, fake):
+    _button(at, "Save Workout Plan").click()
+
+
+def coach_edit_setup(at, fake):
+    coach = _coach(fake)
+    coach_plan_setup(at, fake)
+    session = next(s for s in fake.tables["scheduled_workouts"] if s["user_id"] == coach["id"])
+    at.session_state["editing_session_id"] = session["id"]
+    at.run()
+
+
+def coach_edit_title_setup(at, fake):
+    coach_edit_setup(at, fake)
+    next(t for t in at.text_input if t.label == "Event Title").set_value("Renamed session").run()
+
+
+def coach_delete(at, fake):
+    _button(at, "Delete Session").click()
+
+
+def coach_repeat_setup(at, fake):
+    coach_edit_title_setup(at, fake)
+    at.multiselect(key="repeat_days").set_value([1, 3]).run()
+
+
+def coach_repeat(at, fake):
+    next(b for b in at.button if b.label.startswith("Create ")).click()
+
+
+def nothing(at, fake):
+    pass
+
+
+# name, page, setup, interaction, warm caches first, max round trips
+SCENARIOS = [
+    ("login page", "pages/1_Login.py", nothing, nothing, False, 0),
+    ("home (coach), cold", "CBI_Gym_App.py", home_coach, nothing, False, 2),
+    ("home (coach), rerun", "CBI_Gym_App.py", home_coach, nothing, True, 0),
+    # One delta pull; the cached calendar window is patched, not reloaded
+    ("home (coach), another coach's edit", "CBI_Gym_App.py", home_coach_remote_edit_setup, nothing, False, 1),
+    ("home (athlete), cold", "CBI_Gym_App.py", home_athlete, nothing, False, 2),
+    # Session plan, exercise names, existing log and last performance (one rpc for all exercises)
+    ("athlete log, render", "pages/2_Athlete_Workouts.py", athlete_log_setup, nothing, False, 5),
+    ("athlete log, submit", "pages/2_Athlete_Workouts.py", athlete_log_submit_setup, athlete_log_submit, False, 4),
+    ("athlete log, grid submit", "pages/2_Athlete_Workouts.py", athlete_log_grid_submit_setup, athlete_log_submit, False, 4),
+    # Upload of the queued log (2 writes), then the page renders again (5 reads)
+    ("athlete log, upload queued log", "pages/2_Athlete_Workouts.py", athlete_log_upload_setup, athlete_log_upload, False, 7),
+    ("athlete progress, cold", "pages/5_Athlete_Progress.py", progress_setup, nothing, False, 3),
+    ("athlete progress, rerun", "pages/5_Athlete_Progress.py", progress_setup, nothing, True, 0),
+    ("coach compliance, cold", "pages/6_Coach_Compliance.py", home_coach, nothing, False, 5),
+    ("coach compliance, rerun", "pages/6_Coach_Compliance.py", home_coach, nothing, True, 0),
+    ("coach export, render", "pages/7_Coach_Export.py", home_coach, nothing, False, 1),
+    ("coach squads, render", "pages/9_Coach_Squads.py", home_coach, nothing, False, 3),
+    ("coach import, render", "pages/8_Coach_Import.py", home_coach, nothing, False, 3),
+    # Profile, squads, catalogue, a page of sessions and the first page of athletes (not the roster)
+    ("coach plan, cold", "pages/3_Coach_Workout_Plans.py", coach_plan_setup, nothing, False, 5),
+    ("coach plan, add exercise", "pages/3_Coach_Workout_Plans.py", coach_add_exercise_setup, coach_add_exercise, False, 0),
+    ("coach plan, older sessions page", "pages/3_Coach_Workout_Plans.py", coach_browse_setup, coach_older_page, False, 1),
+    # The squad's 25 athletes are booked server-side by the same request
+    ("coach plan, save new 10x4 for a squad", "pages/3_Coach_Workout_Plans.py", coach_save_new_setup, coach_save, False, 1),
+    ("coach plan, search athletes", "pages/3_Coach_Workout_Plans.py", coach_add_exercise_setup, coach_search_athletes, False, 1),
+    # The edit form's reads (3) run before the click, then one save_plan rpc
+    ("coach plan, save title edit", "pages/3_Coach_Workout_Plans.py", coach_edit_title_setup, coach_save, False, 4),
+    # One delete_session rpc, then the page reloads the list and roster (4)
+    ("coach plan, delete session", "pages/3_Coach_Workout_Plans.py", coach_edit_setup, coach_delete, False, 5),
+    # One rpc creates all 24 sessions; around it, AppTest runs the whole page for the
+    # fragment's click (3 reads) and the rerun reloads the session and the list (4)
+    ("coach plan, repeat 12 weeks x2", "pages/3_Coach_Workout_Plans.py", coach_repeat_setup, coach_repeat, False, 8),
+]
+
+
+def run_scenario(fake, page, setup, interact, warm):
+    cache.clear_all()
+    at = AppTest.from_file(str(ROOT / page), default_timeout=60)
+    setup(at, fake)
+    if warm:
+        at.run()
+    fake.reset_stats()
+    started = time.perf_counter()
+    interact(at, fake)
+    at.run()
+    elapsed = time.perf_counter() - started
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    return {**fake.stats(), "seconds": elapsed}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds added to every request")
+    parser.add_argument("--athletes", type=int, default=60)
+    parser.add_argument("--exercises", type=int, default=120)
+    parser.add_argument("--weeks", type=int, default=12)
+    args = parser.parse_args(argv)
+
+    fake = FakeSupabase.seeded(
+        latency=args.latency, athletes=args.athletes, exercises=args.exercises, weeks=args.weeks,
+    )
+    db.use_client(fake)
+
+    failed = []
+    print(f"{'interaction':36} {'trips':>6} {'budget':>6} {'rows':>7} {'bytes':>9} {'ms':>8}")
+    with mock.patch("time.sleep"), mock.patch("streamlit.switch_page"), \
+            mock.patch.object(outbox, "ensure_flusher"), mock.patch.object(sync, "ensure_listener"):
+        for name, page, setup, interact, warm, budget in SCENARIOS:
+            result = run_scenario(fake, page, setup, interact, warm)
+            flag = "" if result["round_trips"] <= budget else "  OVER BUDGET"
+            if flag:
+                failed.append(name)
+            print(f"{name:36} {result['round_trips']:>6} {budget:>6} {result['rows']:>7} "
+                  f"{result['bytes']:>9} {result['seconds'] * 1000:>8.1f}{flag}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
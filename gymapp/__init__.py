@@ -0,0 +1 @@
+"""Shared helpers used by the CBI Gym App pages."""
@@ -0,0 +1,167 @@
+"""Process-wide TTL cache for reference data.
+
+Every entry is tagged with the tables it was read from. Writes made through
+``gymapp.db`` invalidate every entry tagged with the written table, so the
+app sees its own changes immediately; the TTL bounds how stale data written
+elsewhere (another process, the Supabase dashboard) can get.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from gymapp import settings
+
+# Returned by a ``patch`` function to drop the entry instead
+DROP = object()
+
+
+class TTLCache:
+    """Size-bounded LRU cache whose entries expire after ``ttl`` seconds."""
+
+    def __init__(self, name, ttl, maxsize):
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()  # key -> (expires_at, tables, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._generation = 0  # bumped on invalidation
+
+    def get(self, key, load, tables=()):
+        """Return the cached value for ``key``, calling ``load()`` on a miss."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+            generation = self._generation
+
+        value = load()
+        with self._lock:
+            if generation != self._generation:
+                # A write landed while loading; don't cache what may predate it
+                return value
+            self._entries[key] = (time.monotonic() + self.ttl, frozenset(tables), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def peek(self, key):
+        """The live cached value for ``key``, or None; never loads."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[2] if entry and entry[0] > time.monotonic() else None
+
+    def invalidate_table(self, table):
+        """Drop every entry read from ``table``."""
+        with self._lock:
+            stale = [k for k, (_, tables, _) in self._entries.items() if table in tables]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+            self._generation += 1
+
+    def patch(self, tables, fn):
+        """Rewrite entries read from any of ``tables`` in place.
+
+        ``fn(key, value)`` returns the new value, ``value`` itself to keep
+        the entry as is, or ``DROP`` to remove it. Entries keep their expiry.
+        """
+        tables = set(tables)
+        with self._lock:
+            changed = False
+            for key, (expires_at, tags, value) in list(self._entries.items()):
+                if not tables & tags:
+                    continue
+                new = fn(key, value)
+                if new is DROP:
+                    del self._entries[key]
+                    self.invalidations += 1
+                elif new is not value:
+                    self._entries[key] = (expires_at, tags, new)
+                else:
+                    continue
+                changed = True
+            if changed:
+                self._generation += 1
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._generation += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+            }
+
+
+# Exercise catalogue, athlete roster and similar slow-changing tables
+reference = TTLCache(
+    "reference",
+    ttl=settings.get("REFERENCE_CACHE_TTL", 300),
+    maxsize=settings.get("REFERENCE_CACHE_SIZE", 64),
+)
+
+# Per-user profile and role, keyed by user id
+profiles = TTLCache(
+    "profiles",
+    ttl=settings.get("PROFILE_CACHE_TTL", 120),
+    maxsize=settings.get("PROFILE_CACHE_SIZE", 1000),
+)
+
+# Calendar windows, keyed by (role, user id, start, end)
+sessions = TTLCache(
+    "sessions",
+    ttl=settings.get("SESSION_CACHE_TTL", 300),
+    maxsize=settings.get("SESSION_CACHE_SIZE", 2000),
+)
+
+# Compliance rollups and session attendance (gymapp.compliance); the rollup
+# is the whole squad's, so only coaches may fill it
+rollups = TTLCache(
+    "rollups",
+    ttl=settings.get("ROLLUP_CACHE_TTL", 300),
+    maxsize=settings.get("ROLLUP_CACHE_SIZE", 200),
+)
+
+# Athlete workout histories, keyed by user id; patched in place as workouts
+# are logged (gymapp.history), so they can live much longer than the rest
+history = TTLCache(
+    "history",
+    ttl=settings.get("HISTORY_CACHE_TTL", 1800),
+    maxsize=settings.get("HISTORY_CACHE_SIZE", 200),
+)
+
+ALL_CACHES = (reference, profiles, sessions, rollups, history)
+
+
+def invalidate_table(table):
+    """Called by ``gymapp.db`` after any write to ``table``."""
+    for cache in ALL_CACHES:
+        cache.invalidate_table(table)
+
+
+def patch_tables(tables, fn):
+    """``TTLCache.patch`` on every cache; used by ``gymapp.sync``."""
+    for cache in ALL_CACHES:
+        cache.patch(tables, fn)
+
+
+def clear_all():
+    for cache in ALL_CACHES:
+        cache.clear()
@@ -0,0 +1,71 @@
+"""Indexed exercise catalogue: id and name lookups plus typeahead search.
+
+Built once per cache refresh by ``reference.catalogue()``, so pages never
+scan the exercise list to resolve an id, a name or a selectbox position.
+"""
+import bisect
+import difflib
+import re
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+class Catalogue:
+    """The exercise rows with the lookup tables pages need."""
+
+    def __init__(self, exercises):
+        self.exercises = list(exercises)
+        self.by_id = {e["id"]: e for e in self.exercises}
+        self.by_name = {e["name"]: e for e in self.exercises}
+        # Selectbox options in catalogue order, and each name's position in them
+        self.names = list(self.by_name)
+        self.position = {name: i for i, name in enumerate(self.names)}
+        self._lower = [name.lower() for name in self.names]
+        self._lower_position = {name: i for i, name in enumerate(self._lower)}
+        # Sorted (word, name position) pairs: every word of every name is a prefix key
+        self._words = sorted(
+            (word, i) for i, name in enumerate(self._lower) for word in set(_WORD.findall(name))
+        )
+        self._word_keys = [word for word, _ in self._words]
+
+    def __len__(self):
+        return len(self.exercises)
+
+    def name(self, exercise_id, default=None):
+        exercise = self.by_id.get(exercise_id)
+        return exercise["name"] if exercise else default
+
+    def search(self, text, limit=50):
+        """Names matching ``text``, best first.
+
+        Names starting with ``text`` come first, then names where every typed
+        word prefixes some word of the name ("b pre" finds "Bench Press"),
+        then close spellings for typos. Blank text returns every name.
+        """
+        text = text.strip().lower()
+        if not text:
+            return self.names[:limit] if limit else list(self.names)
+
+        starts = [i for i, name in enumerate(self._lower) if name.startswith(text)]
+        matches = set(self._word_matches(_WORD.findall(text)))
+        ranked = starts + sorted(matches.difference(starts))
+        if len(ranked) < (limit or len(self.names)):
+            close = difflib.get_close_matches(text, self._lower, n=5, cutoff=0.7)
+            ranked += [self._lower_position[c] for c in close if self._lower_position[c] not in ranked]
+        names = [self.names[i] for i in ranked]
+        return names[:limit] if limit else names
+
+    def _word_matches(self, words):
+        """Positions of names that have a word starting with each of ``words``."""
+        found = None
+        for word in words:
+            lo = bisect.bisect_left(self._word_keys, word)
+            hits = set()
+            for key, i in self._words[lo:]:
+                if not key.startswith(word):
+                    break
+                hits.add(i)
+            found = hits if found is None else found & hits
+            if not found:
+                return set()
+        return found or set()
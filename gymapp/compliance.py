@@ -0,0 +1,68 @@
+"""Squad compliance for the coach dashboard.
+
+Planned vs logged sessions and volume come pre-aggregated per athlete per
+week from the ``squad_compliance`` rpc, which reads a rollup table that
+triggers keep current as sessions are booked and workouts logged
+(sql/005_compliance_rollup.sql). A season for the whole squad is one
+request of athletes x weeks rows; the dashboard's tables are pandas
+reshapes of that result.
+"""
+import pandas as pd
+
+from gymapp import db
+from gymapp.cache import rollups
+
+COMPLIANCE_TABLES = ("scheduled_workouts", "scheduled_workout_attendees", "workouts", "workout_sets")
+
+WEEK_COLUMNS = ["user_id", "week", "planned", "due", "logged", "volume"]
+
+
+def weekly(start, end):
+    """Per athlete per week between ``start`` and ``end`` (ISO dates), as a DataFrame.
+
+    ``due`` counts the planned sessions that are not in the future. Call it
+    for coaches only: the rpc runs as the caller, so an athlete would get
+    just their own rows, and the result is cached for every coach.
+    """
+    def load():
+        rows = db.rpc("squad_compliance", {"p_from": start, "p_to": end}).execute().data or []
+        frame = pd.DataFrame(rows, columns=WEEK_COLUMNS)
+        frame["week"] = pd.to_datetime(frame["week"])
+        for column in ("planned", "due", "logged"):
+            frame[column] = pd.to_numeric(frame[column]).fillna(0).astype("int64")
+        frame["volume"] = pd.to_numeric(frame["volume"]).astype("float64")
+        return frame
+
+    return rollups.get(("compliance", start, end), load, tables=COMPLIANCE_TABLES)
+
+
+def session_attendance(session_id):
+    """``[{"user_id", "logged", "sets", "volume"}]`` for everyone booked into a session."""
+    return rollups.get(
+        ("attendance", session_id),
+        lambda: db.rpc("session_attendance", {"p_session_id": session_id}).execute().data or [],
+        tables=COMPLIANCE_TABLES,
+    )
+
+
+def _rate(logged, due):
+    return (logged / due.where(due > 0)).clip(upper=1.0)
+
+
+def athlete_summary(frame, recent_weeks=4):
+    """One row per athlete: due, logged, completion rate, volume and recent rate.
+
+    ``recent_rate`` covers the last ``recent_weeks`` weeks in ``frame``.
+    """
+    totals = frame.groupby("user_id")[["planned", "due", "logged", "volume"]].sum()
+    totals["rate"] = _rate(totals["logged"], totals["due"])
+    cutoff = frame["week"].max() - pd.Timedelta(weeks=recent_weeks - 1)
+    recent = frame[frame["week"] >= cutoff].groupby("user_id")[["due", "logged"]].sum()
+    totals["recent_rate"] = _rate(recent["logged"], recent["due"])
+    return totals.reset_index().sort_values(["rate", "user_id"], na_position="last", ignore_index=True)
+
+
+def week_matrix(frame):
+    """Completion rate with athletes as rows and weeks as columns."""
+    grid = frame.assign(rate=_rate(frame["logged"], frame["due"]))
+    return grid.pivot_table(index="user_id", columns="week", values="rate", aggfunc="first")
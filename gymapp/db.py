@@ -0,0 +1,279 @@
+"""Process-wide Supabase access for every page.
+
+Streamlit re-executes each page script on every widget interaction, so pages
+must not build their own client. This module keeps one client (and one pooled,
+keep-alive HTTP connection pool) per process and applies the logged-in user's
+bearer token to each request instead of to the client.
+
+Auth calls (sign in, sign up, set_session, ...) change the state of the client
+they run on, so they go through a short-lived client from ``auth()`` and never
+touch the shared one.
+"""
+import base64
+import contextlib
+import contextvars
+import json
+import time
+
+import httpx
+import streamlit as st
+from supabase import ClientOptions, create_client
+
+from gymapp import cache, perf, settings
+
+# Connection pool shared by every session served from this process
+POOL_LIMITS = httpx.Limits(max_connections=50, max_keepalive_connections=20, keepalive_expiry=60)
+REQUEST_TIMEOUT = httpx.Timeout(20.0, connect=5.0)
+
+# Refresh the user's token if it expires within this many seconds
+TOKEN_REFRESH_MARGIN = 60
+# Service-role key for process-wide jobs that must see every user's rows
+SERVICE_KEY = settings.get("SUPABASE_SERVICE_KEY", "")
+
+
+@st.cache_resource
+def _shared_client():
+    http_client = httpx.Client(
+        limits=POOL_LIMITS,
+        timeout=REQUEST_TIMEOUT,
+        follow_redirects=True,
+        http2=True,
+    )
+    options = ClientOptions(
+        auto_refresh_token=False,
+        persist_session=False,
+        httpx_client=http_client,
+    )
+    return create_client(st.secrets["SUPABASE_URL"], st.secrets["SUPABASE_KEY"], options)
+
+
+_client_override = None
+
+
+def use_client(client):
+    """Serve every query from ``client`` instead, e.g. a ``FakeSupabase``.
+
+    Pass None to go back to the real project.
+    """
+    global _client_override
+    _client_override = client
+
+
+def get_client():
+    """Return the process-wide Supabase client."""
+    if _client_override is not None:
+        return _client_override
+    return _shared_client()
+
+
+def auth():
+    """Return the auth API of a fresh, isolated client.
+
+    Signing in stores the session on the client that made the call, so every
+    auth flow gets its own client rather than the shared one.
+    """
+    if _client_override is not None:
+        return _Auth(_client_override.auth)
+    options = ClientOptions(auto_refresh_token=False, persist_session=False)
+    return _Auth(create_client(st.secrets["SUPABASE_URL"], st.secrets["SUPABASE_KEY"], options).auth)
+
+
+def _token_expiry(token):
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return json.loads(base64.urlsafe_b64decode(payload)).get("exp")
+    except (IndexError, ValueError):
+        return None
+
+
+def token_expiring(token):
+    """Whether ``token`` expires within ``TOKEN_REFRESH_MARGIN`` seconds."""
+    exp = _token_expiry(token)
+    return exp is not None and exp - time.time() <= TOKEN_REFRESH_MARGIN
+
+
+# Token pinned for work running off the script thread (see gymapp.parallel)
+_pinned_token = contextvars.ContextVar("pinned_token", default=None)
+
+
+@contextlib.contextmanager
+def pin_token(token):
+    """Use ``token`` for queries started in this context, without session state."""
+    reset = _pinned_token.set(token)
+    try:
+        yield
+    finally:
+        _pinned_token.reset(reset)
+
+
+def _access_token():
+    """The current user's access token, refreshed if it is about to expire."""
+    pinned = _pinned_token.get()
+    if pinned is not None:
+        return pinned or None
+    token = st.session_state.get("access_token")
+    if not token:
+        return None
+    if not token_expiring(token):
+        return token
+
+    refresh_token = st.session_state.get("refresh_token")
+    if not refresh_token:
+        return None
+    try:
+        session = auth().refresh_session(refresh_token).session
+    except Exception:
+        session = None
+    if not session:
+        # Fall back to the anon key rather than sending an expired token
+        return None
+    st.session_state["access_token"] = session.access_token
+    st.session_state["refresh_token"] = session.refresh_token
+    return session.access_token
+
+
+def current_token():
+    """The token ``table()`` would use right now ("" for the anon key)."""
+    return _access_token() or ""
+
+
+def service_token():
+    """Token for work done on behalf of the whole process, not one user.
+
+    ``SUPABASE_SERVICE_KEY``, which bypasses row level security, so use it
+    only for reads whose results are not shown to users as they are. None
+    when it is not configured; the local stand-in has no row level
+    security, so any token will do there.
+    """
+    if _client_override is not None:
+        return SERVICE_KEY or "local-service"
+    return SERVICE_KEY or None
+
+
+def _with_bearer(query, token):
+    if token:
+        # postgrest-py keeps per-request headers on `request` (older releases on the builder)
+        getattr(query, "request", query).headers["Authorization"] = f"Bearer {token}"
+    return query
+
+
+class _Query:
+    """A postgrest query builder whose ``execute()`` is timed and recorded.
+
+    Writes also invalidate cached reads of their table once they have run,
+    as do rpcs for each table in ``writes``.
+    """
+
+    def __init__(self, query, target, op, writes=()):
+        self._query = query
+        self._target = target
+        self._op = op
+        self._writes = writes
+
+    def __getattr__(self, name):
+        attr = getattr(self._query, name)
+        if not callable(attr):
+            return attr
+        if name == "execute":
+            return self._execute
+
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            # Filters return the builder (single/maybe_single a new one)
+            return _Query(result, self._target, self._op, self._writes) if hasattr(result, "execute") else result
+
+        return call
+
+    def _execute(self):
+        result = _timed(self._target, self._op, self._query.execute)
+        if self._op in WRITE_OPS:
+            cache.invalidate_table(self._target)
+        for table in self._writes:
+            cache.invalidate_table(table)
+        return result
+
+
+def _timed(target, op, call, *args, **kwargs):
+    started = time.perf_counter()
+    try:
+        result = call(*args, **kwargs)
+    except Exception as e:
+        perf.record(target, op, None, time.perf_counter() - started, error=e)
+        raise
+    data = getattr(result, "data", None) if target != "auth" else None
+    perf.record(target, op, data, time.perf_counter() - started)
+    return result
+
+
+WRITE_OPS = ("insert", "update", "upsert", "delete")
+
+
+class _Table:
+    """``client.table(name)`` that adds the user's token to each query it starts."""
+
+    def __init__(self, name, builder, token):
+        self._name = name
+        self._builder = builder
+        self._token = token
+
+    def __getattr__(self, op):
+        start = getattr(self._builder, op)
+
+        def build(*args, **kwargs):
+            return _Query(_with_bearer(start(*args, **kwargs), self._token), self._name, op)
+
+        return build
+
+
+class _Auth:
+    """An auth API whose calls are timed and recorded."""
+
+    def __init__(self, api):
+        self._api = api
+
+    def __getattr__(self, name):
+        attr = getattr(self._api, name)
+        if not callable(attr):
+            return attr
+        return lambda *args, **kwargs: _timed("auth", name, attr, *args, **kwargs)
+
+
+def table(name):
+    """Start a query on ``name`` as the logged-in user."""
+    return _Table(name, get_client().table(name), _access_token())
+
+
+def rpc(fn, params=None, writes=()):
+    """Call a Postgres function as the logged-in user.
+
+    ``writes`` names the tables the function modifies, so cached reads of
+    them are dropped once it has run.
+    """
+    return _Query(_with_bearer(get_client().rpc(fn, params or {}), _access_token()), fn, "rpc", writes)
+
+
+# Rows per request for bulk writes. PostgREST accepts far more; the cap keeps
+# request bodies and statement time bounded for very large plans.
+BULK_CHUNK_SIZE = 500
+# Values per `in.(...)` filter, which travels in the URL
+FILTER_CHUNK_SIZE = 100
+
+
+def chunked(rows, size=BULK_CHUNK_SIZE):
+    """Split ``rows`` into lists of at most ``size`` rows."""
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def upsert_many(name, rows, on_conflict, chunk_size=BULK_CHUNK_SIZE):
+    """Insert or update ``rows`` keyed on the ``on_conflict`` columns.
+
+    Returns the number of requests made.
+    """
+    round_trips = 0
+    for chunk in chunked(rows, chunk_size):
+        table(name).upsert(chunk, on_conflict=on_conflict, returning="minimal").execute()
+        round_trips += 1
+    return round_trips
+
@@ -0,0 +1,193 @@
+"""Bulk export of program data to CSV or Parquet.
+
+Each dataset is a generator pipeline: rows are read in fixed-size pages
+(keyset-paginated on ``id``), joined with athlete, exercise and session
+names page by page, and written out as they arrive. Only one page of facts
+plus the small name lookups (users, exercises) is held while the file is
+built, and output goes to a spooled temporary file that spills to disk.
+The finished file is handed to Streamlit, which keeps it in memory to
+serve the download, so exports stop with an error past
+``EXPORT_MAX_BYTES``.
+
+Parquet needs ``pyarrow`` (optional); CSV uses the standard library.
+"""
+import csv
+import io
+import tempfile
+
+from gymapp import db, reference, settings
+
+EXPORT_PAGE_SIZE = settings.get("EXPORT_PAGE_SIZE", 1000)
+# Workouts whose sets are read per request (about 30 sets each)
+SETS_WORKOUT_CHUNK = 30
+# Exports larger than this spill from memory to a temporary file
+SPOOL_BYTES = 8 * 1024 * 1024
+# Largest file an export may produce; the download is served from memory
+EXPORT_MAX_BYTES = settings.get("EXPORT_MAX_BYTES", 100 * 1024 * 1024)
+
+DATASETS = {
+    "workout_sets": ["set_id", "workout_id", "date", "athlete", "session", "exercise", "set_number",
+                     "reps", "exertion_metric", "value", "notes"],
+    "workouts": ["workout_id", "date", "athlete", "session", "scheduled_workout_id", "notes"],
+    "scheduled_workouts": ["scheduled_workout_id", "scheduled_date", "coach", "title"],
+    "exercises": ["exercise_id", "name", "description", "video_url"],
+}
+
+
+def _pages(table, columns, page_size=EXPORT_PAGE_SIZE, where=lambda query: query):
+    """Yield lists of ``table`` rows ordered by id, ``page_size`` at a time."""
+    after = None
+    while True:
+        query = where(db.table(table).select(columns))
+        if after is not None:
+            query = query.gt("id", after)
+        page = query.order("id").limit(page_size).execute().data or []
+        if page:
+            yield page
+        if len(page) < page_size:
+            return
+        after = page[-1]["id"]
+
+
+def _user_names():
+    names = {}
+    for page in _pages("users", "id, name"):
+        names.update((u["id"], u["name"]) for u in page)
+    return names
+
+
+def _session_titles(session_ids):
+    ids = sorted({i for i in session_ids if i})
+    titles = {}
+    for chunk in db.chunked(ids, db.FILTER_CHUNK_SIZE):
+        rows = db.table("scheduled_workouts").select("id, notes").in_("id", chunk).execute().data or []
+        titles.update((s["id"], s["notes"]) for s in rows)
+    return titles
+
+
+def _date_range(column, start, end):
+    def where(query):
+        if start:
+            query = query.gte(column, start)
+        if end:
+            query = query.lte(column, end)
+        return query
+    return where
+
+
+def _workout_pages(start, end):
+    """Pages of workouts in the date range, each with its athlete and session names."""
+    users = _user_names()
+    for page in _pages("workouts", "id, user_id, date, scheduled_workout_id, notes",
+                       where=_date_range("date", start, end)):
+        titles = _session_titles(w["scheduled_workout_id"] for w in page)
+        for w in page:
+            w["athlete"] = users.get(w["user_id"], w["user_id"])
+            w["session"] = titles.get(w["scheduled_workout_id"], "")
+        yield page
+
+
+def rows(dataset, start=None, end=None):
+    """Yield export rows of ``dataset`` (a key of ``DATASETS``) as dicts.
+
+    ``start``/``end`` are inclusive ISO dates; they filter every dataset
+    except ``exercises``.
+    """
+    if dataset == "exercises":
+        for page in _pages("exercises", "id, name, description, video_url"):
+            for e in page:
+                yield {"exercise_id": e["id"], "name": e["name"],
+                       "description": e.get("description"), "video_url": e.get("video_url")}
+
+    elif dataset == "scheduled_workouts":
+        users = _user_names()
+        for page in _pages("scheduled_workouts", "id, user_id, scheduled_date, notes",
+                           where=_date_range("scheduled_date", start, end)):
+            for s in page:
+                yield {"scheduled_workout_id": s["id"], "scheduled_date": s["scheduled_date"],
+                       "coach": users.get(s["user_id"], s["user_id"]), "title": s["notes"]}
+
+    elif dataset == "workouts":
+        for page in _workout_pages(start, end):
+            for w in page:
+                yield {"workout_id": w["id"], "date": w["date"], "athlete": w["athlete"],
+                       "session": w["session"], "scheduled_workout_id": w["scheduled_workout_id"],
+                       "notes": w["notes"]}
+
+    elif dataset == "workout_sets":
+        catalogue = reference.catalogue()
+        for page in _workout_pages(start, end):
+            by_id = {w["id"]: w for w in page}
+            for chunk in db.chunked(list(by_id), SETS_WORKOUT_CHUNK):
+                # Paged like everything else: a chunk can hold more sets than one response
+                sets = _pages("workout_sets",
+                              "id, workout_id, exercise_id, set_number, reps, exertion_metric, value, notes",
+                              where=lambda query, chunk=chunk: query.in_("workout_id", chunk))
+                for s in (s for page in sets for s in page):
+                    w = by_id[s["workout_id"]]
+                    yield {"set_id": s["id"], "workout_id": w["id"], "date": w["date"],
+                           "athlete": w["athlete"], "session": w["session"],
+                           "exercise": catalogue.name(s["exercise_id"], s["exercise_id"]),
+                           "set_number": s["set_number"], "reps": s["reps"],
+                           "exertion_metric": s["exertion_metric"], "value": s["value"],
+                           "notes": s["notes"]}
+    else:
+        raise ValueError(f"unknown dataset {dataset!r}")
+
+
+def _batches(rows, out, size=EXPORT_PAGE_SIZE):
+    """Yield ``rows`` in lists of ``size``, stopping once ``out`` outgrows the limit."""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+            if out.tell() > EXPORT_MAX_BYTES:
+                raise ValueError(
+                    f"the export is larger than {EXPORT_MAX_BYTES // (1024 * 1024)} MB; "
+                    "pick a shorter date range"
+                )
+    if batch:
+        yield batch
+
+
+def write_csv(dataset, rows, out):
+    """Write ``rows`` to the binary file ``out`` as UTF-8 CSV, a batch at a time."""
+    text = io.TextIOWrapper(out, encoding="utf-8", newline="", write_through=True)
+    writer = csv.DictWriter(text, fieldnames=DATASETS[dataset])
+    writer.writeheader()
+    for batch in _batches(rows, out):
+        writer.writerows(batch)
+    text.detach()
+
+
+def parquet_available():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def write_parquet(dataset, rows, out):
+    """Write ``rows`` to the binary file ``out`` as Parquet, one row group per batch."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    types = {"set_number": pa.int32(), "reps": pa.int32(), "value": pa.float64()}
+    schema = pa.schema([(c, types.get(c, pa.string())) for c in DATASETS[dataset]])
+    with pq.ParquetWriter(out, schema) as writer:
+        for batch in _batches(rows, out):
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+
+
+WRITERS = {"csv": write_csv, "parquet": write_parquet}
+
+
+def export(dataset, fmt, start=None, end=None):
+    """Export ``dataset`` as ``fmt`` ("csv" or "parquet") into a rewound temporary file."""
+    out = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES)
+    WRITERS[fmt](dataset, rows(dataset, start, end), out)
+    out.seek(0)
+    return out
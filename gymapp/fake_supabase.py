@@ -0,0 +1,966 @@
+"""In-memory stand-in for the parts of the Supabase client the app uses.
+
+``FakeSupabase`` answers ``table()`` queries from plain lists of dicts,
+``rpc()`` calls from Python versions of the Postgres functions in ``sql/``
+and ``auth.*`` from an in-memory user list, so data-access code can be
+exercised without the live project::
+
+    from gymapp import db
+    from gymapp.fake_supabase import FakeSupabase, seed_tables
+
+    fake = FakeSupabase(seed_tables(athletes=60), latency=0.03)
+    db.use_client(fake)
+
+Every call sleeps for ``latency`` seconds (outside the store lock, so
+concurrent calls overlap like real network requests) and is recorded in
+``fake.requests``; ``fake.stats()`` totals round trips, rows and bytes.
+Table reads return at most ``max_rows`` rows, like PostgREST's ``max-rows``
+(1000 on Supabase), so code that forgets to page is caught locally.
+
+Writes to session data are stamped, tombstoned and announced to
+subscribers (``subscribe()``) the way the triggers and Realtime publication
+in sql/010_session_sync.sql do, so delta sync can be exercised locally.
+"""
+import contextlib
+import copy
+import datetime
+import json
+import operator
+import random
+import re
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+
+
+class FakeResponse:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+def _coerce(stored, value):
+    # PostgREST compares using the column's type; filters arrive as text
+    if isinstance(stored, bool) and isinstance(value, str):
+        return value.lower() == "true"
+    if isinstance(stored, (int, float)) and not isinstance(stored, bool) and isinstance(value, str):
+        try:
+            return type(stored)(value)
+        except ValueError:
+            return value
+    return value
+
+
+def _compare(op):
+    def check(row, column, value):
+        stored = row.get(column)
+        if stored is None:
+            return False
+        return op(stored, _coerce(stored, value))
+    return check
+
+
+_OPS = {
+    "eq": operator.eq, "neq": operator.ne,
+    "gt": operator.gt, "gte": operator.ge, "lt": operator.lt, "lte": operator.le,
+}
+
+
+def _ilike(pattern):
+    regex = re.compile(".*".join(re.escape(p) for p in pattern.split("%")), re.IGNORECASE | re.DOTALL)
+    return lambda row, c, _: bool(regex.fullmatch(str(row.get(c) or "")))
+
+
+def _split_terms(text):
+    """Split a PostgREST logic list on the commas outside parentheses."""
+    terms, depth, start = [], 0, 0
+    for i, ch in enumerate(text):
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "," and depth == 0:
+            terms.append(text[start:i])
+            start = i + 1
+    terms.append(text[start:])
+    return [t.strip() for t in terms if t.strip()]
+
+
+def _logic(kind, text):
+    """Predicate for an ``or=(...)`` / ``and(...)`` filter string."""
+    checks = []
+    for term in _split_terms(text):
+        nested = re.fullmatch(r"(and|or)\((.*)\)", term, re.DOTALL)
+        if nested:
+            checks.append(_logic(nested.group(1), nested.group(2)))
+            continue
+        column, op, value = term.split(".", 2)
+        check = _ilike(value.replace("*", "%")) if op == "ilike" else _compare(_OPS[op])
+        checks.append(lambda row, check=check, column=column, value=value: check(row, column, value))
+    combine = any if kind == "or" else all
+    return lambda row: combine(c(row) for c in checks)
+
+
+def _columns(spec):
+    spec = spec.strip()
+    if not spec or spec == "*":
+        return None
+    return [c.strip() for c in spec.split(",")]
+
+
+def _project(rows, columns):
+    if columns is None:
+        return [dict(r) for r in rows]
+    return [{c: r.get(c) for c in columns} for r in rows]
+
+
+class FakeQuery:
+    """Mirrors the postgrest-py query builder: filters chain, ``execute()`` runs."""
+
+    def __init__(self, store, table, action, payload=None, columns="*", on_conflict=""):
+        self.store = store
+        self.table = table
+        self.action = action
+        self.payload = payload
+        self.columns = _columns(columns)
+        self.on_conflict = on_conflict
+        self.headers = {}
+        self._filters = []
+        self._order = []
+        self._limit = None
+        self._offset = 0
+        self._single = None
+
+    # --- filters ---
+    def _filter(self, column, check, value):
+        self._filters.append(lambda row: check(row, column, value))
+        return self
+
+    def eq(self, column, value):
+        return self._filter(column, _compare(_OPS["eq"]), value)
+
+    def neq(self, column, value):
+        return self._filter(column, _compare(_OPS["neq"]), value)
+
+    def gt(self, column, value):
+        return self._filter(column, _compare(_OPS["gt"]), value)
+
+    def gte(self, column, value):
+        return self._filter(column, _compare(_OPS["gte"]), value)
+
+    def lt(self, column, value):
+        return self._filter(column, _compare(_OPS["lt"]), value)
+
+    def lte(self, column, value):
+        return self._filter(column, _compare(_OPS["lte"]), value)
+
+    def in_(self, column, values):
+        values = list(values)
+        return self._filter(column, lambda row, c, v: row.get(c) in v, values)
+
+    def is_(self, column, value):
+        expected = None if value in (None, "null") else _coerce(True, value)
+        return self._filter(column, lambda row, c, v: row.get(c) is v, expected)
+
+    def ilike(self, column, pattern):
+        return self._filter(column, _ilike(pattern), None)
+
+    def or_(self, filters, **_):
+        self._filters.append(_logic("or", filters))
+        return self
+
+    def order(self, column, desc=False, **_):
+        self._order.append((column, desc))
+        return self
+
+    def limit(self, size, **_):
+        self._limit = size
+        return self
+
+    def offset(self, size):
+        self._offset = size
+        return self
+
+    def range(self, start, end):
+        self._offset, self._limit = start, end - start + 1
+        return self
+
+    def select(self, columns="*", *more, **_):
+        # `.insert(...).select(...)`-style chaining
+        self.columns = _columns(",".join((columns,) + more))
+        return self
+
+    def single(self):
+        self._single = "single"
+        return self
+
+    def maybe_single(self):
+        self._single = "maybe"
+        return self
+
+    # --- execution ---
+    def _matching(self, rows):
+        return [r for r in rows if all(f(r) for f in self._filters)]
+
+    def _sorted(self, rows):
+        for column, desc in reversed(self._order):
+            present = [r for r in rows if r.get(column) is not None]
+            missing = [r for r in rows if r.get(column) is None]
+            # Postgres puts NULLs last ascending and first descending
+            present.sort(key=lambda r: r[column], reverse=desc)
+            rows = missing + present if desc else present + missing
+        return rows
+
+    def _run(self):
+        rows = self.store.tables.setdefault(self.table, [])
+        if self.action == "select":
+            found = self._sorted(self._matching(rows))
+            limit = self.store.max_rows if self._limit is None else min(self._limit, self.store.max_rows)
+            return found[self._offset:self._offset + limit]
+        if self.action == "insert":
+            return [self.store.insert_row(self.table, r) for r in self._payload_rows()]
+        if self.action == "upsert":
+            return [self.store.upsert_row(self.table, r, self.on_conflict) for r in self._payload_rows()]
+        if self.action == "update":
+            found = self._matching(rows)
+            for r in found:
+                r.update(copy.deepcopy(self.payload))
+            return found
+        if self.action == "delete":
+            found = self._matching(rows)
+            gone = {id(r) for r in found}
+            self.store.tables[self.table] = [r for r in rows if id(r) not in gone]
+            return found
+        raise ValueError(f"unsupported action {self.action}")
+
+    def _payload_rows(self):
+        return self.payload if isinstance(self.payload, list) else [self.payload]
+
+    def execute(self):
+        data = self.store.request(
+            self.table, self.action, self.payload,
+            lambda: _project(self._run(), self.columns),
+        )
+        if self._single == "maybe":
+            return FakeResponse(data[0]) if data else None
+        if self._single == "single":
+            if len(data) != 1:
+                raise ValueError("Cannot coerce the result to a single JSON object")
+            return FakeResponse(data[0])
+        return FakeResponse(data, count=len(data))
+
+
+class FakeTable:
+    def __init__(self, store, name):
+        self.store = store
+        self.name = name
+
+    def select(self, columns="*", *more, **_):
+        return FakeQuery(self.store, self.name, "select", columns=",".join((columns,) + more))
+
+    def insert(self, payload, **_):
+        return FakeQuery(self.store, self.name, "insert", payload)
+
+    def upsert(self, payload, on_conflict="", **_):
+        return FakeQuery(self.store, self.name, "upsert", payload, on_conflict=on_conflict)
+
+    def update(self, payload, **_):
+        return FakeQuery(self.store, self.name, "update", payload)
+
+    def delete(self, **_):
+        return FakeQuery(self.store, self.name, "delete")
+
+
+class FakeRPC:
+    def __init__(self, store, fn, params):
+        self.store = store
+        self.fn = fn
+        self.params = params
+        self.headers = {}
+
+    def execute(self):
+        if self.fn not in RPCS:
+            raise ValueError(f"no local implementation of rpc {self.fn!r}")
+        return FakeResponse(self.store.request(self.fn, "rpc", self.params, self._run))
+
+    def _run(self):
+        # What auth.uid() returns inside the function, for the local rpcs that check ownership
+        self.store.auth_uid = self.store.caller(self.headers)
+        try:
+            return copy.deepcopy(RPCS[self.fn](self.store, **self.params))
+        finally:
+            self.store.auth_uid = None
+
+
+class FakeAuth:
+    """``client.auth`` backed by ``store.auth_users`` (email -> user record)."""
+
+    def __init__(self, store):
+        self.store = store
+        self._current = None
+
+    def _response(self, record, with_session=True):
+        user = SimpleNamespace(id=record["id"], email=record["email"], user_metadata=record["user_metadata"])
+        session = None
+        if with_session:
+            session = SimpleNamespace(
+                access_token=f"fake-access-{uuid.uuid4()}",
+                refresh_token=f"fake-refresh-{uuid.uuid4()}",
+                user=user,
+            )
+            self.store.auth_tokens[session.access_token] = record
+            self.store.auth_tokens[session.refresh_token] = record
+            self._current = record
+        return SimpleNamespace(user=user, session=session)
+
+    def _call(self, op, payload, run):
+        return self.store.request("auth", op, payload, run)
+
+    def sign_in_with_password(self, credentials):
+        def run():
+            record = self.store.auth_users.get(credentials["email"])
+            if not record or record["password"] != credentials["password"]:
+                raise ValueError("Invalid login credentials")
+            return self._response(record)
+        return self._call("sign_in_with_password", credentials, run)
+
+    def sign_up(self, credentials):
+        def run():
+            if credentials["email"] in self.store.auth_users:
+                raise ValueError("User already registered")
+            record = {
+                "id": str(uuid.uuid4()),
+                "email": credentials["email"],
+                "password": credentials["password"],
+                "user_metadata": (credentials.get("options") or {}).get("data", {}),
+            }
+            self.store.auth_users[record["email"]] = record
+            return self._response(record, with_session=False)
+        return self._call("sign_up", credentials, run)
+
+    def reset_password_email(self, email, options=None):
+        return self._call("reset_password_email", {"email": email}, lambda: None)
+
+    def set_session(self, access_token, refresh_token):
+        def run():
+            record = self.store.auth_tokens.get(access_token) or self.store.auth_tokens.get(refresh_token)
+            if not record:
+                raise ValueError("Invalid session")
+            return self._response(record)
+        return self._call("set_session", {}, run)
+
+    def refresh_session(self, refresh_token=None):
+        def run():
+            record = self.store.auth_tokens.get(refresh_token) if refresh_token else self._current
+            if not record:
+                raise ValueError("Invalid refresh token")
+            return self._response(record)
+        return self._call("refresh_session", {}, run)
+
+    def update_user(self, attributes):
+        def run():
+            if not self._current:
+                raise ValueError("Auth session missing")
+            self._current.update({k: v for k, v in attributes.items() if k in ("email", "password")})
+            return self._response(self._current, with_session=False)
+        return self._call("update_user", {}, run)
+
+
+# Tables whose writes get ``updated_at``, tombstones and change events
+TRACKED_TABLES = ("scheduled_workouts", "scheduled_workout_attendees")
+TRACKED_OPS = ("insert", "update", "upsert", "delete", "rpc")
+
+
+def _when(stamp):
+    return datetime.datetime.fromisoformat(stamp)
+
+
+class FakeSupabase:
+    """Tables are ``{name: [row, ...]}``; rows are copied on the way in.
+
+    ``auth_users`` maps email to ``{"id", "email", "password", "user_metadata"}``.
+    """
+
+    def __init__(self, tables=None, auth_users=None, latency=0.0, max_rows=1000):
+        self.tables = {name: [dict(r) for r in rows] for name, rows in (tables or {}).items()}
+        self.auth_users = {email: dict(u) for email, u in (auth_users or {}).items()}
+        self.auth_tokens = {}
+        self.auth_uid = None  # the caller, while a local rpc runs
+        self.latency = latency
+        self.max_rows = max_rows
+        self.requests = []
+        self._lock = threading.RLock()
+        self._listeners = []
+        self.auth = FakeAuth(self)
+
+    def table(self, name):
+        return FakeTable(self, name)
+
+    def rpc(self, fn, params=None):
+        return FakeRPC(self, fn, params or {})
+
+    def caller(self, headers):
+        """The user id a request's bearer token was issued to, or None for the anon key."""
+        token = headers.get("Authorization", "").removeprefix("Bearer ")
+        record = self.auth_tokens.get(token)
+        return record["id"] if record else None
+
+    def subscribe(self, tables, callback):
+        """Call ``callback(event)`` after each change to a row of ``tables``.
+
+        Events are shaped like Realtime ``postgres_changes`` payloads:
+        ``{"table", "type", "record", "old_record"}``. Returns a function
+        that unsubscribes.
+        """
+        listener = (frozenset(tables), callback)
+        with self._lock:
+            self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    def _snapshot(self):
+        return {t: {r["id"]: dict(r) for r in self.rows(t)} for t in TRACKED_TABLES}
+
+    def _record_changes(self, before):
+        """Stamp, tombstone and announce what changed since ``before``."""
+        now = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        events = []
+        for table in TRACKED_TABLES:
+            old = before[table]
+            present = set()
+            for row in self.rows(table):
+                present.add(row["id"])
+                prev = old.get(row["id"])
+                if prev is not None and all(prev.get(k) == v for k, v in row.items() if k != "updated_at"):
+                    continue
+                row["updated_at"] = now
+                events.append({"table": table, "type": "UPDATE" if prev else "INSERT",
+                               "record": dict(row), "old_record": prev or {}})
+            for row_id, prev in old.items():
+                if row_id not in present:
+                    self.tables.setdefault("deleted_rows", []).append(
+                        {"table_name": table, "row_id": row_id, "row": prev, "deleted_at": now})
+                    events.append({"table": table, "type": "DELETE", "record": {}, "old_record": prev})
+        for tables, callback in list(self._listeners):
+            for event in events:
+                if event["table"] in tables:
+                    callback(event)
+
+    def request(self, target, op, payload, run):
+        """Run one simulated round trip and record what it moved."""
+        started = time.perf_counter()
+        if self.latency:
+            threading.Event().wait(self.latency)
+        with self._lock:
+            before = self._snapshot() if op in TRACKED_OPS else None
+            data = run()
+            if before is not None:
+                self._record_changes(before)
+        sent = payload if isinstance(payload, list) else ([payload] if payload else [])
+        received = data if isinstance(data, list) else ([] if data is None else [data])
+        self.requests.append({
+            "target": target,
+            "op": op,
+            "rows_sent": len(sent),
+            "rows_received": len(received),
+            "bytes": len(json.dumps(sent, default=str)) + len(json.dumps(received, default=str)),
+            "seconds": time.perf_counter() - started,
+        })
+        return data
+
+    def stats(self):
+        return {
+            "round_trips": len(self.requests),
+            "rows": sum(r["rows_sent"] + r["rows_received"] for r in self.requests),
+            "bytes": sum(r["bytes"] for r in self.requests),
+        }
+
+    def reset_stats(self):
+        self.requests = []
+
+    @classmethod
+    def seeded(cls, latency=0.0, **sizes):
+        """A store filled by ``seed_tables(**sizes)``."""
+        tables, auth_users = seed_tables(**sizes)
+        return cls(tables, auth_users, latency=latency)
+
+    # --- row helpers shared by queries and local rpcs ---
+    def insert_row(self, table, row):
+        row = copy.deepcopy(row)
+        row.setdefault("id", str(uuid.uuid4()))
+        self.tables.setdefault(table, []).append(row)
+        return row
+
+    def upsert_row(self, table, row, on_conflict):
+        keys = [k.strip() for k in (on_conflict or "id").split(",")]
+        for existing in self.tables.setdefault(table, []):
+            if all(existing.get(k) == row.get(k) for k in keys):
+                existing.update(copy.deepcopy(row))
+                return existing
+        return self.insert_row(table, row)
+
+    def rows(self, table):
+        return self.tables.get(table, [])
+
+
+# --- Realistic data for benchmarks ---
+MOVEMENTS = ["Back Squat", "Front Squat", "Deadlift", "Romanian Deadlift", "Bench Press", "Overhead Press",
+             "Pull Up", "Bent Over Row", "Hip Thrust", "Split Squat", "Box Jump", "Med Ball Throw",
+             "Farmer Carry", "Sled Push", "Assault Bike", "Rower", "Plank", "Copenhagen Plank"]
+VARIATIONS = ["", "Tempo", "Paused", "Single Arm", "Single Leg", "Banded", "Dumbbell", "Kettlebell"]
+
+
+def seed_tables(athletes=60, coaches=3, exercises=120, weeks=12, sessions_per_week=3,
+                squad_size=25, exercises_per_session=8, sets=4, logged_fraction=0.7,
+                today=None, seed=1):
+    """Build ``(tables, auth_users)`` for a program of the given size.
+
+    Sessions are spread evenly over ``weeks`` centred on ``today``; every past
+    session has been logged by ``logged_fraction`` of its attendees. Users log
+    in as ``athleteN@example.com`` / ``coachN@example.com`` with password
+    ``password``.
+    """
+    rng = random.Random(seed)
+    today = today or datetime.date.today()
+    tables = {name: [] for name in (
+        "users", "exercises", "scheduled_workouts", "scheduled_workout_exercises",
+        "scheduled_workout_attendees", "workouts", "workout_sets", "squads", "squad_members")}
+    auth_users = {}
+
+    def add_user(kind, i, coach):
+        uid = str(uuid.UUID(int=rng.getrandbits(128)))
+        email = f"{kind}{i}@example.com"
+        tables["users"].append({
+            "id": uid, "name": f"{kind.title()} {i:03d}", "date_of_birth": None,
+            "gym_experience": "intermediate", "mobile_number": "", "coach": coach,
+        })
+        auth_users[email] = {"id": uid, "email": email, "password": "password",
+                             "user_metadata": {"name": f"{kind.title()} {i:03d}"}}
+        return uid
+
+    coach_ids = [add_user("coach", i, True) for i in range(coaches)]
+    athlete_ids = [add_user("athlete", i, False) for i in range(athletes)]
+
+    names = [f"{v} {m}".strip() for v in VARIATIONS for m in MOVEMENTS][:exercises]
+    for name in names:
+        tables["exercises"].append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))), "name": name,
+            "description": f"{name}: controlled tempo, full range of motion.",
+            "video_url": f"https://example.com/videos/{name.lower().replace(' ', '-')}",
+        })
+
+    start = today - datetime.timedelta(weeks=weeks // 2)
+    session_count = weeks * sessions_per_week
+    for n in range(session_count):
+        day = start + datetime.timedelta(days=n * 7 // sessions_per_week)
+        sw_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        tables["scheduled_workouts"].append({
+            "id": sw_id, "user_id": rng.choice(coach_ids),
+            "scheduled_date": day.isoformat(), "notes": f"Strength {n + 1}",
+        })
+        plan = rng.sample(tables["exercises"], min(exercises_per_session, len(tables["exercises"])))
+        for ex in plan:
+            for set_number in range(1, sets + 1):
+                tables["scheduled_workout_exercises"].append({
+                    "id": str(uuid.UUID(int=rng.getrandbits(128))), "scheduled_workout_id": sw_id,
+                    "exercise_id": ex["id"], "set_number": set_number, "reps": 8,
+                    "exertion_metric": "kgs", "target_value": 0,
+                })
+        squad = rng.sample(athlete_ids, min(squad_size, len(athlete_ids)))
+        for uid in squad:
+            tables["scheduled_workout_attendees"].append({
+                "id": str(uuid.UUID(int=rng.getrandbits(128))), "scheduled_workout_id": sw_id,
+                "user_id": uid, "status": "confirmed",
+            })
+            if day >= today or rng.random() > logged_fraction:
+                continue
+            workout_id = str(uuid.UUID(int=rng.getrandbits(128)))
+            tables["workouts"].append({
+                "id": workout_id, "user_id": uid, "date": day.isoformat(),
+                "notes": "", "scheduled_workout_id": sw_id,
+            })
+            for ex in plan:
+                for set_number in range(1, sets + 1):
+                    tables["workout_sets"].append({
+                        "id": str(uuid.UUID(int=rng.getrandbits(128))), "workout_id": workout_id,
+                        "exercise_id": ex["id"], "set_number": set_number, "reps": 8,
+                        "exertion_metric": "kgs", "value": rng.randrange(20, 140, 5), "notes": "",
+                    })
+
+    for coach_id in coach_ids:
+        for label in ("A", "B"):
+            squad_id = str(uuid.UUID(int=rng.getrandbits(128)))
+            tables["squads"].append({"id": squad_id, "coach_id": coach_id, "name": f"Squad {label}"})
+            for uid in rng.sample(athlete_ids, min(squad_size, len(athlete_ids))):
+                tables["squad_members"].append({"squad_id": squad_id, "user_id": uid})
+    return tables, auth_users
+
+
+# --- Local equivalents of the Postgres functions in sql/ ---
+RPCS = {}
+
+
+def local_rpc(name):
+    def register(fn):
+        RPCS[name] = fn
+        return fn
+    return register
+
+
+@local_rpc("athlete_calendar")
+def _athlete_calendar(store, p_user_id, p_from, p_to=None):
+    session_ids = {
+        a["scheduled_workout_id"]
+        for a in store.rows("scheduled_workout_attendees")
+        if a["user_id"] == p_user_id
+    }
+    sessions = [
+        dict(s) for s in store.rows("scheduled_workouts")
+        if s["id"] in session_ids
+        and s["scheduled_date"] >= p_from
+        and (p_to is None or s["scheduled_date"] <= p_to)
+    ]
+    return sorted(sessions, key=lambda s: s["scheduled_date"])
+
+
+@local_rpc("athlete_history")
+def _athlete_history(store, p_user_id, p_workout_ids=None, p_after=None, p_limit=1000):
+    workouts = {
+        w["id"]: w for w in store.rows("workouts")
+        if w["user_id"] == p_user_id and (p_workout_ids is None or w["id"] in p_workout_ids)
+    }
+    rows = sorted(
+        (s for s in store.rows("workout_sets")
+         if s["workout_id"] in workouts and (p_after is None or s["id"] > p_after)),
+        key=lambda s: s["id"],
+    )[:p_limit]
+    return [
+        {
+            "id": s["id"], "workout_id": s["workout_id"], "date": workouts[s["workout_id"]]["date"],
+            "exercise_id": s["exercise_id"], "set_number": s["set_number"], "reps": s["reps"],
+            "exertion_metric": s["exertion_metric"], "value": s["value"],
+        }
+        for s in rows
+    ]
+
+
+def _week(day):
+    day = datetime.date.fromisoformat(day)
+    return (day - datetime.timedelta(days=day.weekday())).isoformat()
+
+
+@local_rpc("squad_compliance")
+def _squad_compliance(store, p_from, p_to):
+    # Computed from the base tables; Postgres reads the athlete_day_stats rollup
+    today = datetime.date.today().isoformat()
+    sessions = {
+        s["id"]: s["scheduled_date"] for s in store.rows("scheduled_workouts")
+        if p_from <= s["scheduled_date"] <= p_to
+    }
+    workouts = {w["id"]: w for w in store.rows("workouts")}
+    logged = {(w["user_id"], w["scheduled_workout_id"]) for w in workouts.values()}
+    stats = {}
+
+    def row(user_id, day):
+        key = (user_id, _week(day))
+        return stats.setdefault(key, {"user_id": user_id, "week": key[1], "planned": 0, "due": 0,
+                                      "logged": 0, "volume": 0})
+
+    for a in store.rows("scheduled_workout_attendees"):
+        day = sessions.get(a["scheduled_workout_id"])
+        if day is None:
+            continue
+        r = row(a["user_id"], day)
+        r["planned"] += 1
+        r["due"] += day <= today
+        r["logged"] += (a["user_id"], a["scheduled_workout_id"]) in logged
+    for s in store.rows("workout_sets"):
+        w = workouts.get(s["workout_id"])
+        if w is None or s["exertion_metric"] != "kgs":
+            continue
+        day = sessions.get(w["scheduled_workout_id"])
+        if day is None and w["scheduled_workout_id"] is None and p_from <= w["date"] <= p_to:
+            day = w["date"]
+        if day is not None:
+            row(w["user_id"], day)["volume"] += s["reps"] * s["value"]
+    return sorted(stats.values(), key=lambda r: (r["week"], r["user_id"]))
+
+
+@local_rpc("session_attendance")
+def _session_attendance(store, p_session_id):
+    result = []
+    for a in store.rows("scheduled_workout_attendees"):
+        if a["scheduled_workout_id"] != p_session_id:
+            continue
+        workout = next((w for w in store.rows("workouts")
+                        if w["scheduled_workout_id"] == p_session_id and w["user_id"] == a["user_id"]), None)
+        sets = [s for s in store.rows("workout_sets") if workout and s["workout_id"] == workout["id"]]
+        result.append({
+            "user_id": a["user_id"], "logged": workout is not None, "sets": len(sets),
+            "volume": sum(s["reps"] * s["value"] for s in sets if s["exertion_metric"] == "kgs"),
+        })
+    return result
+
+
+@local_rpc("repeat_session")
+def _repeat_session(store, p_template_id, p_dates):
+    template = next((s for s in store.rows("scheduled_workouts") if s["id"] == p_template_id), None)
+    if template is None:
+        return []
+    planned = [e for e in store.rows("scheduled_workout_exercises") if e["scheduled_workout_id"] == p_template_id]
+    booked = [a for a in store.rows("scheduled_workout_attendees") if a["scheduled_workout_id"] == p_template_id]
+    created = []
+    for day in sorted(p_dates):
+        session = store.insert_row("scheduled_workouts", {
+            "user_id": template["user_id"], "scheduled_date": day, "notes": template["notes"],
+        })
+        for e in planned:
+            store.insert_row("scheduled_workout_exercises", {
+                **{k: e[k] for k in ("exercise_id", "set_number", "reps", "exertion_metric", "target_value")},
+                "scheduled_workout_id": session["id"],
+            })
+        for a in booked:
+            store.insert_row("scheduled_workout_attendees", {
+                "scheduled_workout_id": session["id"], "user_id": a["user_id"], "status": "confirmed",
+            })
+        created.append(dict(session))
+    return created
+
+
+@contextlib.contextmanager
+def _transaction(store, *tables):
+    """Restore ``tables`` if the block raises, like a rolled-back transaction."""
+    saved = {t: copy.deepcopy(store.rows(t)) for t in tables}
+    try:
+        yield
+    except Exception:
+        store.tables.update(saved)
+        raise
+
+
+PLAN_TABLES = ("scheduled_workouts", "scheduled_workout_exercises", "scheduled_workout_attendees")
+
+
+@local_rpc("save_plan")
+def _save_plan(store, p_session_id, p_session, p_exercises, p_attendee_ids, p_squad_ids=()):
+    with _transaction(store, *PLAN_TABLES):
+        if p_session_id is None:
+            session = store.insert_row("scheduled_workouts", {
+                "user_id": p_session["user_id"], "scheduled_date": p_session["scheduled_date"],
+                "notes": p_session["notes"],
+            })
+        else:
+            session = next((s for s in store.rows("scheduled_workouts") if s["id"] == p_session_id), None)
+            if session is None:
+                raise ValueError(f"session {p_session_id} does not exist")
+            session.update(scheduled_date=p_session["scheduled_date"], notes=p_session["notes"])
+        session_id = session["id"]
+
+        desired = {(e["exercise_id"], e["set_number"]): e for e in p_exercises}
+        kept = []
+        for row in store.rows("scheduled_workout_exercises"):
+            if row["scheduled_workout_id"] != session_id:
+                kept.append(row)
+            elif (row["exercise_id"], row["set_number"]) in desired:
+                new = desired.pop((row["exercise_id"], row["set_number"]))
+                row.update(reps=new["reps"], exertion_metric=new["exertion_metric"],
+                           target_value=new.get("target_value") or 0)
+                kept.append(row)
+        store.tables["scheduled_workout_exercises"] = kept
+        for e in desired.values():
+            store.insert_row("scheduled_workout_exercises", {
+                "scheduled_workout_id": session_id, "exercise_id": e["exercise_id"],
+                "set_number": e["set_number"], "reps": e["reps"],
+                "exertion_metric": e["exertion_metric"], "target_value": e.get("target_value") or 0,
+            })
+
+        for squad_id in p_squad_ids:
+            try:
+                _own_squad(store, squad_id)
+            except ValueError:
+                raise PermissionError(f"squad {squad_id} is not yours") from None
+        wanted = list(dict.fromkeys(p_attendee_ids))
+        wanted += [m["user_id"] for m in store.rows("squad_members")
+                   if m["squad_id"] in p_squad_ids and m["user_id"] not in wanted]
+        store.tables["scheduled_workout_attendees"] = [
+            a for a in store.rows("scheduled_workout_attendees")
+            if a["scheduled_workout_id"] != session_id or a["user_id"] in wanted
+        ]
+        booked = {a["user_id"] for a in store.rows("scheduled_workout_attendees")
+                  if a["scheduled_workout_id"] == session_id}
+        for uid in wanted:
+            if uid not in booked:
+                store.insert_row("scheduled_workout_attendees", {
+                    "scheduled_workout_id": session_id, "user_id": uid, "status": "confirmed",
+                })
+        return session_id
+
+
+@local_rpc("delete_session")
+def _delete_session(store, p_session_id):
+    with _transaction(store, *PLAN_TABLES):
+        for table in ("scheduled_workout_attendees", "scheduled_workout_exercises"):
+            store.tables[table] = [r for r in store.rows(table) if r["scheduled_workout_id"] != p_session_id]
+        store.tables["scheduled_workouts"] = [s for s in store.rows("scheduled_workouts") if s["id"] != p_session_id]
+    return None
+
+
+@local_rpc("import_plan")
+def _import_plan(store, p_coach_id, p_exercises, p_sessions):
+    with _transaction(store, "exercises", *PLAN_TABLES):
+        for e in p_exercises:
+            store.insert_row("exercises", {k: e.get(k) for k in ("id", "name", "description", "video_url")})
+        for s in p_sessions:
+            store.insert_row("scheduled_workouts", {
+                "id": s["id"], "user_id": p_coach_id, "scheduled_date": s["scheduled_date"], "notes": s["notes"],
+            })
+            for p in s["planned"]:
+                for set_number in range(1, p["sets"] + 1):
+                    store.insert_row("scheduled_workout_exercises", {
+                        "scheduled_workout_id": s["id"], "exercise_id": p["exercise_id"],
+                        "set_number": set_number, "reps": p["reps"],
+                        "exertion_metric": p["exertion_metric"], "target_value": 0,
+                    })
+            for uid in dict.fromkeys(s["attendee_ids"]):
+                store.insert_row("scheduled_workout_attendees", {
+                    "scheduled_workout_id": s["id"], "user_id": uid, "status": "confirmed",
+                })
+    return len(p_sessions)
+
+
+@local_rpc("last_performance")
+def _last_performance(store, p_user_id, p_exercise_ids, p_session_id=None, p_before=None):
+    workouts = {
+        w["id"]: w for w in store.rows("workouts")
+        if w["user_id"] == p_user_id
+        and (p_before is None or w["date"] <= p_before)
+        and w["scheduled_workout_id"] != p_session_id
+    }
+    sets = {}
+    for s in store.rows("workout_sets"):
+        if s["workout_id"] in workouts and s["exercise_id"] in p_exercise_ids:
+            sets.setdefault(s["exercise_id"], []).append(s)
+    result = []
+    for exercise_id in dict.fromkeys(p_exercise_ids):
+        mine = sets.get(exercise_id)
+        if not mine:
+            continue
+        newest = max(mine, key=lambda s: (workouts[s["workout_id"]]["date"], s["workout_id"]))
+        valued = [s for s in mine if s["value"] is not None]
+        best = max(valued, default=None, key=lambda s: (
+            s["value"], s["reps"] if s["reps"] is not None else -1, workouts[s["workout_id"]]["date"],
+        )) or {"value": None, "reps": None, "exertion_metric": None, "workout_id": None}
+        result.append({
+            "exercise_id": exercise_id,
+            "last_date": workouts[newest["workout_id"]]["date"],
+            "last_sets": [
+                {k: s[k] for k in ("set_number", "reps", "exertion_metric", "value")}
+                for s in sorted(mine, key=lambda s: s["set_number"])
+                if s["workout_id"] == newest["workout_id"]
+            ],
+            "best_value": best["value"], "best_reps": best["reps"],
+            "best_metric": best["exertion_metric"],
+            "best_date": workouts[best["workout_id"]]["date"] if best["workout_id"] else None,
+        })
+    return result
+
+
+@local_rpc("search_athletes")
+def _search_athletes(store, p_query="", p_after_name=None, p_after_id=None, p_limit=20):
+    query = (p_query or "").lower()
+    found = sorted(
+        (u for u in store.rows("users")
+         if not u["coach"] and query in u["name"].lower()
+         and (p_after_name is None or (u["name"], u["id"]) > (p_after_name, p_after_id))),
+        key=lambda u: (u["name"], u["id"]),
+    )
+    return [{"id": u["id"], "name": u["name"]} for u in found[:min(p_limit, 100)]]
+
+
+@local_rpc("coach_squads")
+def _coach_squads(store, p_coach_id):
+    sizes = {}
+    for m in store.rows("squad_members"):
+        sizes[m["squad_id"]] = sizes.get(m["squad_id"], 0) + 1
+    return sorted(
+        ({"id": s["id"], "name": s["name"], "members": sizes.get(s["id"], 0)}
+         for s in store.rows("squads") if s["coach_id"] == p_coach_id),
+        key=lambda s: s["name"],
+    )
+
+
+def _roster(store, user_ids):
+    names = {u["id"]: u["name"] for u in store.rows("users")}
+    return sorted(({"user_id": uid, "name": names[uid]} for uid in user_ids if uid in names),
+                  key=lambda r: r["name"])
+
+
+@local_rpc("squad_roster")
+def _squad_roster(store, p_squad_id):
+    return _roster(store, [m["user_id"] for m in store.rows("squad_members") if m["squad_id"] == p_squad_id])
+
+
+@local_rpc("session_roster")
+def _session_roster(store, p_session_id):
+    return _roster(store, [a["user_id"] for a in store.rows("scheduled_workout_attendees")
+                           if a["scheduled_workout_id"] == p_session_id])
+
+
+SQUAD_TABLES = ("squads", "squad_members")
+
+
+def _own_squad(store, squad_id):
+    """The caller's squad ``squad_id``; other coaches' squads are hidden, as by row level security."""
+    squad = next((s for s in store.rows("squads") if s["id"] == squad_id), None)
+    if squad is None or squad["coach_id"] != store.auth_uid:
+        raise ValueError(f"squad {squad_id} does not exist")
+    return squad
+
+
+@local_rpc("save_squad")
+def _save_squad(store, p_squad_id, p_name, p_member_ids):
+    if store.auth_uid is None:
+        raise PermissionError("not signed in")
+    with _transaction(store, *SQUAD_TABLES):
+        if p_squad_id is None:
+            if any(s["coach_id"] == store.auth_uid and s["name"] == p_name for s in store.rows("squads")):
+                raise ValueError(f"squad {p_name!r} already exists")
+            squad = store.insert_row("squads", {"coach_id": store.auth_uid, "name": p_name})
+        else:
+            squad = _own_squad(store, p_squad_id)
+            squad["name"] = p_name
+        wanted = list(dict.fromkeys(p_member_ids))
+        store.tables["squad_members"] = [
+            m for m in store.rows("squad_members") if m["squad_id"] != squad["id"] or m["user_id"] in wanted
+        ]
+        present = {m["user_id"] for m in store.rows("squad_members") if m["squad_id"] == squad["id"]}
+        for uid in wanted:
+            if uid not in present:
+                store.tables["squad_members"].append({"squad_id": squad["id"], "user_id": uid})
+        return squad["id"]
+
+
+@local_rpc("delete_squad")
+def _delete_squad(store, p_squad_id):
+    owned = {s["id"] for s in store.rows("squads") if s["id"] == p_squad_id and s["coach_id"] == store.auth_uid}
+    # squad_members rows go with it (on delete cascade)
+    store.tables["squad_members"] = [m for m in store.rows("squad_members") if m["squad_id"] not in owned]
+    store.tables["squads"] = [s for s in store.rows("squads") if s["id"] not in owned]
+    return None
+
+
+@local_rpc("session_changes")
+def _session_changes(store, p_since, p_limit=1000):
+    since = _when(p_since)
+    changes = [
+        {"table_name": table, "op": "upsert", "row": dict(r), "changed_at": r["updated_at"]}
+        for table in TRACKED_TABLES
+        for r in store.rows(table)
+        if r.get("updated_at") and _when(r["updated_at"]) > since
+    ]
+    changes += [
+        {"table_name": d["table_name"], "op": "delete", "row": dict(d["row"]), "changed_at": d["deleted_at"]}
+        for d in store.rows("deleted_rows")
+        if d["table_name"] in TRACKED_TABLES and _when(d["deleted_at"]) > since
+    ]
+    return sorted(changes, key=lambda c: _when(c["changed_at"]))[:p_limit]
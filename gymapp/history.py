@@ -0,0 +1,160 @@
+"""Athlete workout history and the progress analytics computed from it.
+
+An athlete's logged sets are read in bulk through the ``athlete_history``
+rpc (sql/004_athlete_history.sql), a page of ``HISTORY_PAGE_SIZE`` rows per
+request, into one DataFrame cached per athlete (``cache.history``). When
+the outbox uploads a workout it marks that workout dirty here, and the next
+``load()`` re-reads only the dirty workouts' sets instead of the whole
+history. Everything derived from the frame is computed with column-wise
+pandas/NumPy operations.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+from gymapp import db
+from gymapp.cache import history as history_cache
+
+HISTORY_PAGE_SIZE = 1000
+
+COLUMNS = ["id", "workout_id", "date", "exercise_id", "set_number", "reps", "exertion_metric", "value"]
+
+
+def _fetch(user_id, workout_ids=None):
+    """Every logged set of ``user_id`` (or of ``workout_ids`` only), keyset-paged."""
+    rows, after = [], None
+    while True:
+        page = db.rpc("athlete_history", {
+            "p_user_id": user_id,
+            "p_workout_ids": workout_ids,
+            "p_after": after,
+            "p_limit": HISTORY_PAGE_SIZE,
+        }).execute().data or []
+        rows += page
+        if len(page) < HISTORY_PAGE_SIZE:
+            return rows
+        after = page[-1]["id"]
+
+
+def _frame(rows):
+    frame = pd.DataFrame(rows, columns=COLUMNS)
+    frame["date"] = pd.to_datetime(frame["date"])
+    frame["reps"] = pd.to_numeric(frame["reps"]).fillna(0).astype("int64")
+    frame["value"] = pd.to_numeric(frame["value"]).astype("float64")
+    return with_metrics(frame)
+
+
+def with_metrics(frame):
+    """Add per-set ``volume`` (reps x load) and ``e1rm`` (Epley) columns.
+
+    Both apply to sets measured in kgs; other metrics get 0 volume and no e1rm.
+    """
+    loaded = (frame["exertion_metric"] == "kgs") & (frame["reps"] > 0) & (frame["value"] > 0)
+    reps = frame["reps"].to_numpy()
+    value = frame["value"].to_numpy()
+    frame["volume"] = np.where(loaded, reps * value, 0.0)
+    frame["e1rm"] = np.where(loaded, np.where(reps == 1, value, value * (1 + reps / 30)), np.nan)
+    return frame
+
+
+def session_bests(frame):
+    """Per exercise and workout date: best e1rm, heaviest load and total volume."""
+    return (
+        frame.groupby(["exercise_id", "date"], sort=True)
+        .agg(e1rm=("e1rm", "max"), top_set=("value", "max"), volume=("volume", "sum"), sets=("id", "size"))
+        .reset_index()
+    )
+
+
+def _trend(bests):
+    """Least-squares slope of each exercise's session-best e1rm, in kg per week."""
+    points = bests.dropna(subset=["e1rm"])
+    x = (points["date"] - points.groupby("exercise_id")["date"].transform("min")).dt.days / 7
+    y = points["e1rm"]
+    sums = pd.DataFrame({
+        "exercise_id": points["exercise_id"], "n": 1, "x": x, "y": y, "xx": x * x, "xy": x * y,
+    }).groupby("exercise_id").sum()
+    denominator = sums["n"] * sums["xx"] - sums["x"] ** 2
+    slope = (sums["n"] * sums["xy"] - sums["x"] * sums["y"]) / denominator.where(denominator > 0)
+    return slope.rename("trend_per_week")
+
+
+def exercise_summary(frame):
+    """One row per exercise: sessions, sets, volume, best e1rm and set, trend, last logged."""
+    if frame.empty:
+        return pd.DataFrame(columns=["exercise_id", "sessions", "sets", "volume", "best_e1rm",
+                                     "best_set", "trend_per_week", "last_logged"])
+    summary = frame.groupby("exercise_id").agg(
+        sessions=("workout_id", "nunique"),
+        sets=("id", "size"),
+        volume=("volume", "sum"),
+        best_e1rm=("e1rm", "max"),
+        last_logged=("date", "max"),
+    )
+    rated = frame.dropna(subset=["e1rm"])
+    best = rated.loc[rated.groupby("exercise_id")["e1rm"].idxmax(), ["exercise_id", "value", "reps"]]
+    best_set = pd.Series(
+        best["value"].map("{:g}".format).str.cat(best["reps"].astype(str), sep=" kg x ").to_numpy(),
+        index=best["exercise_id"], name="best_set",
+    )
+    summary = summary.join(best_set).join(_trend(session_bests(frame)))
+    return summary.reset_index().sort_values("last_logged", ascending=False, ignore_index=True)
+
+
+def weekly_volume(frame):
+    """Total volume per calendar week (weeks starting Monday)."""
+    if frame.empty:
+        return pd.Series(dtype="float64", name="volume")
+    return frame.set_index("date")["volume"].resample("W-SUN").sum()
+
+
+class History:
+    """An athlete's logged sets, patched in place as new workouts land."""
+
+    def __init__(self, user_id, frame):
+        self.user_id = user_id
+        self.frame = frame
+        self.dirty = set()
+        self._summary = None
+        self._lock = threading.Lock()
+
+    def mark_dirty(self, workout_ids):
+        with self._lock:
+            self.dirty.update(workout_ids)
+
+    def refresh(self):
+        """Re-read the sets of workouts logged since the frame was built."""
+        with self._lock:
+            if not self.dirty:
+                return
+            workout_ids = sorted(self.dirty)
+            fresh = _frame(_fetch(self.user_id, workout_ids))
+            kept = self.frame[~self.frame["workout_id"].isin(workout_ids)]
+            self.frame = pd.concat([kept, fresh], ignore_index=True) if not kept.empty else fresh
+            self.dirty.difference_update(workout_ids)
+            self._summary = None
+
+    def summary(self):
+        """``exercise_summary()`` of the frame, computed once per version."""
+        with self._lock:
+            if self._summary is None:
+                self._summary = exercise_summary(self.frame)
+            return self._summary
+
+
+def load(user_id):
+    """``user_id``'s History, read in full on a cache miss and patched otherwise."""
+    entry = history_cache.get(user_id, lambda: History(user_id, _frame(_fetch(user_id))))
+    entry.refresh()
+    return entry
+
+
+def mark_logged(user_id, workout_ids):
+    """Note that ``workout_ids`` of ``user_id`` were written; called by the outbox."""
+    entry = history_cache.peek(user_id)
+    if entry is not None:
+        entry.mark_dirty(workout_ids)
+    else:
+        # Keeps a full read that is already under way from caching what predates the write
+        history_cache.discard(user_id)
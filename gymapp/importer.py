@@ -0,0 +1,221 @@
+"""CSV import of exercises and session plans.
+
+Files are parsed and validated first against the cached catalogue and
+roster, producing a ``Report`` that is shown as a dry run. Committing a
+clean report is one ``import_plan`` rpc (sql/011_import_plan.sql), which
+writes every row in one transaction: an import lands whole or not at all.
+Session ids are generated here rather than by Postgres, so sessions, their
+sets and their attendees refer to each other without reading ids back.
+
+Exercise CSV columns: ``name, description, video_url``.
+Session CSV columns: ``date, title, exercise, sets, reps, metric, athletes``,
+one line per exercise; lines with the same date and title form one session.
+``athletes`` is a ``;``-separated list of names, merged across the lines;
+a name shared by more than one athlete is an error rather than a guess.
+"""
+import csv
+import datetime
+import io
+import uuid
+from collections import OrderedDict
+
+from gymapp import db, plans
+
+METRICS = ("kgs", "calories", "seconds")
+MAX_SETS = 10
+MAX_REPS = 50
+
+EXERCISE_COLUMNS = ("name", "description", "video_url")
+SESSION_COLUMNS = ("date", "title", "exercise", "sets", "reps", "metric", "athletes")
+
+
+class Report:
+    """What an import would write, and every problem found on the way."""
+
+    def __init__(self):
+        self.errors = []  # (line number, message)
+        self.warnings = []
+        self.exercises = []  # new ``exercises`` rows
+        self.sessions = []  # {"row", "planned", "attendee_ids"}
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    def error(self, line, message):
+        self.errors.append((line, message))
+
+    def summary(self):
+        sets = sum(p["sets"] for s in self.sessions for p in s["planned"])
+        attendees = sum(len(s["attendee_ids"]) for s in self.sessions)
+        return {
+            "new exercises": len(self.exercises),
+            "sessions": len(self.sessions),
+            "planned sets": sets,
+            "attendee bookings": attendees,
+        }
+
+
+def _decode(data, report):
+    """``data`` as text: UTF-8, else Windows-1252 (what Excel saves as "CSV" on Windows)."""
+    if not isinstance(data, bytes):
+        return data
+    try:
+        return data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        pass
+    try:
+        text = data.decode("cp1252")
+    except UnicodeDecodeError:
+        report.error(1, "the file is not UTF-8 text; save it as \"CSV UTF-8\" and upload it again")
+        return None
+    report.warnings.append((None, "the file is not UTF-8, so it was read as Windows-1252; "
+                                  "if any names look wrong, save it as \"CSV UTF-8\""))
+    return text
+
+
+def _reader(data, columns, report):
+    text = _decode(data, report)
+    if text is None:
+        return []
+    reader = csv.DictReader(io.StringIO(text))
+    try:
+        fields = [f.strip().lower() for f in reader.fieldnames or []]
+        missing = [c for c in columns if c not in fields]
+        if missing:
+            report.error(1, f"missing column(s): {', '.join(missing)}")
+            return []
+        reader.fieldnames = fields
+        # Header is line 1
+        return [(n, {k: (v or "").strip() for k, v in row.items() if k}) for n, row in enumerate(reader, start=2)]
+    except csv.Error as e:
+        report.error(reader.line_num or 1, f"not a readable CSV file ({e}); save it as \"CSV UTF-8\"")
+        return []
+
+
+def read_exercises(data, catalogue, report=None):
+    """Validate an exercise CSV; new exercises land in ``report.exercises``."""
+    report = report or Report()
+    existing = {name.lower() for name in catalogue.by_name}
+    seen = {}
+    for line, row in _reader(data, EXERCISE_COLUMNS[:1], report):
+        name = row.get("name", "")
+        if not name:
+            report.error(line, "exercise name is empty")
+        elif name.lower() in seen:
+            report.error(line, f"'{name}' is also on line {seen[name.lower()]}")
+        elif name.lower() in existing:
+            report.warnings.append((line, f"'{name}' is already in the catalogue; skipped"))
+        else:
+            seen[name.lower()] = line
+            report.exercises.append({
+                "id": str(uuid.uuid4()),
+                "name": name,
+                "description": row.get("description", ""),
+                "video_url": row.get("video_url", ""),
+            })
+    return report
+
+
+def _int(value, low, high):
+    try:
+        number = int(value)
+    except ValueError:
+        return None
+    return number if low <= number <= high else None
+
+
+def read_sessions(data, catalogue, athletes, report=None):
+    """Validate a session plan CSV against the catalogue and roster.
+
+    Exercises queued in ``report.exercises`` (from ``read_exercises``) count
+    as known, so one import can add exercises and plan with them.
+    """
+    report = report or Report()
+    exercise_ids = {name.lower(): e["id"] for name, e in catalogue.by_name.items()}
+    exercise_ids.update((e["name"].lower(), e["id"]) for e in report.exercises)
+    athlete_ids = {}
+    for a in athletes:
+        athlete_ids.setdefault(a["name"].lower(), []).append(a["id"])
+    sessions = OrderedDict()
+
+    for line, row in _reader(data, SESSION_COLUMNS, report):
+        problems = []
+        try:
+            day = datetime.date.fromisoformat(row["date"]).isoformat()
+        except ValueError:
+            day = None
+            problems.append(f"date '{row['date']}' is not YYYY-MM-DD")
+        exercise_id = exercise_ids.get(row["exercise"].lower())
+        if not exercise_id:
+            close = catalogue.search(row["exercise"], limit=1) if row["exercise"] else []
+            hint = f" (did you mean '{close[0]}'?)" if close else ""
+            problems.append(f"unknown exercise '{row['exercise']}'{hint}")
+        sets = _int(row["sets"], 1, MAX_SETS)
+        if sets is None:
+            problems.append(f"sets must be 1-{MAX_SETS}")
+        reps = _int(row["reps"], 1, MAX_REPS)
+        if reps is None:
+            problems.append(f"reps must be 1-{MAX_REPS}")
+        metric = (row["metric"] or "kgs").lower()
+        if metric not in METRICS:
+            problems.append(f"metric must be one of {', '.join(METRICS)}")
+        names = [n.strip() for n in row["athletes"].split(";") if n.strip()]
+        unknown = [n for n in names if n.lower() not in athlete_ids]
+        if unknown:
+            problems.append(f"unknown athlete(s): {', '.join(unknown)}")
+        shared = [n for n in names if len(athlete_ids.get(n.lower(), ())) > 1]
+        if shared:
+            problems.append(f"more than one athlete is called {', '.join(shared)}; "
+                            "book them from the planning page instead")
+        for problem in problems:
+            report.error(line, problem)
+        if problems:
+            continue
+
+        session = sessions.setdefault((day, row["title"]), {
+            "row": {"id": str(uuid.uuid4()), "scheduled_date": day, "notes": row["title"]},
+            "planned": [],
+            "attendee_ids": [],
+        })
+        if any(p["exercise_id"] == exercise_id for p in session["planned"]):
+            report.error(line, f"'{row['exercise']}' is listed twice for {day} {row['title']}")
+            continue
+        session["planned"].append({"exercise_id": exercise_id, "sets": sets, "reps": reps,
+                                   "exertion_metric": metric})
+        for name in names:
+            athlete_id = athlete_ids[name.lower()][0]
+            if athlete_id not in session["attendee_ids"]:
+                session["attendee_ids"].append(athlete_id)
+
+    for (day, title), session in sessions.items():
+        if not session["attendee_ids"]:
+            report.warnings.append((None, f"{day} {title or '(No title)'} has no athletes"))
+    report.sessions.extend(sessions.values())
+    return report
+
+
+def commit(report, coach_id):
+    """Write a validated report in one transactional request; returns the sessions created."""
+    if not report.ok:
+        raise ValueError("the import has errors; fix them and validate again")
+    return db.rpc(
+        "import_plan",
+        {
+            "p_coach_id": coach_id,
+            "p_exercises": report.exercises,
+            "p_sessions": [
+                {**s["row"], "planned": s["planned"], "attendee_ids": s["attendee_ids"]}
+                for s in report.sessions
+            ],
+        },
+        writes=("exercises", *plans.PLAN_TABLES),
+    ).execute().data
+
+
+EXERCISE_TEMPLATE = "name,description,video_url\nTempo Back Squat,3 seconds down,https://example.com/squat\n"
+SESSION_TEMPLATE = (
+    "date,title,exercise,sets,reps,metric,athletes\n"
+    "2025-01-06,Strength A,Back Squat,4,6,kgs,Alex Smith;Sam Lee\n"
+    "2025-01-06,Strength A,Bench Press,4,8,kgs,\n"
+)
@@ -0,0 +1,303 @@
+"""Write-behind queue for athlete workout logs.
+
+A submitted log is written to a local SQLite file first (``OUTBOX_PATH``, one
+per app instance), so the athlete gets "saved" immediately and nothing is
+lost if Supabase is unreachable. A background flusher pushes queued logs to
+Supabase in batches and retries failures with exponential backoff. A batch
+that fails is retried one entry at a time, so one bad log (a session deleted
+since, a rejected value) cannot hold up the athlete's others. An entry that
+fails ``MAX_ATTEMPTS`` times stops retrying and is reported as failed until
+the athlete saves it again or asks for another try.
+
+Each queue entry is one athlete's log of one session, keyed by
+``(user_id, scheduled_workout_id)``. Submitting the same session again
+before it is flushed merges into the queued entry, so repeated saves
+coalesce into one write. Both server writes are upserts on the tables'
+unique keys (sql/001_workout_upsert_keys.sql), which makes an entry's
+idempotency key its natural key: replaying an entry whose first push
+partly succeeded writes the same rows again rather than duplicating them.
+"""
+import json
+import logging
+import random
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+
+from gymapp import db, history, settings, workouts
+
+logger = logging.getLogger("gymapp.outbox")
+
+OUTBOX_PATH = settings.get("OUTBOX_PATH", ".gymapp_outbox.sqlite3")
+# Seconds between flushes when nothing wakes the flusher
+FLUSH_INTERVAL = settings.get("OUTBOX_FLUSH_INTERVAL", 5.0)
+# Entries pushed per flush
+FLUSH_BATCH = settings.get("OUTBOX_FLUSH_BATCH", 50)
+# Retry delay doubles per failed attempt, from BACKOFF_BASE up to BACKOFF_MAX
+BACKOFF_BASE = 2.0
+BACKOFF_MAX = 300.0
+# Failed pushes before an entry is given up on (about an hour of retries)
+MAX_ATTEMPTS = settings.get("OUTBOX_MAX_ATTEMPTS", 20)
+
+_SCHEMA = """
+create table if not exists outbox (
+    user_id text not null,
+    scheduled_workout_id text not null,
+    workout_date text not null,
+    notes text,
+    sets text not null,
+    access_token text,
+    attempts integer not null default 0,
+    next_attempt real not null default 0,
+    last_error text,
+    queued_at real not null,
+    primary key (user_id, scheduled_workout_id)
+)
+"""
+
+
+def _connect():
+    conn = sqlite3.connect(OUTBOX_PATH, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("pragma journal_mode=wal")
+    conn.execute(_SCHEMA)
+    return conn
+
+
+def _set_key(row):
+    return f"{row['exercise_id']}:{row['set_number']}"
+
+
+def enqueue(user_id, scheduled_workout_id, workout_date, notes, set_rows, access_token):
+    """Queue a log for upload and wake the flusher.
+
+    ``set_rows`` are ``workout_sets`` rows without ``workout_id``, which is
+    filled in once the workout row exists. Sets already queued for the same
+    session are kept unless ``set_rows`` replaces them.
+    """
+    conn = _connect()
+    try:
+        conn.execute("begin immediate")
+        queued = conn.execute(
+            "select sets from outbox where user_id = ? and scheduled_workout_id = ?",
+            (user_id, scheduled_workout_id),
+        ).fetchone()
+        sets = json.loads(queued["sets"]) if queued else {}
+        sets.update({_set_key(r): {k: v for k, v in r.items() if k != "workout_id"} for r in set_rows})
+        conn.execute(
+            "insert or replace into outbox (user_id, scheduled_workout_id, workout_date, notes, sets,"
+            " access_token, attempts, next_attempt, queued_at)"
+            " values (?, ?, ?, ?, ?, ?, 0, 0, ?)",
+            (user_id, scheduled_workout_id, str(workout_date), notes, json.dumps(sets),
+             access_token, time.time()),
+        )
+        conn.execute("commit")
+    finally:
+        conn.close()
+    _wake.set()
+
+
+def pending(user_id, scheduled_workout_id):
+    """The queued, not yet uploaded log for a session, or None.
+
+    Returns ``{"notes", "sets", "attempts", "last_error", "failed"}`` with
+    ``sets`` keyed by ``(exercise_id, set_number)`` like the page's
+    ``existing_sets``; ``failed`` is True once retries have stopped.
+    """
+    conn = _connect()
+    try:
+        row = conn.execute(
+            "select notes, sets, attempts, last_error from outbox"
+            " where user_id = ? and scheduled_workout_id = ?",
+            (user_id, scheduled_workout_id),
+        ).fetchone()
+    finally:
+        conn.close()
+    if not row:
+        return None
+    sets = {(s["exercise_id"], s["set_number"]): s for s in json.loads(row["sets"]).values()}
+    return {"notes": row["notes"], "sets": sets, "attempts": row["attempts"],
+            "last_error": row["last_error"], "failed": row["attempts"] >= MAX_ATTEMPTS}
+
+
+def failed(user_id):
+    """``user_id``'s entries that stopped retrying, as ``{"scheduled_workout_id", "workout_date", "last_error"}``."""
+    conn = _connect()
+    try:
+        rows = conn.execute(
+            "select scheduled_workout_id, workout_date, last_error from outbox"
+            " where user_id = ? and attempts >= ? order by workout_date",
+            (user_id, MAX_ATTEMPTS),
+        ).fetchall()
+    finally:
+        conn.close()
+    return [dict(r) for r in rows]
+
+
+def retry(user_id, scheduled_workout_id):
+    """Retry a failed entry now, with a fresh set of attempts."""
+    conn = _connect()
+    try:
+        conn.execute(
+            "update outbox set attempts = 0, next_attempt = 0 where user_id = ? and scheduled_workout_id = ?",
+            (user_id, scheduled_workout_id),
+        )
+    finally:
+        conn.close()
+    _wake.set()
+
+
+def retoken(user_id, access_token):
+    """Give ``user_id``'s queued entries a current token and retry them now."""
+    conn = _connect()
+    try:
+        changed = conn.execute(
+            "update outbox set access_token = ?, next_attempt = 0 where user_id = ? and access_token != ?",
+            (access_token, user_id, access_token),
+        ).rowcount
+    finally:
+        conn.close()
+    if changed:
+        _wake.set()
+
+
+def size():
+    conn = _connect()
+    try:
+        return conn.execute("select count(*) from outbox").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def flush(limit=FLUSH_BATCH):
+    """Push due entries to Supabase; returns the number uploaded.
+
+    Entries are batched per user, since each user's writes carry their own
+    token: one upsert for all of a user's workout rows, then their sets. If
+    that fails, the user's entries are pushed one by one and only the ones
+    that fail again are retried later.
+    """
+    conn = _connect()
+    try:
+        due = conn.execute(
+            "select * from outbox where next_attempt <= ? and attempts < ? order by queued_at limit ?",
+            (time.time(), MAX_ATTEMPTS, limit),
+        ).fetchall()
+    finally:
+        conn.close()
+
+    by_user = defaultdict(list)
+    for entry in due:
+        by_user[entry["user_id"]].append(dict(entry))
+    uploaded = 0
+    for user_id, entries in by_user.items():
+        try:
+            _push(entries)
+        except PermissionError as e:
+            # Nothing wrong with the entries: wait for a new token without using up attempts
+            _retry_later(entries, e, count=False)
+        except Exception as e:
+            if len(entries) == 1:
+                logger.warning("outbox push for %s failed: %s", user_id, e)
+                _retry_later(entries, e)
+                continue
+            logger.warning("outbox batch for %s failed, pushing entries one by one: %s", user_id, e)
+            for entry in entries:
+                try:
+                    _push([entry])
+                except Exception as e:
+                    logger.warning("outbox push of %s for %s failed: %s", entry["scheduled_workout_id"], user_id, e)
+                    _retry_later([entry], e, count=not isinstance(e, PermissionError))
+                else:
+                    _remove([entry])
+                    uploaded += 1
+        else:
+            _remove(entries)
+            uploaded += len(entries)
+    return uploaded
+
+
+def _push(entries):
+    # Refresh tokens are single-use and belong to the browser session, so the
+    # flusher never refreshes; the next page visit hands it a new token
+    token = entries[-1]["access_token"]
+    if db.token_expiring(token):
+        raise PermissionError("access token expired; waiting for the athlete's next visit")
+    with db.pin_token(token):
+        saved = db.table("workouts").upsert(
+            [
+                {
+                    "user_id": e["user_id"],
+                    "scheduled_workout_id": e["scheduled_workout_id"],
+                    "date": e["workout_date"],
+                    "notes": e["notes"],
+                }
+                for e in entries
+            ],
+            on_conflict=workouts.WORKOUT_KEY,
+        ).execute().data or []
+        workout_ids = {w["scheduled_workout_id"]: w["id"] for w in saved}
+        set_rows = [
+            {**s, "workout_id": workout_ids[e["scheduled_workout_id"]]}
+            for e in entries
+            for s in json.loads(e["sets"]).values()
+        ]
+        db.upsert_many("workout_sets", set_rows, on_conflict=workouts.SET_KEY)
+    history.mark_logged(entries[0]["user_id"], workout_ids.values())
+
+
+def _remove(entries):
+    conn = _connect()
+    try:
+        for e in entries:
+            # Only if it was not re-queued with newer sets while uploading
+            conn.execute(
+                "delete from outbox where user_id = ? and scheduled_workout_id = ? and queued_at = ?",
+                (e["user_id"], e["scheduled_workout_id"], e["queued_at"]),
+            )
+    finally:
+        conn.close()
+
+
+def _retry_later(entries, error, count=True):
+    conn = _connect()
+    try:
+        for e in entries:
+            delay = min(BACKOFF_BASE * 2 ** e["attempts"], BACKOFF_MAX)
+            if count and e["attempts"] + 1 >= MAX_ATTEMPTS:
+                logger.error("outbox gave up on %s for %s: %s", e["scheduled_workout_id"], e["user_id"], error)
+            conn.execute(
+                "update outbox set attempts = attempts + ?, next_attempt = ?, last_error = ?"
+                " where user_id = ? and scheduled_workout_id = ? and queued_at = ?",
+                (int(count), time.time() + delay * random.uniform(0.8, 1.2), str(error),
+                 e["user_id"], e["scheduled_workout_id"], e["queued_at"]),
+            )
+    finally:
+        conn.close()
+
+
+# --- Background flusher, one per process ---
+_wake = threading.Event()
+_flusher = None
+_flusher_lock = threading.Lock()
+
+
+def _run_flusher():
+    while True:
+        _wake.wait(FLUSH_INTERVAL)
+        _wake.clear()
+        try:
+            while flush() == FLUSH_BATCH:
+                pass
+        except Exception:
+            logger.exception("outbox flush failed")
+
+
+def ensure_flusher():
+    """Start the background flusher if this process has not yet."""
+    global _flusher
+    with _flusher_lock:
+        if _flusher is None or not _flusher.is_alive():
+            _flusher = threading.Thread(target=_run_flusher, name="gymapp-outbox", daemon=True)
+            _flusher.start()
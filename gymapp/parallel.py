@@ -0,0 +1,36 @@
+"""Run a page's independent reads concurrently.
+
+Each loader runs on a process-wide thread pool, so a page waits for its
+slowest query rather than the sum of all of them. Loaders must only read
+data (``gymapp.db``, ``gymapp.reference``, ...); Streamlit calls belong on the
+script thread. The user's token is resolved once up front and pinned for the
+workers, which cannot see ``st.session_state``.
+"""
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from gymapp import db, settings
+
+_pool = ThreadPoolExecutor(
+    max_workers=settings.get("FETCH_WORKERS", 8),
+    thread_name_prefix="gymapp-fetch",
+)
+
+
+def fetch_all(**loaders):
+    """Call every ``name=loader`` concurrently; return ``{name: result}``.
+
+    If a loader raises, the first exception (in argument order) is re-raised
+    once every loader has finished.
+    """
+    db.get_client()  # create the shared client on the script thread
+    with db.pin_token(db.current_token()):
+        futures = {
+            name: _pool.submit(contextvars.copy_context().run, loader)
+            for name, loader in loaders.items()
+        }
+    errors = [f.exception() for f in futures.values()]
+    for error in errors:
+        if error is not None:
+            raise error
+    return {name: f.result() for name, f in futures.items()}
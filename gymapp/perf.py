@@ -0,0 +1,165 @@
+"""Per-request instrumentation of Supabase calls.
+
+``gymapp.db`` reports every executed table query, rpc and auth call here with
+its table, operation, row count, response size and latency. Calls are
+grouped by script run: each page calls ``start_run()`` first, and calls made
+on ``gymapp.parallel`` workers land in the same run.
+
+Every call is also written to the ``gymapp.perf`` logger as one JSON object,
+and a summary line is logged for each finished run, so slow pages and
+queries can be found from the production logs. The logger's level comes
+from the ``PERF_LOG`` setting (``INFO`` by default, ``off`` to silence it);
+if the app has not configured logging, the lines go to stderr. Coaches get
+a sidebar panel with the current run, recent runs and per-query totals
+(``panel()``).
+"""
+import contextvars
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+
+import streamlit as st
+
+from gymapp import cache, settings
+
+logger = logging.getLogger("gymapp.perf")
+
+# Level of the gymapp.perf logger: a logging level name, or "off"
+PERF_LOG = settings.get("PERF_LOG", "INFO")
+
+# Runs kept per browser session for the panel
+RECENT_RUNS = 10
+
+
+class Run:
+    """The Supabase calls made by one execution of a page script."""
+
+    def __init__(self, page):
+        self.id = uuid.uuid4().hex[:8]
+        self.page = page
+        self.started = time.perf_counter()
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def add(self, call):
+        with self._lock:
+            self.calls.append(call)
+
+    def summary(self):
+        with self._lock:
+            calls = list(self.calls)
+        return {
+            "run": self.id,
+            "page": self.page,
+            "round_trips": len(calls),
+            "rows": sum(c["rows"] for c in calls),
+            "bytes": sum(c["bytes"] for c in calls),
+            "query_ms": round(sum(c["ms"] for c in calls), 1),
+            "slowest_ms": max((c["ms"] for c in calls), default=0),
+        }
+
+
+_current_run = contextvars.ContextVar("perf_run", default=None)
+_logging_ready = False
+
+# Process-wide totals per (page, table, operation)
+_totals = {}
+_totals_lock = threading.Lock()
+
+
+def _setup_logging():
+    """Apply ``PERF_LOG`` once; without configured handlers, log to stderr."""
+    global _logging_ready
+    if _logging_ready:
+        return
+    _logging_ready = True
+    if PERF_LOG.lower() == "off":
+        logger.disabled = True
+        return
+    logger.setLevel(PERF_LOG.upper())
+    if not logger.hasHandlers():
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(asctime)s %(name)s %(message)s"))
+        logger.addHandler(handler)
+
+
+def start_run(page):
+    """Begin grouping calls under ``page``; call at the top of every page."""
+    _setup_logging()
+    runs = st.session_state.setdefault("perf_runs", deque(maxlen=RECENT_RUNS))
+    if runs:
+        logger.info(json.dumps({"event": "run", **runs[-1].summary()}))
+    run = Run(page)
+    runs.append(run)
+    _current_run.set(run)
+    return run
+
+
+def _size(data):
+    if data is None:
+        return 0, 0
+    rows = len(data) if isinstance(data, list) else 1
+    try:
+        return rows, len(json.dumps(data, default=str))
+    except (TypeError, ValueError):
+        return rows, 0
+
+
+def record(target, op, data, seconds, error=None):
+    """Record one executed call. ``data`` is what it returned."""
+    run = _current_run.get()
+    rows, size = _size(data)
+    call = {
+        "target": target,
+        "op": op,
+        "rows": rows,
+        "bytes": size,
+        "ms": round(seconds * 1000, 1),
+    }
+    if error is not None:
+        call["error"] = type(error).__name__
+    page = run.page if run else None
+    if run:
+        run.add(call)
+    logger.info(json.dumps({"event": "call", "run": run.id if run else None, "page": page, **call}))
+
+    with _totals_lock:
+        total = _totals.setdefault((page, target, op), {"calls": 0, "ms": 0.0, "max_ms": 0.0, "rows": 0})
+        total["calls"] += 1
+        total["ms"] += call["ms"]
+        total["max_ms"] = max(total["max_ms"], call["ms"])
+        total["rows"] += rows
+
+
+def totals():
+    """Per-(page, table, op) call counts and latency since the process started."""
+    with _totals_lock:
+        items = sorted(_totals.items(), key=lambda kv: -kv[1]["ms"])
+        return [
+            {
+                "page": page, "target": target, "op": op, "calls": t["calls"],
+                "avg_ms": round(t["ms"] / t["calls"], 1), "max_ms": t["max_ms"], "rows": t["rows"],
+            }
+            for (page, target, op), t in items
+        ]
+
+
+def panel(is_coach):
+    """Sidebar debug panel; shown to coaches only."""
+    if not is_coach:
+        return
+    runs = list(st.session_state.get("perf_runs", []))
+    with st.sidebar.expander("⏱ Performance"):
+        if runs:
+            current = runs[-1]
+            st.json(current.summary())
+            st.dataframe(current.calls)
+        st.caption("Recent runs")
+        st.dataframe([r.summary() for r in reversed(runs)])
+        st.caption("Process totals (slowest first)")
+        st.dataframe(totals())
+        st.caption("Caches")
+        st.json({c.name: c.stats() for c in cache.ALL_CACHES})
@@ -0,0 +1,73 @@
+"""Turning a coach's workout plan into ``scheduled_workout_*`` rows."""
+from collections import Counter
+
+from gymapp import db
+
+
+def exercise_rows(scheduled_workout_id, planned):
+    """One ``scheduled_workout_exercises`` row per set of each planned exercise."""
+    return [
+        {
+            "scheduled_workout_id": scheduled_workout_id,
+            "exercise_id": p["exercise_id"],
+            "set_number": set_number,
+            "reps": p["reps"],
+            "exertion_metric": p["exertion_metric"],
+            "target_value": 0,
+        }
+        for p in planned
+        for set_number in range(1, p["sets"] + 1)
+    ]
+
+
+def repeated_exercises(planned):
+    """Exercises listed more than once in ``planned``, by name (or id)."""
+    counts = Counter(p["exercise_id"] for p in planned)
+    return list(dict.fromkeys(p.get("name") or p["exercise_id"] for p in planned if counts[p["exercise_id"]] > 1))
+
+
+# Tables the plan functions write (sql/007_save_plan.sql)
+PLAN_TABLES = ("scheduled_workouts", "scheduled_workout_exercises", "scheduled_workout_attendees")
+
+
+def save_plan(session_id, fields, planned, attendee_ids, squad_ids=()):
+    """Create or update a session and its plan in one transactional request.
+
+    ``session_id`` is None for a new session; ``fields`` holds ``user_id``,
+    ``scheduled_date`` and ``notes``. The session's planned sets become
+    exactly ``planned``, and its attendees ``attendee_ids`` plus the members
+    of ``squad_ids`` (expanded server-side); rows that did not change are
+    left alone. Returns the session id.
+
+    Each exercise may appear once in ``planned``: the server keys planned
+    sets on (exercise, set number), so a second entry would overwrite the
+    first one's sets. Repeats raise ValueError before anything is sent.
+    """
+    repeated = repeated_exercises(planned)
+    if repeated:
+        raise ValueError(f"exercise(s) planned more than once: {', '.join(repeated)}")
+    exercises = [
+        {k: v for k, v in row.items() if k != "scheduled_workout_id"}
+        for row in exercise_rows(session_id, planned)
+    ]
+    return db.rpc(
+        "save_plan",
+        {
+            "p_session_id": session_id,
+            "p_session": fields,
+            "p_exercises": exercises,
+            "p_attendee_ids": list(attendee_ids),
+            "p_squad_ids": list(squad_ids),
+        },
+        writes=PLAN_TABLES,
+    ).execute().data
+
+
+def session_roster(session_id):
+    """A session's attendees as ``{"user_id", "name"}``, by name (sql/009_squads.sql)."""
+    return db.rpc("session_roster", {"p_session_id": session_id}).execute().data or []
+
+
+def delete_session(session_id):
+    """Delete a session with its planned sets and attendees, atomically."""
+    db.rpc("delete_session", {"p_session_id": session_id}, writes=PLAN_TABLES).execute()
@@ -0,0 +1,23 @@
+"""The logged-in user's profile and role, resolved once and cached per user.
+
+Login warms the cache; pages read from it. Any write to ``users`` through
+``gymapp.db`` drops cached profiles so the next read sees the change.
+"""
+from gymapp import db
+from gymapp.cache import profiles
+
+
+def _fetch(user_id):
+    resp = db.table("users").select("coach, name").eq("id", user_id).maybe_single().execute()
+    return resp.data if resp and hasattr(resp, "data") else None
+
+
+def get(user_id):
+    """``{"coach", "name"}`` for ``user_id``, or None if they have no profile."""
+    return profiles.get(user_id, lambda: _fetch(user_id), tables=("users",))
+
+
+def refresh(user_id):
+    """Re-read the profile, e.g. right after login."""
+    profiles.discard(user_id)
+    return get(user_id)
@@ -0,0 +1,43 @@
+"""Recurring sessions: repeat a template session on a weekly rule.
+
+The dates are computed here; the copying happens server-side in the
+``repeat_session`` function (sql/006_repeat_session.sql), which creates
+every session with its planned sets and attendees in one request.
+"""
+import datetime
+
+from gymapp import db
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# Upper bound on sessions created per call, so one typo cannot book a decade
+MAX_OCCURRENCES = 200
+
+
+def weekly_dates(start, end, weekdays, every=1, anchor=None):
+    """ISO dates from ``start`` to ``end`` (inclusive) on ``weekdays``.
+
+    ``weekdays`` are 0 (Monday) to 6; ``every`` repeats every n-th week,
+    counting from the week ``anchor`` (by default ``start``) falls in.
+    """
+    anchor = anchor or start
+    first_monday = anchor - datetime.timedelta(days=anchor.weekday())
+    dates = []
+    day = start
+    while day <= end:
+        week = (day - first_monday).days // 7
+        if day.weekday() in weekdays and week % every == 0:
+            dates.append(day.isoformat())
+        day += datetime.timedelta(days=1)
+    return dates
+
+
+def repeat(template_id, dates):
+    """Copy session ``template_id`` onto ``dates``; returns the new session rows."""
+    if len(dates) > MAX_OCCURRENCES:
+        raise ValueError(f"at most {MAX_OCCURRENCES} sessions can be created at once")
+    return db.rpc(
+        "repeat_session",
+        {"p_template_id": template_id, "p_dates": list(dates)},
+        writes=("scheduled_workouts", "scheduled_workout_exercises", "scheduled_workout_attendees"),
+    ).execute().data or []
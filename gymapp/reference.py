@@ -0,0 +1,27 @@
+"""Cached reads of reference data shared by every page."""
+from gymapp import db
+from gymapp.catalogue import Catalogue
+from gymapp.cache import reference
+
+
+def exercises():
+    """The full exercise catalogue, ordered by name."""
+    return reference.get(
+        "exercises",
+        lambda: db.table("exercises").select("id, name, description, video_url").order("name").execute().data or [],
+        tables=("exercises",),
+    )
+
+
+def catalogue():
+    """The exercise catalogue indexed for lookups and search (see ``Catalogue``)."""
+    return reference.get("catalogue", lambda: Catalogue(exercises()), tables=("exercises",))
+
+
+def athletes():
+    """Every non-coach user as ``{"id", "name"}``, ordered by name."""
+    return reference.get(
+        "athletes",
+        lambda: db.table("users").select("id, name").eq("coach", "false").order("name").execute().data or [],
+        tables=("users",),
+    )
@@ -0,0 +1,131 @@
+"""Scheduled sessions shown on the home page calendar.
+
+The calendar only loads the date window it is showing. Windows are cached
+per user (``cache.sessions``) and dropped whenever sessions or attendees are
+written through ``gymapp.db``, so paging back and forth between months only
+costs a request the first time each window is shown.
+"""
+import datetime
+
+from gymapp import db
+from gymapp.cache import sessions as window_cache
+
+SESSION_TABLES = ("scheduled_workouts", "scheduled_workout_attendees")
+
+
+# FullCalendar's month view: six whole weeks, starting on Sunday
+MONTH_VIEW_DAYS = 42
+
+
+def default_window(today):
+    """The dates the calendar's month view of ``today`` shows, as inclusive ISO strings.
+
+    The grid starts on the Sunday on or before the 1st and runs six weeks,
+    widened by two days on each side so that whatever ``visible_window``
+    makes of the calendar's UTC timestamps falls inside it.
+    """
+    first = today.replace(day=1)
+    grid_start = first - datetime.timedelta(days=(first.weekday() + 1) % 7)
+    return (
+        (grid_start - datetime.timedelta(days=2)).isoformat(),
+        (grid_start + datetime.timedelta(days=MONTH_VIEW_DAYS + 1)).isoformat(),
+    )
+
+
+def covers(window, shown):
+    """Whether the loaded ``window`` holds every date of ``shown``."""
+    return window[0] <= shown[0] and shown[1] <= window[1]
+
+
+def visible_window(state):
+    """The window the calendar component reports it is showing, if any.
+
+    Reads the ``datesSet`` callback, or the ``view`` that the click/select
+    callbacks carry. FullCalendar sends UTC timestamps with an exclusive end,
+    so the window is widened by a day on each side to cover any timezone.
+    """
+    if not state:
+        return None
+    dates = state.get("datesSet")
+    if dates:
+        start, end = dates.get("start"), dates.get("end")
+    else:
+        payload = state.get(state.get("callback") or "") or {}
+        view = payload.get("view") or {}
+        start, end = view.get("activeStart"), view.get("activeEnd")
+    if not start or not end:
+        return None
+    day = datetime.timedelta(days=1)
+    return (
+        (datetime.date.fromisoformat(start[:10]) - day).isoformat(),
+        (datetime.date.fromisoformat(end[:10]) + day).isoformat(),
+    )
+
+
+def coach_sessions(user_id, start, end):
+    """Sessions created by coach ``user_id`` between ``start`` and ``end``."""
+    return window_cache.get(
+        ("coach", user_id, start, end),
+        lambda: db.table("scheduled_workouts")
+        .select("id, scheduled_date, notes")
+        .eq("user_id", user_id)
+        .gte("scheduled_date", start)
+        .lte("scheduled_date", end)
+        .order("scheduled_date")
+        .execute().data or [],
+        tables=SESSION_TABLES,
+    )
+
+
+def athlete_sessions(user_id, start, end):
+    """Sessions athlete ``user_id`` attends between ``start`` and ``end``.
+
+    The attendee/session join runs server-side (sql/002_athlete_calendar.sql).
+    """
+    return window_cache.get(
+        ("athlete", user_id, start, end),
+        lambda: db.rpc("athlete_calendar", {"p_user_id": user_id, "p_from": start, "p_to": end}).execute().data or [],
+        tables=SESSION_TABLES,
+    )
+
+
+# Sessions per page of the coach's session browser
+BROWSE_PAGE_SIZE = 10
+
+
+def browse_sessions(user_id, title="", start=None, end=None, after=None, page_size=BROWSE_PAGE_SIZE):
+    """One page of coach ``user_id``'s sessions, newest first.
+
+    Pages are keyset-paginated on ``(scheduled_date, id)``: pass the cursor
+    returned with a page as ``after`` to get the next (older) one, so deep
+    pages cost the same as the first (sql/003_session_browser.sql). ``title``
+    is a case-insensitive substring of the session title; ``start``/``end``
+    bound the date, inclusive. Returns ``(rows, next_cursor)``, the cursor
+    being None on the last page. Pages are cached like calendar windows.
+    """
+    def load():
+        query = db.table("scheduled_workouts") \
+            .select("id, scheduled_date, notes") \
+            .eq("user_id", user_id)
+        if title:
+            query = query.ilike("notes", f"%{title}%")
+        if start:
+            query = query.gte("scheduled_date", start)
+        if end:
+            query = query.lte("scheduled_date", end)
+        if after:
+            date, session_id = after
+            query = query.or_(f"scheduled_date.lt.{date},and(scheduled_date.eq.{date},id.lt.{session_id})")
+        # One extra row tells us whether an older page exists
+        rows = query.order("scheduled_date", desc=True).order("id", desc=True) \
+            .limit(page_size + 1).execute().data or []
+        if len(rows) > page_size:
+            last = rows[page_size - 1]
+            return rows[:page_size], (last["scheduled_date"], last["id"])
+        return rows, None
+
+    return window_cache.get(
+        ("browse", user_id, title, start, end, after, page_size),
+        load,
+        tables=("scheduled_workouts",),
+    )
@@ -0,0 +1,13 @@
+"""Optional tuning knobs read from Streamlit secrets, then the environment."""
+import os
+
+import streamlit as st
+
+
+def get(name, default):
+    """Return setting ``name`` cast to the type of ``default``."""
+    try:
+        value = st.secrets[name]
+    except Exception:
+        value = os.environ.get(name, default)
+    return type(default)(value)
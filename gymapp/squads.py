@@ -0,0 +1,75 @@
+"""Squads and the athlete search the coach pages pick attendees with.
+
+A squad is a coach's named group of athletes (sql/009_squads.sql). Booking
+squads into a session sends only their ids: ``save_plan`` expands them to
+attendee rows server-side. Athletes are found with a paged substring
+search rather than by listing the roster, so neither coach page downloads
+the whole ``users`` table.
+"""
+from gymapp import db
+from gymapp.cache import reference, sessions as search_cache
+
+SQUAD_TABLES = ("squads", "squad_members")
+
+# Athletes per page of search results
+SEARCH_PAGE_SIZE = 20
+
+
+def search_athletes(text="", after=None, page_size=SEARCH_PAGE_SIZE):
+    """One page of athletes whose name contains ``text``, by name.
+
+    Keyset-paginated on ``(name, id)``: pass the cursor returned with a page
+    as ``after`` to get the next one. Returns ``(rows, next_cursor)`` with
+    rows as ``{"id", "name"}``; the cursor is None on the last page.
+    Surrounding spaces and case in ``text`` do not matter.
+    """
+    # The match is case-insensitive, so one normalized text serves as both
+    # the query and the cache key
+    text = (text or "").strip().lower()
+
+    def load():
+        after_name, after_id = after or (None, None)
+        # One extra row tells us whether another page exists
+        rows = db.rpc("search_athletes", {
+            "p_query": text,
+            "p_after_name": after_name,
+            "p_after_id": after_id,
+            "p_limit": page_size + 1,
+        }).execute().data or []
+        if len(rows) > page_size:
+            last = rows[page_size - 1]
+            return rows[:page_size], (last["name"], last["id"])
+        return rows, None
+
+    return search_cache.get(("athletes", text, after, page_size), load, tables=("users",))
+
+
+def for_coach(coach_id):
+    """Coach ``coach_id``'s squads as ``{"id", "name", "members"}``, by name."""
+    return reference.get(
+        ("squads", coach_id),
+        lambda: db.rpc("coach_squads", {"p_coach_id": coach_id}).execute().data or [],
+        tables=SQUAD_TABLES,
+    )
+
+
+def members(squad_id):
+    """A squad's athletes as ``{"user_id", "name"}``, by name."""
+    return db.rpc("squad_roster", {"p_squad_id": squad_id}).execute().data or []
+
+
+def save(squad_id, name, member_ids):
+    """Create (``squad_id`` None) or rename a squad and set its members; returns its id.
+
+    The squad is the signed-in coach's; other coaches' squads cannot be changed.
+    """
+    return db.rpc(
+        "save_squad",
+        {"p_squad_id": squad_id, "p_name": name, "p_member_ids": list(member_ids)},
+        writes=SQUAD_TABLES,
+    ).execute().data
+
+
+def delete(squad_id):
+    """Delete a squad; its athletes and past bookings are untouched."""
+    db.rpc("delete_squad", {"p_squad_id": squad_id}, writes=SQUAD_TABLES).execute()
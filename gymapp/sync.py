@@ -0,0 +1,270 @@
+"""Delta sync of session data into this process's caches.
+
+Writes made through ``gymapp.db`` already invalidate the caches of the
+process that made them. Edits from anywhere else (another app server,
+another coach, the dashboard) arrive through ``session_changes``
+(sql/010_session_sync.sql): every session and attendee row written or
+deleted since a watermark, in one request. The cached calendar windows
+are patched with those rows in place, and only entries that cannot be
+patched from the changes alone are dropped, rather than waiting for
+their TTL.
+
+Pulls happen at the top of page runs, at most once per ``SYNC_INTERVAL``,
+or on the next run after a Realtime change event (``ensure_listener``).
+Without Realtime the interval alone bounds how stale a cache can get.
+
+The watermark and the caches are shared by every user of the process, so
+the feed is read with the service role (``db.service_token()``), not the
+token of whoever's page run happens to pull: a user's row level security
+would hide changes that other users' cached entries need. Without a
+service key sync stays off and cached entries live out their TTL.
+"""
+import asyncio
+import datetime
+import logging
+import threading
+import time
+
+from gymapp import cache, db, settings
+
+logger = logging.getLogger(__name__)
+
+SYNC_TABLES = ("scheduled_workouts", "scheduled_workout_attendees")
+
+# Seconds between pulls when no change event has arrived
+SYNC_INTERVAL = settings.get("SYNC_INTERVAL", 30.0)
+# Changes can commit slightly out of stamp order; each pull re-reads this
+# many seconds before the watermark and skips changes already applied
+SYNC_OVERLAP = settings.get("SYNC_OVERLAP", 5.0)
+# Tombstones are purged after two days (sql/010); an older watermark starts over
+SYNC_MAX_AGE = settings.get("SYNC_MAX_AGE", 86400.0)
+# Changes per pull; a full page is a bulk write, handled like a restart
+SYNC_PAGE_SIZE = 1000
+
+_lock = threading.Lock()
+_due = threading.Event()
+_watermark = None  # stamp of the newest change applied
+_next_pull = 0.0  # time.monotonic() of the next scheduled pull
+_seen = {}  # (table, row id, changed_at) -> stamp, for changes in the overlap window
+
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+def notify(event=None):
+    """A change event arrived: pull on the next page run."""
+    _due.set()
+
+
+def _restart():
+    """Drop everything read from the synced tables and sync from now on."""
+    global _watermark
+    with _lock:
+        _watermark = _now() - datetime.timedelta(seconds=SYNC_OVERLAP)
+        _seen.clear()
+    for table in SYNC_TABLES:
+        cache.invalidate_table(table)
+
+
+def pull(force=False):
+    """Fetch and apply the changes since the last pull; returns how many were new.
+
+    Makes no request unless a change event arrived, ``SYNC_INTERVAL`` has
+    passed or ``force`` is set. The first call in a process only starts the
+    clock, as its caches are still empty.
+    """
+    global _watermark, _next_pull
+    token = db.service_token()
+    if token is None:
+        return 0
+    overlap = datetime.timedelta(seconds=SYNC_OVERLAP)
+    with _lock:
+        now = time.monotonic()
+        if _watermark is None:
+            _watermark = _now() - overlap
+            _next_pull = now + SYNC_INTERVAL
+            return 0
+        if not (force or _due.is_set() or now >= _next_pull):
+            return 0
+        _due.clear()
+        _next_pull = now + SYNC_INTERVAL
+        since = _watermark - overlap
+    if _now() - since > datetime.timedelta(seconds=SYNC_MAX_AGE):
+        # Tombstones may have been purged since
+        _restart()
+        return 0
+
+    with db.pin_token(token):
+        changes = db.rpc(
+            "session_changes", {"p_since": since.isoformat(), "p_limit": SYNC_PAGE_SIZE},
+        ).execute().data or []
+    if len(changes) >= SYNC_PAGE_SIZE:
+        # More than a page changed: reloading beats patching
+        _restart()
+        return len(changes)
+    return apply(changes)
+
+
+def apply(changes):
+    """Patch the caches with ``session_changes`` rows; returns how many were new."""
+    global _watermark
+    fresh = []
+    with _lock:
+        for change in changes:
+            key = (change["table_name"], change["row"].get("id"), change["changed_at"])
+            if key in _seen:
+                continue
+            stamp = datetime.datetime.fromisoformat(change["changed_at"])
+            _seen[key] = stamp
+            fresh.append(change)
+            if _watermark is None or stamp > _watermark:
+                _watermark = stamp
+        if _watermark is not None:
+            cutoff = _watermark - datetime.timedelta(seconds=2 * SYNC_OVERLAP)
+            for key in [k for k, stamp in _seen.items() if stamp < cutoff]:
+                del _seen[key]
+
+    if fresh:
+        cache.patch_tables(SYNC_TABLES, _Batch(fresh).patch)
+    return len(fresh)
+
+
+# --- Applying a batch of changes to cache entries ---
+
+class _Batch:
+    """Changes by row, the latest winning: what each cached entry needs."""
+
+    def __init__(self, changes):
+        self.sessions = {}  # session id -> row, or None once deleted
+        self.coaches = set()  # coaches whose sessions changed
+        self.bookings = {}  # (session id, user id) -> booked?
+        for change in changes:
+            row = change["row"]
+            if change["table_name"] == "scheduled_workouts":
+                self.sessions[row["id"]] = row if change["op"] == "upsert" else None
+                self.coaches.add(row["user_id"])
+            else:
+                self.bookings[(row["scheduled_workout_id"], row["user_id"])] = change["op"] == "upsert"
+
+    def patch(self, key, value):
+        kind = key[0] if isinstance(key, tuple) else None
+        patcher = PATCHERS.get(kind)
+        return patcher(self, key, value) if patcher else cache.DROP
+
+
+def _coach_window(batch, key, rows):
+    # schedule.coach_sessions: ("coach", coach id, start, end) -> [{"id", "scheduled_date", "notes"}]
+    _, coach_id, start, end = key
+    if not batch.sessions:
+        return rows
+    kept = [r for r in rows if r["id"] not in batch.sessions]
+    for session_id, row in batch.sessions.items():
+        if row and row["user_id"] == coach_id and start <= row["scheduled_date"] <= end:
+            kept.append({"id": session_id, "scheduled_date": row["scheduled_date"], "notes": row["notes"]})
+    kept.sort(key=lambda r: r["scheduled_date"])
+    return rows if kept == rows else kept
+
+
+def _athlete_window(batch, key, rows):
+    # schedule.athlete_sessions: ("athlete", user id, start, end) -> [session rows]
+    _, user_id, start, end = key
+    by_id = {r["id"]: r for r in rows}
+    changed = False
+    for (session_id, uid), booked in batch.bookings.items():
+        if uid != user_id:
+            continue
+        if not booked:
+            changed |= by_id.pop(session_id, None) is not None
+        elif session_id not in by_id:
+            if session_id not in batch.sessions:
+                return cache.DROP  # booked into a session this window has no row for
+            row = batch.sessions[session_id]
+            if row and start <= row["scheduled_date"] <= end:
+                by_id[session_id] = row
+                changed = True
+    for session_id, row in batch.sessions.items():
+        if session_id in by_id:
+            if row and start <= row["scheduled_date"] <= end:
+                by_id[session_id] = row
+            else:
+                del by_id[session_id]
+            changed = True
+        elif row and start <= row["scheduled_date"] <= end and (session_id, user_id) not in batch.bookings:
+            return cache.DROP  # moved into the window; whether this athlete attends is unknown
+    if not changed:
+        return rows
+    return sorted(by_id.values(), key=lambda r: r["scheduled_date"])
+
+
+def _browse_page(batch, key, rows):
+    # schedule.browse_sessions: ("browse", coach id, ...) -> (rows, cursor)
+    return cache.DROP if key[1] in batch.coaches else rows
+
+
+def _attendance(batch, key, rows):
+    # compliance.session_attendance: ("attendance", session id) -> rows
+    session_id = key[1]
+    touched = session_id in batch.sessions or any(sid == session_id for sid, _ in batch.bookings)
+    return cache.DROP if touched else rows
+
+
+# Entries of any other kind read from a synced table are dropped
+PATCHERS = {
+    "coach": _coach_window,
+    "athlete": _athlete_window,
+    "browse": _browse_page,
+    "attendance": _attendance,
+}
+
+
+# --- Change events: Realtime where available, else polling alone ---
+_listener = None
+_listener_lock = threading.Lock()
+
+
+async def _listen(url, key):
+    from realtime import AsyncRealtimeClient
+
+    client = AsyncRealtimeClient(f"{url}/realtime/v1", key)
+    await client.connect()
+    channel = client.channel("gymapp-session-sync")
+    for table in SYNC_TABLES:
+        channel.on_postgres_changes("*", notify, table=table, schema="public")
+    await channel.subscribe()
+    while client.is_connected:
+        await asyncio.sleep(SYNC_INTERVAL)
+
+
+def _run_listener(url, key):
+    try:
+        asyncio.run(_listen(url, key))
+    except Exception:
+        logger.exception("realtime unavailable; session data syncs every %ss", SYNC_INTERVAL)
+
+
+def ensure_listener():
+    """Subscribe this process to session change events, once.
+
+    The local stand-in offers ``subscribe()``; against Supabase a daemon
+    thread holds a Realtime channel open with the service key, so it hears
+    about every user's changes. If it cannot connect, pulls fall back to
+    ``SYNC_INTERVAL``. Nothing starts without a service key.
+    """
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            return
+        key = db.service_token()
+        if key is None:
+            logger.warning("SUPABASE_SERVICE_KEY is not set; session changes made elsewhere "
+                           "show up when cached entries expire")
+            _listener = False
+            return
+        client = db.get_client()
+        if hasattr(client, "subscribe"):
+            _listener = client.subscribe(SYNC_TABLES, notify)
+            return
+        url = settings.get("SUPABASE_URL", "")
+        _listener = threading.Thread(target=_run_listener, args=(url, key), name="gymapp-sync", daemon=True)
+        _listener.start()
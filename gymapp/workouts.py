@@ -0,0 +1,153 @@
+"""Turning an athlete's log form into ``workouts`` / ``workout_sets`` rows."""
+import pandas as pd
+
+from gymapp import db
+
+# Unique key of workout_sets (see sql/001_workout_upsert_keys.sql)
+SET_KEY = "workout_id,exercise_id,set_number"
+WORKOUT_KEY = "user_id,scheduled_workout_id"
+
+
+def _unchanged(entry, prev):
+    return (
+        prev.get("value") == entry["value"]
+        and prev.get("reps") == entry["reps"]
+        and prev.get("exertion_metric") == entry["exertion_metric"]
+    )
+
+
+def changed_set_rows(workout_id, entries, existing_sets):
+    """``workout_sets`` rows for entries that are new or differ from what was logged.
+
+    ``existing_sets`` maps ``(exercise_id, set_number)`` to the logged row.
+    """
+    rows = []
+    for entry in entries:
+        prev = existing_sets.get((entry["exercise_id"], entry["set_number"]))
+        if prev and _unchanged(entry, prev):
+            continue
+        rows.append({
+            "workout_id": workout_id,
+            "exercise_id": entry["exercise_id"],
+            "set_number": entry["set_number"],
+            "reps": entry["reps"],
+            "exertion_metric": entry["exertion_metric"],
+            "value": entry["value"],
+            "notes": prev.get("notes", "") if prev else "",
+        })
+    return rows
+
+
+def last_performance(user_id, exercise_ids, session_id=None, before=None):
+    """The athlete's previous sets and best set for each exercise, in one request.
+
+    Returns ``{exercise_id: {"last_date", "last_sets", "best_value",
+    "best_reps", "best_metric", "best_date"}}``, leaving out exercises never
+    logged. The workout logged for ``session_id`` and workouts after
+    ``before`` (an ISO date) are not counted.
+    """
+    if not exercise_ids:
+        return {}
+    rows = db.rpc("last_performance", {
+        "p_user_id": user_id,
+        "p_exercise_ids": sorted(exercise_ids),
+        "p_session_id": session_id,
+        "p_before": before,
+    }).execute().data or []
+    return {r["exercise_id"]: r for r in rows}
+
+
+def previous_set(last, exercise_id, planned):
+    """What was lifted last time for a planned set, or None.
+
+    Matches on set number, falling back to the last set done; a different
+    metric does not count.
+    """
+    sets = (last.get(exercise_id) or {}).get("last_sets") or []
+    match = next((s for s in sets if s["set_number"] == planned["set_number"]), sets[-1] if sets else None)
+    if match and match["exertion_metric"] == planned["exertion_metric"]:
+        return match
+    return None
+
+
+def _number(value):
+    return "–" if value is None else f"{value:g}"
+
+
+def _amount(s):
+    return f"{_number(s['value'])} × {_number(s['reps'])}"
+
+
+def describe_last(perf):
+    """``"Last (2025-01-06): 60 × 5, 60 × 5 · Best: 70 kgs × 3 (2024-12-02)"``."""
+    last = ", ".join(_amount(s) for s in perf["last_sets"])
+    if perf["best_value"] is None:
+        return f"Last ({perf['last_date']}): {last}"
+    return (f"Last ({perf['last_date']}): {last} · "
+            f"Best: {_number(perf['best_value'])} {perf['best_metric']} × {_number(perf['best_reps'])} "
+            f"({perf['best_date']})")
+
+
+def prefill(existing_sets, last, exercise_id, planned):
+    """Starting amount for a set: what was logged for it, else last time's, else 0.
+
+    Amounts are floats: loads like 62.5 kg are kept as they are.
+    """
+    prev = existing_sets.get((exercise_id, planned["set_number"]))
+    if prev:
+        return float(prev.get("value") or 0)
+    before = previous_set(last, exercise_id, planned)
+    return float(before["value"] or 0) if before else 0.0
+
+
+# Columns of the compact log grid; only GRID_VALUE is editable
+GRID_PLAN_COLUMNS = ["Exercise", "Set", "Metric", "Reps", "Last"]
+GRID_VALUE = "Amount"
+
+
+def sets_frame(planned_sets, exercise_names, existing_sets, last=None):
+    """One grid row per planned set, prefilled with any logged value.
+
+    ``planned_sets`` maps exercise id to its planned rows in set order;
+    ``last`` is ``last_performance``'s result, used for sets not yet logged.
+    """
+    last = last or {}
+    rows = []
+    for eid, sets in planned_sets.items():
+        for s in sets:
+            before = previous_set(last, eid, s)
+            rows.append({
+                "exercise_id": eid,
+                "Exercise": exercise_names.get(eid, f"Exercise {eid[:5]}"),
+                "Set": s["set_number"],
+                "Metric": s["exertion_metric"],
+                "Reps": s["reps"],
+                "Last": _amount(before) if before else "",
+                GRID_VALUE: prefill(existing_sets, last, eid, s),
+            })
+    return pd.DataFrame(rows, columns=["exercise_id", *GRID_PLAN_COLUMNS, GRID_VALUE])
+
+
+def grid_entries(frame, edited_rows):
+    """Log entries for every grid row, with ``st.data_editor``'s edits applied.
+
+    ``edited_rows`` is the editor's diff: ``{row position: {column: value}}``.
+    A cleared cell comes through as None and is logged as an empty set.
+    """
+    values = frame[GRID_VALUE].tolist()
+    for position, changes in edited_rows.items():
+        if GRID_VALUE in changes:
+            value = changes[GRID_VALUE]
+            values[int(position)] = None if value is None else float(value)
+    return [
+        {
+            "exercise_id": eid,
+            "set_number": int(set_number),
+            "reps": int(reps),
+            "exertion_metric": metric,
+            "value": value,
+        }
+        for eid, set_number, reps, metric, value in zip(
+            frame["exercise_id"], frame["Set"], frame["Reps"], frame["Metric"], values
+        )
+    ]
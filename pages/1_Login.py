@@ -1,15 +1,10 @@
 import streamlit as st
-from supabase import create_client
+from gymapp import db, perf, profiles
 # from dotenv import load_dotenv
 # from pathlib import Path
 import os
 
-# Load environment variables
-# load_dotenv(dotenv_path=Path("/Users/dmaje23/Documents/dev/envfiles/gymapp/gym_app_secrets.env"))
-SUPABASE_URL = st.secrets["SUPABASE_URL"]
-SUPABASE_KEY = st.secrets["SUPABASE_KEY"]
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
-
+perf.start_run("login")
 st.title("🏋️ Gym App Login / Sign Up")
 
 mode = st.radio("Choose mode:", ["Login", "Sign Up", "Forgot Password"])
@@ -23,7 +18,7 @@ if mode == "Login":
 
     if st.button("Log In"):
         try:
-            response = supabase.auth.sign_in_with_password({
+            response = db.auth().sign_in_with_password({
                 "email": email,
                 "password": password
             })
@@ -34,6 +29,7 @@ if mode == "Login":
                 st.session_state["user_id"] = user.id  # <-- ADDED
                 st.session_state["access_token"] = session.access_token
                 st.session_state["refresh_token"] = session.refresh_token
+                profiles.refresh(user.id)  # resolve role once, pages read the cache
                 st.success(f"✅ Logged in as {user.email}")
                 st.switch_page("CBI_Gym_App.py")
             else:
@@ -56,7 +52,7 @@ elif mode == "Sign Up":
     if st.button("Create Account"):
         try:
             # Correct structure for supabase client in Anaconda
-            response = supabase.auth.sign_up({
+            response = db.auth().sign_up({
                 "email": email,
                 "password": password
             })
@@ -64,7 +60,7 @@ elif mode == "Sign Up":
 
             if user:
                 # Insert extra profile details
-                supabase.table("users").insert({
+                db.table("users").insert({
                     "id": user.id,
                     "name": name,
                     "date_of_birth": dob.isoformat(),
@@ -88,7 +84,7 @@ elif mode == "Forgot Password":
 
     if st.button("Send Reset Email"):
         try:
-            supabase.auth.reset_password_email(email)
+            db.auth().reset_password_email(email)
             st.success("✅ Reset email sent! Please check your inbox.")
         except Exception as e:
             st.error(f"❌ Error sending reset email: {str(e)}")
@@ -1,19 +1,14 @@
 import streamlit as st
 import datetime
-from supabase import create_client
+from gymapp import db, outbox, perf, profiles, workouts
 # from dotenv import load_dotenv
 # from pathlib import Path
 import os
 from collections import defaultdict
 import time
 
-# --- Load Supabase config ---
-# load_dotenv(dotenv_path=Path("/Users/dmaje23/Documents/dev/envfiles/gymapp/gym_app_secrets.env"))
-SUPABASE_URL = st.secrets["SUPABASE_URL"]
-SUPABASE_KEY = st.secrets["SUPABASE_KEY"]
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
-
 st.set_page_config(page_title="Log Workout", layout="centered")
+perf.start_run("athlete_workouts")
 st.title("📓 Log a Workout")
 
 user = st.session_state.get("user")
@@ -27,8 +22,17 @@ if not user or not access_token or not user_id or not scheduled_workout_id:
     st.page_link("pages/1_Login.py", label="🔑 Login or Sign Up")
     st.stop()
 
+# --- Queued logs upload in the background; hand them this visit's token ---
+outbox.ensure_flusher()
+outbox.retoken(user_id, db.current_token())
+stuck = [f for f in outbox.failed(user_id) if f["scheduled_workout_id"] != scheduled_workout_id]
+if stuck:
+    st.error("❌ Some saved logs could not be uploaded: "
+             + ", ".join(f["workout_date"][:10] for f in stuck)
+             + ". Open those sessions to try again.")
+
 # --- Fetch planned exercises for this session ---
-swe_resp = supabase.table("scheduled_workout_exercises") \
+swe_resp = db.table("scheduled_workout_exercises") \
     .select("id, exercise_id, set_number, reps, exertion_metric, target_value") \
     .eq("scheduled_workout_id", scheduled_workout_id) \
     .order("exercise_id") \
@@ -38,7 +42,7 @@ swe_data = swe_resp.data or []
 
 ex_ids = list(set([x["exercise_id"] for x in swe_data]))
 if ex_ids:
-    exercises_resp = supabase.table("exercises").select("id, name").in_("id", ex_ids).execute()
+    exercises_resp = db.table("exercises").select("id, name").in_("id", ex_ids).execute()
     exercises = {e["id"]: e["name"] for e in exercises_resp.data or []}
 else:
     exercises = {}
@@ -48,19 +52,19 @@ for row in swe_data:
     planned_sets[row["exercise_id"]].append(row)
 
 # --- Check if this user has already logged this session ---
-existing_workout_resp = supabase.table("workouts") \
+existing_workout_resp = db.table("workouts") \
     .select("id, date, notes") \
     .eq("user_id", user_id) \
     .eq("scheduled_workout_id", scheduled_workout_id) \
     .maybe_single() \
     .execute()
-existing_workout = existing_workout_resp.data
+existing_workout = existing_workout_resp.data if existing_workout_resp else None
 
 existing_sets = {}
 if existing_workout:
     # Fetch their previous entries
-    workout_sets_resp = supabase.table("workout_sets") \
-        .select("id, exercise_id, set_number, reps, exertion_metric, value") \
+    workout_sets_resp = db.table("workout_sets") \
+        .select("id, exercise_id, set_number, reps, exertion_metric, value, notes") \
         .eq("workout_id", existing_workout["id"]) \
         .execute()
     for s in (workout_sets_resp.data or []):
@@ -68,96 +72,98 @@ if existing_workout:
 
 existing_notes = existing_workout["notes"] if existing_workout else ""
 
+# --- What the athlete did last time, for every exercise in one request ---
+last = workouts.last_performance(
+    user_id, ex_ids, scheduled_workout_id, str(workout_date_value)[:10] if workout_date_value else None
+)
+
+# --- A save still waiting to upload overrides what the server has ---
+queued = outbox.pending(user_id, scheduled_workout_id)
+if queued:
+    existing_sets.update(queued["sets"])
+    existing_notes = queued["notes"]
+    if queued["failed"]:
+        st.error(f"❌ Your last save could not be uploaded: {queued['last_error']}. "
+                 "It is kept on this device; fix the log and save again, or try again.")
+        st.button("🔁 Try again", on_click=outbox.retry, args=(user_id, scheduled_workout_id))
+    elif queued["last_error"]:
+        st.warning(f"⏳ Your last save is stored on this device and will upload when the connection is back "
+                   f"({queued['attempts']} attempts so far).")
+    else:
+        st.info("⏳ Your last save is uploading.")
+
 st.write(f"📅 Workout Date: {workout_date_value}")
 
+# Compact grid: one editor for every set instead of four widgets per set
+compact = st.toggle("Compact grid entry", value=True, key="compact_log")
+
 with st.form("log_planned_workout_form"):
     updated_entries = []
-    for eid, sets in planned_sets.items():
-        exname = exercises.get(eid, f"Exercise {eid[:5]}")
-        with st.expander(f"{exname}", expanded=True):
-            for s in sets:
-                k = (eid, s["set_number"])
-                prev = existing_sets.get(k, {})
-                col1, col2, col3, col4 = st.columns([2, 2, 2, 2])
-                with col1:
-                    st.text_input("Set #", value=str(s['set_number']), disabled=True, key=f"setnum_{eid}_{s['set_number']}")
-                with col2:
-                    st.text_input("Metric", value=s['exertion_metric'], disabled=True, key=f"metric_{eid}_{s['set_number']}")
-                with col3:
-                    st.text_input("Reps", value=str(s['reps']), disabled=True, key=f"reps_{eid}_{s['set_number']}")
-                with col4:
-                    value = st.number_input(
-                        f"Amount (Set {s['set_number']})",
-                        min_value=0,
-                        step=1,
-                        key=f"{eid}_{s['set_number']}",
-                        value=int(prev.get("value", 0))
-                    )
-                updated_entries.append({
-                    "exercise_id": eid,
-                    "set_number": s["set_number"],
-                    "reps": s["reps"],
-                    "exertion_metric": s["exertion_metric"],
-                    "value": value,
-                    "workout_set_id": prev.get("id")  # None if new
-                })
+    if compact:
+        grid = workouts.sets_frame(planned_sets, exercises, existing_sets, last)
+        for eid in planned_sets:
+            if eid in last:
+                st.caption(f"**{exercises.get(eid, f'Exercise {eid[:5]}')}**: {workouts.describe_last(last[eid])}")
+        st.data_editor(
+            grid,
+            key="log_grid",
+            hide_index=True,
+            disabled=workouts.GRID_PLAN_COLUMNS,
+            column_config={
+                "exercise_id": None,
+                workouts.GRID_VALUE: st.column_config.NumberColumn(min_value=0.0, step=0.5),
+            },
+        )
+    else:
+        for eid, sets in planned_sets.items():
+            exname = exercises.get(eid, f"Exercise {eid[:5]}")
+            with st.expander(f"{exname}", expanded=True):
+                if eid in last:
+                    st.caption(workouts.describe_last(last[eid]))
+                for s in sets:
+                    k = (eid, s["set_number"])
+                    prev = existing_sets.get(k, {})
+                    col1, col2, col3, col4 = st.columns([2, 2, 2, 2])
+                    with col1:
+                        st.text_input("Set #", value=str(s['set_number']), disabled=True, key=f"setnum_{eid}_{s['set_number']}")
+                    with col2:
+                        st.text_input("Metric", value=s['exertion_metric'], disabled=True, key=f"metric_{eid}_{s['set_number']}")
+                    with col3:
+                        st.text_input("Reps", value=str(s['reps']), disabled=True, key=f"reps_{eid}_{s['set_number']}")
+                    with col4:
+                        value = st.number_input(
+                            f"Amount (Set {s['set_number']})",
+                            min_value=0.0,
+                            step=0.5,
+                            key=f"{eid}_{s['set_number']}",
+                            value=workouts.prefill(existing_sets, last, eid, s)
+                        )
+                    updated_entries.append({
+                        "exercise_id": eid,
+                        "set_number": s["set_number"],
+                        "reps": s["reps"],
+                        "exertion_metric": s["exertion_metric"],
+                        "value": value,
+                        "workout_set_id": prev.get("id")  # None if new
+                    })
     notes = st.text_area("Session Notes (optional)", value=existing_notes)
     submitted = st.form_submit_button("✅ Save Workout")
 
     if submitted:
-        if existing_workout:
-            # Update workout notes
-            supabase.table("workouts").update({"notes": notes}).eq("id", existing_workout["id"]).execute()
-            # Update or insert sets
-            for entry in updated_entries:
-                if entry["workout_set_id"]:
-                    # Update
-                    supabase.table("workout_sets").update({
-                        "value": entry["value"],
-                        "reps": entry["reps"],
-                        "exertion_metric": entry["exertion_metric"],
-                    }).eq("id", entry["workout_set_id"]).execute()
-                else:
-                    # Insert if new (shouldn't happen, but for robustness)
-                    supabase.table("workout_sets").insert({
-                        "workout_id": existing_workout["id"],
-                        "exercise_id": entry["exercise_id"],
-                        "set_number": entry["set_number"],
-                        "reps": entry["reps"],
-                        "exertion_metric": entry["exertion_metric"],
-                        "value": entry["value"],
-                        "notes": ""
-                    }).execute()
-            st.success("Workout updated!")
-            st.balloons()
-            time.sleep(2)
-            st.switch_page("CBI_Gym_App.py")  # Redirect to main app page
-        else:
-            # Insert new workout & sets as before
-            workout_resp = supabase.table("workouts").insert({
-                "user_id": user_id,
-                "date": str(workout_date_value),
-                "notes": notes,
-                "scheduled_workout_id": scheduled_workout_id
-            }).execute()
-            if workout_resp.data and len(workout_resp.data) > 0:
-                workout_id = workout_resp.data[0]["id"]
-                for entry in updated_entries:
-                    supabase.table("workout_sets").insert({
-                        "workout_id": workout_id,
-                        "exercise_id": entry["exercise_id"],
-                        "set_number": entry["set_number"],
-                        "reps": entry["reps"],
-                        "exertion_metric": entry["exertion_metric"],
-                        "value": entry["value"],
-                        "notes": ""
-                    }).execute()
-                st.success("Workout logged and saved to database!")
-                st.balloons()
-                time.sleep(2)
-                st.switch_page("CBI_Gym_App.py")  # Redirect to main app page
-            else:
-                st.error("Failed to log workout. Try again.")
+        if compact:
+            # The editor reports only the cells that changed
+            updated_entries = workouts.grid_entries(grid, st.session_state["log_grid"]["edited_rows"])
+
+        # Queued locally first; the outbox flusher writes it to Supabase
+        set_rows = workouts.changed_set_rows(None, updated_entries, existing_sets)
+        if set_rows or notes != existing_notes or not existing_workout:
+            outbox.enqueue(user_id, scheduled_workout_id, workout_date_value, notes, set_rows, db.current_token())
+        st.success("Workout updated!" if existing_workout else "Workout logged and saved!")
+        st.balloons()
+        time.sleep(2)
+        st.switch_page("CBI_Gym_App.py")  # Redirect to main app page
+
+perf.panel(bool((profiles.get(user_id) or {}).get("coach")))
 
 if st.button("Log Out"):
     for key in ["user", "access_token", "refresh_token", "user_id", "workout_date", "scheduled_workout_id"]:
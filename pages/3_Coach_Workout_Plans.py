@@ -1,18 +1,13 @@
 import streamlit as st
-from supabase import create_client
+from gymapp import db, parallel, perf, plans, profiles, recurrence, reference, schedule, squads, sync
 # from dotenv import load_dotenv
 # from pathlib import Path
 import os
-from datetime import date
+from datetime import date, timedelta
 from collections import defaultdict
 
-# --- Load Supabase config ---
-# load_dotenv(dotenv_path=Path("/Users/dmaje23/Documents/dev/envfiles/gymapp/gym_app_secrets.env"))
-SUPABASE_URL = st.secrets["SUPABASE_URL"]
-SUPABASE_KEY = st.secrets["SUPABASE_KEY"]
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
-
 st.set_page_config(page_title="Plan a Workout", layout="centered")
+run = perf.start_run("coach_workout_plans")
 st.title("📝 Plan or Edit a Workout")
 
 # --- Get logged-in user ID ---
@@ -21,35 +16,94 @@ if not user_id:
     st.warning("You must be logged in to view this page.")
     st.stop()
 
-# --- Fetch user profile to check 'coach' status ---
-user_resp = supabase.table("users").select("coach, name").eq("id", user_id).maybe_single().execute()
-user_data = user_resp.data
+# --- Pick up session changes made elsewhere (one request, only when due) ---
+sync.ensure_listener()
+sync.pull()
+
+# --- Session browser state: filters and the keyset cursor of each page visited ---
+browse_cursors = st.session_state.setdefault("browse_cursors", [None])
+browse_dates = st.session_state.get("session_dates") or ()
+browse_filters = {
+    "title": st.session_state.get("session_search", "").strip(),
+    "start": browse_dates[0].isoformat() if len(browse_dates) > 0 else None,
+    "end": browse_dates[1].isoformat() if len(browse_dates) > 1 else None,
+    "after": browse_cursors[-1],
+}
+
+# --- Fetch profile, squads, catalogue and a page of sessions concurrently ---
+page_data = parallel.fetch_all(
+    profile=lambda: profiles.get(user_id),
+    squads=lambda: squads.for_coach(user_id),
+    catalogue=reference.catalogue,
+    browse=lambda: schedule.browse_sessions(user_id, **browse_filters),
+)
+
+# --- Check 'coach' status ---
+user_data = page_data["profile"]
 if not user_data or not user_data.get("coach", False):
     st.error("Only coaches can access this page.")
     st.stop()
 
 st.info(f"Logged in as Coach {user_data['name']}")
 
-# --- Fetch all athletes, build name/ID mappings ---
-athletes_resp = supabase.table("users").select("id, name").eq("coach", "false").order("name").execute()
-athletes = athletes_resp.data or []
-athlete_options = {u["name"]: u["id"] for u in athletes}
-id_to_name = {u["id"]: u["name"] for u in athletes}
-all_athlete_names = list(athlete_options.keys())
-
-# --- Fetch exercises ---
-exercises_resp = supabase.table("exercises").select("id, name, description, video_url").order("name").execute()
-exercises = exercises_resp.data or []
-exercise_options = {ex["name"]: ex for ex in exercises}
-
-# --- Fetch scheduled sessions for this coach ---
-past_sessions_resp = supabase.table("scheduled_workouts").select("id, scheduled_date, notes").eq("user_id", user_id).order("scheduled_date", desc=True).limit(10).execute()
-past_sessions = past_sessions_resp.data or []
+# --- This coach's squads (cached); athletes are searched for, not listed ---
+coach_squads = {sq["id"]: sq for sq in page_data["squads"]}
+
+# --- Exercises (cached, indexed by id and name) ---
+catalogue = page_data["catalogue"]
+exercise_options = catalogue.by_name
+
+# --- Scheduled sessions for this coach, one page at a time ---
+past_sessions, next_cursor = page_data["browse"]
 session_choices = {f"{ps['scheduled_date']}: {ps.get('notes','') or '(No title)'}": ps["id"] for ps in past_sessions}
 
+
+def reset_browser():
+    st.session_state["browse_cursors"] = [None]
+
+
+def older_page():
+    st.session_state["browse_cursors"].append(next_cursor)
+
+
+def newer_page():
+    st.session_state["browse_cursors"].pop()
+
+# --- Plan being edited: lives in session state so the editor fragment can rerun alone ---
+EXERCISE_WIDGETS = ("exercise_name", "sets", "reps", "exertion_metric")
+
+
+def drop_exercise_widgets(start=0):
+    """Forget the editor's widget values from row ``start`` on."""
+    for key in list(st.session_state.keys()):
+        prefix, _, index = str(key).rpartition("_")
+        if prefix in EXERCISE_WIDGETS and index.isdigit() and int(index) >= start:
+            del st.session_state[key]
+
+
+def load_plan(source, selected_exercises):
+    """Replace the plan with ``selected_exercises``, loaded from ``source``."""
+    st.session_state.selected_exercises = [dict(ex) for ex in selected_exercises]
+    st.session_state["plan_source"] = source
+    drop_exercise_widgets()
+
+
 # --- Determine editing session ---
 editing_session_id = st.session_state.get("editing_session_id")
 dropdown_edit_session_id = None
+with st.expander("Find a session", expanded=len(browse_cursors) > 1 or any(browse_filters.values())):
+    search_col, dates_col = st.columns([3, 2])
+    with search_col:
+        st.text_input("Title contains", key="session_search", on_change=reset_browser)
+    with dates_col:
+        st.date_input("Between", value=(), key="session_dates", on_change=reset_browser)
+    newer_col, page_col, older_col = st.columns([1, 3, 1])
+    with newer_col:
+        st.button("‹ Newer", disabled=len(browse_cursors) == 1, on_click=newer_page)
+    with page_col:
+        st.caption(f"Page {len(browse_cursors)}" + ("" if past_sessions else " · no sessions found"))
+    with older_col:
+        st.button("Older ›", disabled=next_cursor is None, on_click=older_page)
 session_choice = st.selectbox(
     "Edit an Existing Session (or leave blank to create new)",
     [""] + list(session_choices.keys()),
@@ -62,8 +116,18 @@ editing_session_id = editing_session_id or dropdown_edit_session_id
 
 # --- Load session data if editing ---
 if editing_session_id:
-    session_resp = supabase.table("scheduled_workouts").select("*").eq("id", editing_session_id).maybe_single().execute()
-    session_data = session_resp.data or {}
+    # Session row, attendees and planned sets load in parallel
+    edit_data = parallel.fetch_all(
+        session=lambda: db.table("scheduled_workouts").select("*").eq("id", editing_session_id).maybe_single().execute(),
+        attendees=lambda: plans.session_roster(editing_session_id),
+        exercises=lambda: db.table("scheduled_workout_exercises")
+        .select("id, exercise_id, set_number, reps, exertion_metric, target_value")
+        .eq("scheduled_workout_id", editing_session_id)
+        .execute().data or [],
+    )
+    session_data = (edit_data["session"].data if edit_data["session"] else None) or {}
+    att_data = edit_data["attendees"]
+    swe_data = edit_data["exercises"]
     workout_date = date.fromisoformat(session_data.get("scheduled_date", str(date.today())))
     notes = session_data.get("notes", "")
 
@@ -72,10 +136,8 @@ if editing_session_id:
     action_col1, action_col2, _ = st.columns([1, 1, 5])
     with action_col1:
         if st.button("Delete Session", type="primary"):
-            # Cascade: delete all attendees and exercises for this session
-            supabase.table("scheduled_workout_attendees").delete().eq("scheduled_workout_id", editing_session_id).execute()
-            supabase.table("scheduled_workout_exercises").delete().eq("scheduled_workout_id", editing_session_id).execute()
-            supabase.table("scheduled_workouts").delete().eq("id", editing_session_id).execute()
+            # Session, exercises and attendees go in one transaction
+            plans.delete_session(editing_session_id)
             st.success("Session deleted!")
             # Clean up and rerun
             for key in ["editing_session_id", "copying_session", "copied_session_fields"]:
@@ -88,28 +150,20 @@ if editing_session_id:
             st.session_state["copying_session"] = True
             st.session_state["copied_session_fields"] = {
                 "notes": notes,
-                "selected_athletes": [],
+                "selected_athletes": {},
                 "selected_exercises": [],
             }
-            # --- Load attendees for copying
-            att_resp = supabase.table("scheduled_workout_attendees") \
-                .select("user_id") \
-                .eq("scheduled_workout_id", editing_session_id) \
-                .execute()
-            att_data = att_resp.data or []
-            selected_athlete_ids = [a["user_id"] for a in att_data]
-            st.session_state["copied_session_fields"]["selected_athletes"] = [
-                id_to_name[uid] for uid in selected_athlete_ids if uid in id_to_name
-            ]
-            # --- Load exercises for copying
-            swe_resp = supabase.table("scheduled_workout_exercises").select("exercise_id, set_number, reps, exertion_metric").eq("scheduled_workout_id", editing_session_id).execute()
-            swe_data = swe_resp.data or []
+            # --- Attendees for copying (already loaded above, with names)
+            st.session_state["copied_session_fields"]["selected_athletes"] = {
+                a["user_id"]: a["name"] for a in att_data
+            }
+            # --- Exercises for copying (already loaded above)
             ex_group = defaultdict(list)
             for x in swe_data:
                 ex_group[x["exercise_id"]].append(x)
             selected_exercises = []
             for eid, sets in ex_group.items():
-                name = next((e["name"] for e in exercises if e["id"] == eid), None)
+                name = catalogue.name(eid)
                 if name:
                     selected_exercises.append({
                         "exercise_name": name,
@@ -121,32 +175,50 @@ if editing_session_id:
             st.session_state["editing_session_id"] = None  # Disable edit mode!
             st.rerun()
 
-    # --- Load attendees (by user_id, map to name) ---
-    att_resp = supabase.table("scheduled_workout_attendees") \
-        .select("user_id") \
-        .eq("scheduled_workout_id", editing_session_id) \
-        .execute()
-    att_data = att_resp.data or []
-    selected_athlete_ids = [a["user_id"] for a in att_data]
-    selected_athletes = [id_to_name[uid] for uid in selected_athlete_ids if uid in id_to_name]
-
-    # --- Load exercises (with exertion_metric!) ---
-    swe_resp = supabase.table("scheduled_workout_exercises").select("exercise_id, set_number, reps, exertion_metric").eq("scheduled_workout_id", editing_session_id).execute()
-    swe_data = swe_resp.data or []
-    ex_group = defaultdict(list)
-    for x in swe_data:
-        ex_group[x["exercise_id"]].append(x)
-    selected_exercises = []
-    for eid, sets in ex_group.items():
-        name = next((e["name"] for e in exercises if e["id"] == eid), None)
-        if name:
-            selected_exercises.append({
-                "exercise_name": name,
-                "sets": len(sets),
-                "reps": sets[0]["reps"],
-                "exertion_metric": sets[0].get("exertion_metric", "kgs")
-            })
-    st.session_state.selected_exercises = selected_exercises.copy()
+    # --- Repeat this session on a weekly rule (one server-side call) ---
+    @st.fragment
+    def repeat_weekly(template_id, template_date):
+        with st.expander("🔁 Repeat weekly"):
+            days = st.multiselect(
+                "On",
+                options=list(range(7)),
+                default=[template_date.weekday()],
+                format_func=lambda d: recurrence.WEEKDAYS[d],
+                key="repeat_days",
+            )
+            every = st.number_input("Every n weeks", min_value=1, max_value=4, value=1, step=1, key="repeat_every")
+            until = st.date_input("Until", value=template_date + timedelta(weeks=12), key="repeat_until")
+            # Copies start the day after the template, with weeks counted from the template's own
+            dates = recurrence.weekly_dates(template_date + timedelta(days=1), until, days, every, anchor=template_date)
+            st.caption(f"{len(dates)} sessions: " + ", ".join(dates[:6]) + (" …" if len(dates) > 6 else ""))
+            if st.button(f"Create {len(dates)} sessions", disabled=not dates or len(dates) > recurrence.MAX_OCCURRENCES):
+                created = recurrence.repeat(template_id, dates)
+                st.session_state["repeat_result"] = f"Created {len(created)} sessions in one request."
+                st.rerun()
+
+    repeat_weekly(editing_session_id, workout_date)
+    if st.session_state.get("repeat_result"):
+        st.success(st.session_state.pop("repeat_result"))
+
+    # --- Attendees ({user_id: name}) ---
+    selected_athletes = {a["user_id"]: a["name"] for a in att_data}
+
+    # --- Exercises (with exertion_metric!), loaded into the plan once per session ---
+    if st.session_state.get("plan_source") != editing_session_id:
+        ex_group = defaultdict(list)
+        for x in swe_data:
+            ex_group[x["exercise_id"]].append(x)
+        selected_exercises = []
+        for eid, sets in ex_group.items():
+            name = catalogue.name(eid)
+            if name:
+                selected_exercises.append({
+                    "exercise_name": name,
+                    "sets": len(sets),
+                    "reps": sets[0]["reps"],
+                    "exertion_metric": sets[0].get("exertion_metric", "kgs")
+                })
+        load_plan(editing_session_id, selected_exercises)
     st.session_state["editing_session_id"] = editing_session_id
 
 # --- When not editing, check if copying
@@ -155,70 +227,133 @@ elif not editing_session_id and st.session_state.get("copying_session"):
     workout_date = date.today()   # Always default to today for new session
     notes = copydata["notes"]
     selected_athletes = copydata["selected_athletes"]
-    selected_exercises = copydata["selected_exercises"]
-    st.session_state.selected_exercises = selected_exercises.copy()
+    if st.session_state.get("plan_source") != "copy":
+        load_plan("copy", copydata["selected_exercises"])
     st.success("You are copying a session! Adjust the date and details, then save as new.")
 else:
     workout_date = date.today()
     notes = ""
-    selected_athletes = []
-    selected_exercises = []
-    if "selected_exercises" not in st.session_state:
-        st.session_state.selected_exercises = []
+    selected_athletes = {}
+    if st.session_state.get("plan_source") not in (None, "new"):
+        load_plan("new", [])
+    st.session_state.setdefault("selected_exercises", [])
 
 # --- Plan or Edit the workout ---
 st.markdown("### Workout Details")
 workout_date = st.date_input("Session Date", value=workout_date)
 notes = st.text_input("Event Title", value=notes)
 
+
+# --- Exercise editor: reruns on its own, working on the plan in session state ---
+@st.fragment
+def exercise_editor():
+    # Narrows every row's options; a row's current choice always stays listed
+    search = st.text_input("Search exercises", key="exercise_search", placeholder=f"{len(catalogue)} exercises")
+    matches = catalogue.search(search, limit=None) if search else catalogue.names
+    match_set = set(matches)
+
+    if st.button("Add Exercise"):
+        st.session_state.selected_exercises.append({"exercise_name": None, "sets": 3, "reps": 10, "exertion_metric": "kgs"})
+
+    for i, ex in enumerate(st.session_state.selected_exercises):
+        st.write(f"**Exercise {i+1}**")
+        col1, col2, col3, col4 = st.columns([4, 2, 2, 3])
+        with col1:
+            current = ex.get("exercise_name")
+            options = matches if current is None or current in match_set else [current] + matches
+            if current is None:
+                index = 0
+            elif options is catalogue.names:
+                index = catalogue.position[current] + 1
+            else:
+                index = options.index(current) + 1  # short, filtered list
+            exercise_name = st.selectbox(
+                f"Exercise",
+                options=[""] + options,
+                key=f"exercise_name_{i}",
+                index=index
+            )
+        with col2:
+            sets = st.number_input("Sets", min_value=1, max_value=10, step=1, value=ex.get("sets", 3), key=f"sets_{i}")
+        with col3:
+            reps = st.number_input("Reps", min_value=1, max_value=50, step=1, value=ex.get("reps", 10), key=f"reps_{i}")
+        with col4:
+            exertion_metric = st.selectbox(
+                "Exertion Metric",
+                options=["kgs", "calories", "seconds"],
+                index=["kgs", "calories", "seconds"].index(ex.get("exertion_metric", "kgs")),
+                key=f"exertion_metric_{i}"
+            )
+
+        st.session_state.selected_exercises[i] = {
+            "exercise_name": exercise_name if exercise_name else None,
+            "sets": sets,
+            "reps": reps,
+            "exertion_metric": exertion_metric
+        }
+        if exercise_name and exercise_name in exercise_options:
+            st.caption(exercise_options[exercise_name]["description"])
+            st.markdown(f"[📺 Video]({exercise_options[exercise_name]['video_url']})")
+
+    if len(st.session_state.selected_exercises) > 1 and st.button("Remove Last Exercise"):
+        st.session_state.selected_exercises.pop()
+        drop_exercise_widgets(len(st.session_state.selected_exercises))
+        st.rerun(scope="fragment")
+
+
+# --- Attendees: whole squads plus athletes found by search, kept in session state ---
+def reset_athlete_search(key):
+    st.session_state[f"{key}_cursors"] = [None]
+
+
+@st.fragment
+def attendee_picker(key, default):
+    st.markdown("### Who's attending?")
+    st.multiselect(
+        "Squads",
+        options=list(coach_squads),
+        format_func=lambda sid: f"{coach_squads[sid]['name']} ({coach_squads[sid]['members']})",
+        key=f"{key}_squads",
+        placeholder="Book whole squads" if coach_squads else "No squads yet: create them on the Squads page",
+    )
+
+    # One page of search results at a time; names of everyone listed so far label the picks
+    names = st.session_state.setdefault(f"{key}_names", dict(default))
+    cursors = st.session_state.setdefault(f"{key}_cursors", [None])
+    search = st.text_input("Find athletes", key=f"{key}_search", placeholder="Name contains...",
+                           on_change=reset_athlete_search, args=(key,))
+    found, next_cursor = squads.search_athletes(search, after=cursors[-1])
+    names.update((a["id"], a["name"]) for a in found)
+    # Saved attendees stay listed after being unpicked, so the default is always an option
+    picked = st.session_state.get(key, [])
+    st.multiselect(
+        "Athletes",
+        options=list(dict.fromkeys([*default, *picked, *(a["id"] for a in found)])),
+        default=None if key in st.session_state else list(default),
+        format_func=lambda uid: names.get(uid, uid[:8]),
+        key=key,
+    )
+    prev_col, page_col, next_col = st.columns([1, 3, 1])
+    with prev_col:
+        st.button("‹ Prev", key=f"{key}_prev", disabled=len(cursors) == 1, on_click=cursors.pop)
+    with page_col:
+        st.caption(f"Results page {len(cursors)}" + ("" if found else " · no athletes found"))
+    with next_col:
+        st.button("More ›", key=f"{key}_more", disabled=next_cursor is None,
+                  on_click=cursors.append, args=(next_cursor,))
+
+    squad_size = sum(coach_squads[sid]["members"] for sid in st.session_state[f"{key}_squads"])
+    st.caption(f"{len(st.session_state[key])} athletes picked"
+               + (f" + {squad_size} from squads (anyone in both is booked once)" if squad_size else ""))
+
+
 st.markdown("### Exercises")
-if st.button("Add Exercise"):
-    st.session_state.selected_exercises.append({"exercise_name": None, "sets": 3, "reps": 10, "exertion_metric": "kgs"})
-
-for i, ex in enumerate(st.session_state.selected_exercises):
-    st.write(f"**Exercise {i+1}**")
-    col1, col2, col3, col4 = st.columns([4, 2, 2, 3])
-    with col1:
-        exercise_name = st.selectbox(
-            f"Exercise",
-            options=[""] + list(exercise_options.keys()),
-            key=f"exercise_name_{i}",
-            index=0 if ex.get("exercise_name") is None else list(exercise_options.keys()).index(ex["exercise_name"]) + 1
-        )
-    with col2:
-        sets = st.number_input("Sets", min_value=1, max_value=10, step=1, value=ex.get("sets", 3), key=f"sets_{i}")
-    with col3:
-        reps = st.number_input("Reps", min_value=1, max_value=50, step=1, value=ex.get("reps", 10), key=f"reps_{i}")
-    with col4:
-        exertion_metric = st.selectbox(
-            "Exertion Metric",
-            options=["kgs", "calories", "seconds"],
-            index=["kgs", "calories", "seconds"].index(ex.get("exertion_metric", "kgs")),
-            key=f"exertion_metric_{i}"
-        )
+exercise_editor()
 
-    st.session_state.selected_exercises[i] = {
-        "exercise_name": exercise_name if exercise_name else None,
-        "sets": sets,
-        "reps": reps,
-        "exertion_metric": exertion_metric
-    }
-    if exercise_name and exercise_name in exercise_options:
-        st.caption(exercise_options[exercise_name]["description"])
-        st.markdown(f"[📺 Video]({exercise_options[exercise_name]['video_url']})")
-
-if len(st.session_state.selected_exercises) > 1 and st.button("Remove Last Exercise"):
-    st.session_state.selected_exercises.pop()
-
-# --- Attendees (multiselect with correct default) ---
-st.markdown("### Who's attending?")
 multiselect_key = f"athlete_multiselect_{editing_session_id or 'new'}"
-selected_athletes = st.multiselect(
-    "Select athletes",
-    options=all_athlete_names,
-    default=selected_athletes,
-    key=multiselect_key
-)
+attendee_picker(multiselect_key, selected_athletes)
+selected_athletes = st.session_state[multiselect_key]
+selected_squads = st.session_state[f"{multiselect_key}_squads"]
 
 # --- Save the session plan to the DB ---
 if st.button("Save Workout Plan"):
@@ -232,53 +367,30 @@ if st.button("Save Workout Plan"):
         }
         for ex in st.session_state.selected_exercises if ex["exercise_name"]
     ]
+    repeated = plans.repeated_exercises(planned)
     if not planned:
         st.warning("Please select at least one exercise.")
-    elif not selected_athletes:
-        st.warning("Please select at least one athlete.")
+    elif repeated:
+        st.warning(f"{', '.join(repeated)} is listed more than once. Put all of an exercise's sets in one row.")
+    elif not selected_athletes and not selected_squads:
+        st.warning("Please select at least one athlete or squad.")
     else:
-        if editing_session_id:
-            # --- UPDATE session ---
-            supabase.table("scheduled_workouts").update({
-                "scheduled_date": str(workout_date),
-                "notes": notes
-            }).eq("id", editing_session_id).execute()
-            # Remove existing exercises & attendees
-            supabase.table("scheduled_workout_exercises").delete().eq("scheduled_workout_id", editing_session_id).execute()
-            supabase.table("scheduled_workout_attendees").delete().eq("scheduled_workout_id", editing_session_id).execute()
-            sw_id = editing_session_id
-        else:
-            # --- INSERT new session ---
-            sw_resp = supabase.table("scheduled_workouts").insert({
-                "user_id": user_id,
-                "scheduled_date": str(workout_date),
-                "notes": notes
-            }).execute()
-            sw_id = sw_resp.data[0]["id"]
-
-        # Insert exercises
-        for p in planned:
-            for set_number in range(1, p["sets"] + 1):
-                supabase.table("scheduled_workout_exercises").insert({
-                    "scheduled_workout_id": sw_id,
-                    "exercise_id": p["exercise_id"],
-                    "set_number": set_number,
-                    "reps": p["reps"],
-                    "exertion_metric": p["exertion_metric"],
-                    "target_value": 0
-                }).execute()
-
-        # Insert attendees
-        for name in selected_athletes:
-            supabase.table("scheduled_workout_attendees").insert({
-                "scheduled_workout_id": sw_id,
-                "user_id": athlete_options[name],
-                "status": "confirmed"
-            }).execute()
-
+        # Session, planned sets and attendees (squads expanded server-side) in one transactional request
+        calls_before = len(run.calls)
+        plans.save_plan(
+            editing_session_id,
+            {"user_id": user_id, "scheduled_date": str(workout_date), "notes": notes},
+            planned,
+            selected_athletes,
+            squad_ids=selected_squads,
+        )
         st.success("Workout plan created/updated and saved!")
-        st.session_state.selected_exercises = []
+        saved_in = len(run.calls) - calls_before
+        st.caption(f"Saved in {saved_in} request{'s' if saved_in != 1 else ''}.")
+        load_plan("new", [])
         # Clean up state after save
         for key in ["editing_session_id", "copying_session", "copied_session_fields"]:
             if key in st.session_state:
                 del st.session_state[key]
+
+perf.panel(True)
@@ -1,14 +1,10 @@
 import streamlit as st
-from supabase import create_client
+from gymapp import db, perf, profiles
 # from dotenv import load_dotenv
 # from pathlib import Path
 import os
 
-# --- Load Supabase config ---
-# load_dotenv(dotenv_path=Path("/Users/dmaje23/Documents/dev/envfiles/gymapp/gym_app_secrets.env"))
-SUPABASE_URL = st.secrets["SUPABASE_URL"]
-SUPABASE_KEY = st.secrets["SUPABASE_KEY"]
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+perf.start_run("auth_link")
 
 # --- Get query parameters ---
 query_params = st.query_params if hasattr(st, "query_params") else st.experimental_get_query_params()
@@ -16,12 +12,15 @@ access_token = query_params.get("access_token", [None])
 refresh_token = query_params.get("refresh_token", [None])
 event_type = query_params.get("type", [None])
 
+# Isolated auth client: set_session and update_user below share its session
+auth = db.auth()
+
 # --- UI / logic based on action type ---
 if access_token:
     if event_type == "signup":
         # Optionally log user in (set session)
         try:
-            session = supabase.auth.set_session(access_token=access_token, refresh_token=refresh_token)
+            session = auth.set_session(access_token=access_token, refresh_token=refresh_token)
             user = session.user if session else None
         except Exception:
             user = None
@@ -29,10 +28,11 @@ if access_token:
 
         # Store in session_state
         st.session_state["user"] = user
-        if user:
-            st.session_state["user_id"] = user.id  # <-- ADDED
         st.session_state["access_token"] = access_token
         st.session_state["refresh_token"] = refresh_token
+        if user:
+            st.session_state["user_id"] = user.id  # <-- ADDED
+            profiles.get(user.id)  # resolve role once, pages read the cache
 
         if st.button("Go to Dashboard"):
             st.switch_page("CBI_Gym_App.py")  # Replace with your actual dashboard page
@@ -40,14 +40,15 @@ if access_token:
     elif event_type == "recovery":
         # Password reset UI
         try:
-            session = supabase.auth.set_session(access_token=access_token, refresh_token=refresh_token)
+            session = auth.set_session(access_token=access_token, refresh_token=refresh_token)
             user = session.user if session else None
             # Store in session_state
             st.session_state["user"] = user
-            if user:
-                st.session_state["user_id"] = user.id  # <-- ADDED
             st.session_state["access_token"] = access_token
             st.session_state["refresh_token"] = refresh_token
+            if user:
+                st.session_state["user_id"] = user.id  # <-- ADDED
+                profiles.get(user.id)  # resolve role once, pages read the cache
 
             st.subheader("Reset Your Password")
             new_password = st.text_input("New Password", type="password")
@@ -59,7 +60,7 @@ if access_token:
                     st.error("Password must be at least 6 characters.")
                 else:
                     try:
-                        supabase.auth.update_user({"password": new_password})
+                        auth.update_user({"password": new_password})
                         st.success("Password reset successful! Please log in.")
                         st.switch_page("pages/1_Login.py")
                     except Exception as update_err:
@@ -69,14 +70,15 @@ if access_token:
 
     elif event_type == "email_change":
         try:
-            session = supabase.auth.set_session(access_token=access_token, refresh_token=refresh_token)
+            session = auth.set_session(access_token=access_token, refresh_token=refresh_token)
             user = session.user if session else None
             # Store in session_state
             st.session_state["user"] = user
-            if user:
-                st.session_state["user_id"] = user.id  # <-- ADDED
             st.session_state["access_token"] = access_token
             st.session_state["refresh_token"] = refresh_token
+            if user:
+                st.session_state["user_id"] = user.id  # <-- ADDED
+                profiles.get(user.id)  # resolve role once, pages read the cache
         except Exception:
             user = None
         st.success("✅ Your email has been changed and verified!")
@@ -0,0 +1,73 @@
+import streamlit as st
+import pandas as pd
+from gymapp import history, parallel, perf, profiles, reference
+
+st.set_page_config(page_title="My Progress", layout="centered")
+perf.start_run("athlete_progress")
+st.title("📈 My Progress")
+
+user_id = st.session_state.get("user_id")
+access_token = st.session_state.get("access_token")
+
+if not user_id or not access_token:
+    st.warning("🔒 Please log in to access this page.")
+    st.page_link("pages/1_Login.py", label="🔑 Login or Sign Up")
+    st.stop()
+
+# --- History (cached per athlete, patched as workouts are logged) and exercise names ---
+page_data = parallel.fetch_all(
+    profile=lambda: profiles.get(user_id),
+    history=lambda: history.load(user_id),
+    catalogue=reference.catalogue,
+)
+athlete_history = page_data["history"]
+catalogue = page_data["catalogue"]
+frame = athlete_history.frame
+
+if frame.empty:
+    st.info("No workouts logged yet. Your progress will show up here once you log a session.")
+    perf.panel(bool((page_data["profile"] or {}).get("coach")))
+    st.stop()
+
+# --- Headline numbers ---
+col1, col2, col3 = st.columns(3)
+col1.metric("Workouts", frame["workout_id"].nunique())
+col2.metric("Sets", len(frame))
+col3.metric("Total volume", f"{frame['volume'].sum():,.0f} kg")
+
+# --- Per-exercise summary ---
+summary = athlete_history.summary()
+names = summary["exercise_id"].map(lambda eid: catalogue.name(eid, f"Exercise {eid[:5]}"))
+st.markdown("### Exercises")
+st.dataframe(
+    summary.assign(exercise=names).drop(columns="exercise_id"),
+    hide_index=True,
+    column_order=["exercise", "sessions", "sets", "volume", "best_e1rm", "best_set", "trend_per_week", "last_logged"],
+    column_config={
+        "exercise": "Exercise",
+        "sessions": "Sessions",
+        "sets": "Sets",
+        "volume": st.column_config.NumberColumn("Volume (kg)", format="%.0f"),
+        "best_e1rm": st.column_config.NumberColumn("Best e1RM", format="%.1f kg"),
+        "best_set": "Best set",
+        "trend_per_week": st.column_config.NumberColumn("Trend", format="%+.1f kg/wk"),
+        "last_logged": st.column_config.DateColumn("Last logged"),
+    },
+)
+
+# --- One exercise over time ---
+st.markdown("### Trend")
+exercise_ids = summary["exercise_id"].tolist()
+chosen = st.selectbox(
+    "Exercise",
+    options=exercise_ids,
+    format_func=lambda eid: catalogue.name(eid, f"Exercise {eid[:5]}"),
+)
+bests = history.session_bests(frame[frame["exercise_id"] == chosen]).set_index("date")
+st.line_chart(bests[["e1rm", "top_set"]].rename(columns={"e1rm": "Estimated 1RM", "top_set": "Top set"}))
+st.caption("Estimated 1RM uses the Epley formula: load × (1 + reps / 30).")
+
+st.markdown("### Weekly volume")
+st.bar_chart(pd.DataFrame({"Volume (kg)": history.weekly_volume(frame)}))
+
+perf.panel(bool((page_data["profile"] or {}).get("coach")))
@@ -0,0 +1,109 @@
+import streamlit as st
+import datetime
+from gymapp import compliance, parallel, perf, profiles, reference, schedule, sync
+
+st.set_page_config(page_title="Squad Compliance", layout="wide")
+perf.start_run("coach_compliance")
+st.title("✅ Squad Compliance")
+
+user_id = st.session_state.get("user_id")
+if not user_id:
+    st.warning("You must be logged in to view this page.")
+    st.stop()
+
+# --- Pick up session changes made elsewhere (one request, only when due) ---
+sync.ensure_listener()
+sync.pull()
+
+# --- Season window ---
+today = datetime.date.today()
+season = st.date_input(
+    "Season",
+    value=(today - datetime.timedelta(weeks=12), today),
+    key="compliance_season",
+)
+if len(season) < 2:
+    st.info("Pick an end date for the season.")
+    st.stop()
+start, end = (d.isoformat() for d in season)
+
+# --- Coaches only, checked before the squad-wide rollup is loaded and cached ---
+user_data = profiles.get(user_id)
+if not user_data or not user_data.get("coach", False):
+    st.error("Only coaches can access this page.")
+    st.stop()
+
+# --- Rollup, roster and this coach's sessions, concurrently ---
+page_data = parallel.fetch_all(
+    athletes=reference.athletes,
+    weekly=lambda: compliance.weekly(start, end),
+    sessions=lambda: schedule.coach_sessions(user_id, start, end),
+)
+
+id_to_name = {u["id"]: u["name"] for u in page_data["athletes"]}
+weekly = page_data["weekly"]
+weekly = weekly[weekly["user_id"].isin(id_to_name)]
+
+if weekly.empty:
+    st.info("No sessions were planned in this window.")
+    perf.panel(True)
+    st.stop()
+
+# --- Squad headline ---
+due, logged = weekly["due"].sum(), weekly["logged"].sum()
+col1, col2, col3 = st.columns(3)
+col1.metric("Completion", f"{logged / due:.0%}" if due else "–")
+col2.metric("Sessions logged", f"{logged} / {due}")
+col3.metric("Volume", f"{weekly['volume'].sum():,.0f} kg")
+
+# --- Per athlete, least compliant first ---
+st.markdown("### Athletes")
+summary = compliance.athlete_summary(weekly)
+summary.insert(0, "athlete", summary["user_id"].map(id_to_name))
+st.dataframe(
+    summary.drop(columns="user_id"),
+    hide_index=True,
+    column_config={
+        "athlete": "Athlete",
+        "planned": "Booked",
+        "due": "Due",
+        "logged": "Logged",
+        "rate": st.column_config.ProgressColumn("Completion", min_value=0, max_value=1, format="percent"),
+        "recent_rate": st.column_config.ProgressColumn("Last 4 weeks", min_value=0, max_value=1, format="percent"),
+        "volume": st.column_config.NumberColumn("Volume (kg)", format="%.0f"),
+    },
+)
+
+# --- Athlete x week grid ---
+st.markdown("### Week by week")
+matrix = compliance.week_matrix(weekly)
+matrix.index = matrix.index.map(id_to_name)
+matrix.columns = [w.strftime("%d %b") for w in matrix.columns]
+st.dataframe(
+    (matrix * 100).round(),
+    column_config={week: st.column_config.NumberColumn(week, format="%d%%") for week in matrix.columns},
+)
+
+# --- Who logged one session ---
+st.markdown("### Session check")
+past = [s for s in page_data["sessions"] if s["scheduled_date"] <= today.isoformat()]
+if past:
+    session_labels = {f"{s['scheduled_date']}: {s.get('notes') or '(No title)'}": s["id"] for s in reversed(past)}
+    choice = st.selectbox("Session", list(session_labels.keys()), key="compliance_session")
+    attendance = compliance.session_attendance(session_labels[choice])
+    st.dataframe(
+        [
+            {
+                "Athlete": id_to_name.get(a["user_id"], a["user_id"][:8]),
+                "Logged": "✅" if a["logged"] else "❌",
+                "Sets": a["sets"],
+                "Volume (kg)": a["volume"],
+            }
+            for a in sorted(attendance, key=lambda a: (a["logged"], id_to_name.get(a["user_id"], "")))
+        ],
+        hide_index=True,
+    )
+else:
+    st.caption("None of your sessions in this window have happened yet.")
+
+perf.panel(True)
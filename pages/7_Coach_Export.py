@@ -0,0 +1,63 @@
+import streamlit as st
+import datetime
+from gymapp import db, export, perf, profiles
+
+st.set_page_config(page_title="Export Data", layout="centered")
+perf.start_run("coach_export")
+st.title("📤 Export Program Data")
+
+user_id = st.session_state.get("user_id")
+if not user_id:
+    st.warning("You must be logged in to view this page.")
+    st.stop()
+
+user_data = profiles.get(user_id)
+if not user_data or not user_data.get("coach", False):
+    st.error("Only coaches can access this page.")
+    st.stop()
+
+# --- What to export ---
+DATASET_LABELS = {
+    "workout_sets": "Logged sets (with athlete, session and exercise names)",
+    "workouts": "Logged workouts",
+    "scheduled_workouts": "Planned sessions",
+    "exercises": "Exercise catalogue",
+}
+dataset = st.selectbox("Data", list(DATASET_LABELS), format_func=DATASET_LABELS.get)
+
+formats = ["csv", "parquet"] if export.parquet_available() else ["csv"]
+fmt = st.radio("Format", formats, horizontal=True, format_func=str.upper)
+
+today = datetime.date.today()
+everything = st.checkbox("Whole history", value=False, disabled=dataset == "exercises")
+start = end = None
+if dataset != "exercises" and not everything:
+    season = st.date_input("Dates", value=(today - datetime.timedelta(weeks=26), today))
+    if len(season) == 2:
+        start, end = (d.isoformat() for d in season)
+
+# --- Build the file only when the button is clicked, off the script thread ---
+token = db.current_token()
+
+
+def build_file():
+    with db.pin_token(token):
+        return export.export(dataset, fmt, start, end)
+
+
+range_label = f"_{start}_{end}" if start else ""
+st.download_button(
+    "⬇️ Download",
+    data=build_file,
+    file_name=f"cbi_{dataset}{range_label}.{fmt}",
+    mime="text/csv" if fmt == "csv" else "application/vnd.apache.parquet",
+    on_click="ignore",
+    type="primary",
+)
+st.caption(
+    f"Rows are read {export.EXPORT_PAGE_SIZE} at a time, so large exports take a little while to "
+    f"start downloading. Files are limited to {export.EXPORT_MAX_BYTES // (1024 * 1024)} MB: "
+    "pick a shorter date range for more."
+)
+
+perf.panel(True)
@@ -0,0 +1,88 @@
+import streamlit as st
+from gymapp import importer, parallel, perf, profiles, reference
+
+st.set_page_config(page_title="Import Plans", layout="centered")
+perf.start_run("coach_import")
+st.title("📥 Import Exercises and Session Plans")
+
+user_id = st.session_state.get("user_id")
+if not user_id:
+    st.warning("You must be logged in to view this page.")
+    st.stop()
+
+page_data = parallel.fetch_all(
+    profile=lambda: profiles.get(user_id),
+    athletes=reference.athletes,
+    catalogue=reference.catalogue,
+)
+user_data = page_data["profile"]
+if not user_data or not user_data.get("coach", False):
+    st.error("Only coaches can access this page.")
+    st.stop()
+
+# --- Files ---
+st.markdown(
+    "Upload an exercise CSV, a session plan CSV, or both. Each session plan line is one "
+    "exercise; lines with the same date and title make one session, and `athletes` is a "
+    "`;`-separated list of names."
+)
+col1, col2 = st.columns(2)
+with col1:
+    st.download_button("Exercise template", importer.EXERCISE_TEMPLATE, file_name="exercises.csv", mime="text/csv")
+with col2:
+    st.download_button("Session plan template", importer.SESSION_TEMPLATE, file_name="sessions.csv", mime="text/csv")
+
+# New uploader keys after each import, so the same files cannot be imported twice
+upload_round = st.session_state.setdefault("import_round", 0)
+exercise_file = st.file_uploader("Exercises CSV", type="csv", key=f"import_exercises_{upload_round}")
+session_file = st.file_uploader("Session plan CSV", type="csv", key=f"import_sessions_{upload_round}")
+
+if st.session_state.get("import_result"):
+    st.success(st.session_state.pop("import_result"))
+
+if not exercise_file and not session_file:
+    perf.panel(True)
+    st.stop()
+
+# --- Dry run: validate against the cached catalogue and roster ---
+report = importer.Report()
+if exercise_file:
+    importer.read_exercises(exercise_file.getvalue(), page_data["catalogue"], report)
+if session_file:
+    importer.read_sessions(session_file.getvalue(), page_data["catalogue"], page_data["athletes"], report)
+
+st.markdown("### Dry run")
+st.table([report.summary()])
+if report.errors:
+    st.error(f"{len(report.errors)} problem(s) must be fixed before importing.")
+    st.dataframe([{"Line": line, "Problem": message} for line, message in report.errors], hide_index=True)
+for line, message in report.warnings:
+    st.warning(f"Line {line}: {message}" if line else message)
+
+if report.sessions:
+    names = {e["id"]: e["name"] for e in report.exercises}
+    names.update((e["id"], e["name"]) for e in page_data["catalogue"].exercises)
+    with st.expander("Sessions to create"):
+        st.dataframe(
+            [
+                {
+                    "Date": s["row"]["scheduled_date"],
+                    "Title": s["row"]["notes"],
+                    "Exercises": ", ".join(f"{names[p['exercise_id']]} {p['sets']}x{p['reps']}" for p in s["planned"]),
+                    "Athletes": len(s["attendee_ids"]),
+                }
+                for s in report.sessions
+            ],
+            hide_index=True,
+        )
+
+# --- Commit ---
+if st.button("Import", type="primary", disabled=not report.ok or not any(report.summary().values())):
+    # Everything in one transactional request: a failure imports nothing
+    importer.commit(report, user_id)
+    st.session_state["import_result"] = (f"Imported {len(report.exercises)} exercises and "
+                                         f"{len(report.sessions)} sessions in one request.")
+    st.session_state["import_round"] = upload_round + 1
+    st.rerun()
+
+perf.panel(True)
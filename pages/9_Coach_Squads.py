@@ -0,0 +1,121 @@
+import streamlit as st
+from gymapp import parallel, perf, profiles, squads
+
+st.set_page_config(page_title="Squads", layout="centered")
+perf.start_run("coach_squads")
+st.title("👥 Squads")
+
+user_id = st.session_state.get("user_id")
+if not user_id:
+    st.warning("You must be logged in to view this page.")
+    st.stop()
+
+page_data = parallel.fetch_all(
+    profile=lambda: profiles.get(user_id),
+    squads=lambda: squads.for_coach(user_id),
+)
+user_data = page_data["profile"]
+if not user_data or not user_data.get("coach", False):
+    st.error("Only coaches can access this page.")
+    st.stop()
+
+st.caption("Book a whole squad into a session from the planning page in one click.")
+
+if st.session_state.get("squad_result"):
+    st.success(st.session_state.pop("squad_result"))
+
+# --- Pick a squad to edit, or start a new one ---
+coach_squads = {sq["id"]: sq for sq in page_data["squads"]}
+squad_id = st.selectbox(
+    "Squad",
+    options=[None] + list(coach_squads),
+    format_func=lambda sid: "➕ New squad" if sid is None
+    else f"{coach_squads[sid]['name']} ({coach_squads[sid]['members']})",
+    key="squad_choice",
+)
+squad = coach_squads.get(squad_id)
+
+# Members load once per squad; edits live in session state until saved
+members_key = f"squad_members_{squad_id or 'new'}"
+if members_key not in st.session_state:
+    roster = squads.members(squad_id) if squad_id else []
+    st.session_state[f"{members_key}_names"] = {m["user_id"]: m["name"] for m in roster}
+    st.session_state[members_key] = [m["user_id"] for m in roster]
+names = st.session_state[f"{members_key}_names"]
+
+name_key = f"squad_name_{squad_id or 'new'}"
+st.text_input("Name", value=squad["name"] if squad else "", key=name_key)
+
+
+# --- Members: search the roster a page at a time ---
+def reset_search():
+    st.session_state["squad_search_cursors"] = [None]
+
+
+@st.fragment
+def member_picker():
+    cursors = st.session_state.setdefault("squad_search_cursors", [None])
+    search = st.text_input("Find athletes", key="squad_search", placeholder="Name contains...",
+                           on_change=reset_search)
+    found, next_cursor = squads.search_athletes(search, after=cursors[-1])
+    names.update((a["id"], a["name"]) for a in found)
+    st.multiselect(
+        "Members",
+        options=list(dict.fromkeys([*st.session_state[members_key], *(a["id"] for a in found)])),
+        format_func=lambda uid: names.get(uid, uid[:8]),
+        key=members_key,
+    )
+    prev_col, page_col, next_col = st.columns([1, 3, 1])
+    with prev_col:
+        st.button("‹ Prev", key="squad_search_prev", disabled=len(cursors) == 1, on_click=cursors.pop)
+    with page_col:
+        st.caption(f"Results page {len(cursors)}" + ("" if found else " · no athletes found"))
+    with next_col:
+        st.button("More ›", key="squad_search_more", disabled=next_cursor is None,
+                  on_click=cursors.append, args=(next_cursor,))
+    st.caption(f"{len(st.session_state[members_key])} members")
+
+
+member_picker()
+
+
+def forget_squad(sid):
+    for key in (f"squad_members_{sid}", f"squad_members_{sid}_names", f"squad_name_{sid}"):
+        st.session_state.pop(key, None)
+
+
+# Callbacks run before the next rerun, so they can point the squad selectbox elsewhere
+def save_squad():
+    clean = st.session_state[name_key].strip()
+    taken = {sq["name"].lower() for sid, sq in coach_squads.items() if sid != squad_id}
+    if not clean:
+        st.session_state["squad_problem"] = "Give the squad a name."
+    elif clean.lower() in taken:
+        st.session_state["squad_problem"] = f"You already have a squad called {clean}."
+    else:
+        # Squad row and memberships in one transactional request
+        saved_id = squads.save(squad_id, clean, st.session_state[members_key])
+        forget_squad(squad_id or "new")
+        forget_squad(saved_id)
+        st.session_state["squad_choice"] = saved_id
+        st.session_state["squad_result"] = f"Saved {clean}."
+
+
+def delete_squad():
+    squads.delete(squad_id)
+    forget_squad(squad_id)
+    st.session_state["squad_choice"] = None
+    st.session_state["squad_result"] = f"Deleted {squad['name']}. Sessions already booked keep their athletes."
+
+
+# --- Save or delete ---
+if st.session_state.get("squad_problem"):
+    st.warning(st.session_state.pop("squad_problem"))
+save_col, delete_col, _ = st.columns([1, 1, 3])
+with save_col:
+    st.button("Save Squad", type="primary", on_click=save_squad)
+with delete_col:
+    if squad:
+        st.button("Delete Squad", on_click=delete_squad)
+
+perf.panel(True)
@@ -0,0 +1,53 @@
+-- Natural keys used by the athlete log form's bulk upserts.
+-- Run once in the Supabase SQL editor.
+
+-- Merge any session an athlete logged twice into one workout before its key
+-- is added: the latest-dated copy (then the greatest id) is kept, with its
+-- notes. The other copies' sets move onto it, except sets it already has,
+-- and the other copies are deleted. Workouts without a session are left alone.
+create temp table workout_dupes as
+select id as dupe_id, keep_id
+from (
+  select id,
+         first_value(id) over (partition by user_id, scheduled_workout_id
+                               order by date desc nulls last, id desc) as keep_id
+  from workouts
+  where scheduled_workout_id is not null
+) ranked
+where id <> keep_id;
+
+delete from workout_sets s
+using workout_dupes d, workout_sets k
+where s.workout_id = d.dupe_id
+  and k.workout_id = d.keep_id
+  and k.exercise_id = s.exercise_id
+  and k.set_number = s.set_number;
+
+update workout_sets s
+set workout_id = d.keep_id
+from workout_dupes d
+where s.workout_id = d.dupe_id;
+
+delete from workouts w
+using workout_dupes d
+where w.id = d.dupe_id;
+
+drop table workout_dupes;
+
+-- Keep only the newest copy of any duplicated set before adding the key
+-- (including sets two merged copies above both had)
+delete from workout_sets a
+using workout_sets b
+where a.workout_id = b.workout_id
+  and a.exercise_id = b.exercise_id
+  and a.set_number = b.set_number
+  and a.ctid < b.ctid;
+
+alter table workout_sets
+  add constraint workout_sets_workout_exercise_set_key
+  unique (workout_id, exercise_id, set_number);
+
+-- One logged workout per athlete per scheduled session
+alter table workouts
+  add constraint workouts_user_scheduled_workout_key
+  unique (user_id, scheduled_workout_id);
@@ -0,0 +1,23 @@
+-- Athlete calendar in one round trip: the sessions a user attends within a
+-- date window, joined server-side. Called as rpc('athlete_calendar', ...).
+-- Local equivalent: gymapp/fake_supabase.py::_athlete_calendar
+
+create index if not exists scheduled_workout_attendees_user_idx
+  on scheduled_workout_attendees (user_id, scheduled_workout_id);
+
+create index if not exists scheduled_workouts_date_idx
+  on scheduled_workouts (scheduled_date);
+
+create or replace function athlete_calendar(p_user_id uuid, p_from date, p_to date default null)
+returns setof scheduled_workouts
+language sql
+stable
+as $$
+  select sw.*
+  from scheduled_workout_attendees a
+  join scheduled_workouts sw on sw.id = a.scheduled_workout_id
+  where a.user_id = p_user_id
+    and sw.scheduled_date >= p_from
+    and (p_to is null or sw.scheduled_date <= p_to)
+  order by sw.scheduled_date;
+$$;
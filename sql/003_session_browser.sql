@@ -0,0 +1,11 @@
+-- Coach session browser (gymapp/schedule.py::browse_sessions): keyset pages
+-- ordered by (scheduled_date desc, id desc) and title search with ilike.
+
+create index if not exists scheduled_workouts_coach_keyset_idx
+  on scheduled_workouts (user_id, scheduled_date desc, id desc);
+
+-- Lets `notes ilike '%...%'` use an index instead of scanning every session
+create extension if not exists pg_trgm;
+
+create index if not exists scheduled_workouts_notes_trgm_idx
+  on scheduled_workouts using gin (notes gin_trgm_ops);
@@ -0,0 +1,40 @@
+-- Athlete progress history (gymapp/history.py): every logged set of a user
+-- with its workout date, flattened server-side and paged by workout_sets.id
+-- so a multi-season history streams in a few bulk reads.
+-- Local equivalent: gymapp/fake_supabase.py::_athlete_history
+
+create index if not exists workouts_user_idx
+  on workouts (user_id, id);
+
+create index if not exists workout_sets_workout_idx
+  on workout_sets (workout_id, id);
+
+create or replace function athlete_history(
+  p_user_id uuid,
+  p_workout_ids uuid[] default null,
+  p_after uuid default null,
+  p_limit int default 1000
+)
+returns table (
+  id uuid,
+  workout_id uuid,
+  date date,
+  exercise_id uuid,
+  set_number int,
+  reps int,
+  exertion_metric text,
+  value numeric
+)
+language sql
+stable
+as $$
+  select ws.id, ws.workout_id, w.date, ws.exercise_id, ws.set_number,
+         ws.reps, ws.exertion_metric, ws.value
+  from workouts w
+  join workout_sets ws on ws.workout_id = w.id
+  where w.user_id = p_user_id
+    and (p_workout_ids is null or w.id = any(p_workout_ids))
+    and (p_after is null or ws.id > p_after)
+  order by ws.id
+  limit p_limit;
+$$;
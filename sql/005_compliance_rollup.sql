@@ -0,0 +1,302 @@
+-- Squad compliance (gymapp/compliance.py): planned vs logged sessions and
+-- volume per athlete per day, kept in a rollup table by triggers so the
+-- coach dashboard reads a season for the whole squad in one query.
+-- Local equivalents: gymapp/fake_supabase.py::_squad_compliance,
+-- gymapp/fake_supabase.py::_session_attendance
+
+create table if not exists athlete_day_stats (
+  user_id uuid not null,
+  day date not null,
+  planned int not null default 0,   -- sessions the athlete was booked into
+  logged int not null default 0,    -- of those, sessions they logged
+  volume numeric not null default 0, -- sum of reps x kgs logged that day
+  primary key (user_id, day)
+);
+
+create index if not exists athlete_day_stats_day_idx on athlete_day_stats (day);
+
+-- --- Access: athletes read their own rows, coaches everyone's ---
+-- Nothing but the triggers below writes here. They run as the function
+-- owner, which owns the table and so is not subject to its policies.
+
+alter table athlete_day_stats enable row level security;
+
+create or replace function is_coach()
+returns boolean
+language sql
+stable
+security definer
+set search_path = public
+as $$
+  select coalesce((select coach from users where id = auth.uid()), false);
+$$;
+
+drop policy if exists athlete_day_stats_read on athlete_day_stats;
+create policy athlete_day_stats_read on athlete_day_stats
+  for select to authenticated
+  using (user_id = auth.uid() or is_coach());
+
+-- Recompute the rows for (p_user_ids[i], p_days[i]) pairs from the base
+-- tables. Runs as its owner so every athlete's rows can be refreshed by
+-- whoever's write fired the trigger; not callable through the API.
+drop function if exists refresh_athlete_days(uuid, date[]);
+
+create or replace function refresh_athlete_days(p_user_ids uuid[], p_days date[])
+returns void
+language sql
+security definer
+set search_path = public
+as $$
+  delete from athlete_day_stats s
+  using unnest(p_user_ids, p_days) as p(user_id, day)
+  where s.user_id = p.user_id and s.day = p.day;
+
+  insert into athlete_day_stats (user_id, day, planned, logged, volume)
+  select * from (
+    select p.user_id, p.day,
+      (select count(*)
+         from scheduled_workout_attendees a
+         join scheduled_workouts sw on sw.id = a.scheduled_workout_id
+        where a.user_id = p.user_id and sw.scheduled_date = p.day) as planned,
+      (select count(*)
+         from workouts w
+         join scheduled_workouts sw on sw.id = w.scheduled_workout_id
+         join scheduled_workout_attendees a
+           on a.scheduled_workout_id = sw.id and a.user_id = w.user_id
+        where w.user_id = p.user_id and sw.scheduled_date = p.day) as logged,
+      (select coalesce(sum(ws.reps * ws.value), 0)
+         from workouts w
+         left join scheduled_workouts sw on sw.id = w.scheduled_workout_id
+         join workout_sets ws on ws.workout_id = w.id
+        where w.user_id = p.user_id
+          and coalesce(sw.scheduled_date, w.date) = p.day
+          and ws.exertion_metric = 'kgs') as volume
+    from (select distinct user_id, day
+          from unnest(p_user_ids, p_days) as u(user_id, day)
+          where user_id is not null and day is not null) p
+  ) stats
+  where planned <> 0 or logged <> 0 or volume <> 0
+  on conflict (user_id, day) do update
+    set planned = excluded.planned, logged = excluded.logged, volume = excluded.volume;
+$$;
+
+revoke all on function refresh_athlete_days(uuid[], date[]) from public, anon, authenticated;
+
+-- --- Triggers: each write statement refreshes only the athlete-days it touches ---
+-- Statement-level, reading the changed rows from transition tables, so a bulk
+-- write refreshes each athlete-day once. Postgres allows transition tables
+-- only on single-event triggers, hence one trigger per event below; each
+-- function reads new_rows and old_rows only for the events that have them.
+
+create or replace function athlete_day_stats_attendee_trg()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+  v_users uuid[];
+  v_days date[];
+begin
+  if tg_op in ('INSERT', 'UPDATE') then
+    select array_agg(a.user_id), array_agg(sw.scheduled_date) into v_users, v_days
+    from new_rows a
+    join scheduled_workouts sw on sw.id = a.scheduled_workout_id;
+    perform refresh_athlete_days(v_users, v_days);
+  end if;
+  if tg_op in ('UPDATE', 'DELETE') then
+    select array_agg(a.user_id), array_agg(sw.scheduled_date) into v_users, v_days
+    from old_rows a
+    join scheduled_workouts sw on sw.id = a.scheduled_workout_id;
+    perform refresh_athlete_days(v_users, v_days);
+  end if;
+  return null;
+end;
+$$;
+
+create or replace function athlete_day_stats_workout_trg()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+  v_users uuid[];
+  v_days date[];
+begin
+  if tg_op in ('INSERT', 'UPDATE') then
+    select array_agg(w.user_id), array_agg(coalesce(sw.scheduled_date, w.date)) into v_users, v_days
+    from new_rows w
+    left join scheduled_workouts sw on sw.id = w.scheduled_workout_id;
+    perform refresh_athlete_days(v_users, v_days);
+  end if;
+  if tg_op in ('UPDATE', 'DELETE') then
+    select array_agg(w.user_id), array_agg(coalesce(sw.scheduled_date, w.date)) into v_users, v_days
+    from old_rows w
+    left join scheduled_workouts sw on sw.id = w.scheduled_workout_id;
+    perform refresh_athlete_days(v_users, v_days);
+  end if;
+  return null;
+end;
+$$;
+
+create or replace function athlete_day_stats_set_trg()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+  v_users uuid[];
+  v_days date[];
+begin
+  if tg_op in ('INSERT', 'UPDATE') then
+    select array_agg(wk.user_id), array_agg(coalesce(sw.scheduled_date, wk.date)) into v_users, v_days
+    from (select distinct workout_id from new_rows) ws
+    join workouts wk on wk.id = ws.workout_id
+    left join scheduled_workouts sw on sw.id = wk.scheduled_workout_id;
+    perform refresh_athlete_days(v_users, v_days);
+  end if;
+  if tg_op in ('UPDATE', 'DELETE') then
+    select array_agg(wk.user_id), array_agg(coalesce(sw.scheduled_date, wk.date)) into v_users, v_days
+    from (select distinct workout_id from old_rows) ws
+    join workouts wk on wk.id = ws.workout_id
+    left join scheduled_workouts sw on sw.id = wk.scheduled_workout_id;
+    perform refresh_athlete_days(v_users, v_days);
+  end if;
+  return null;
+end;
+$$;
+
+-- A session moved to another date: its attendees' old and new days
+create or replace function athlete_day_stats_session_trg()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+  v_users uuid[];
+  v_days date[];
+begin
+  select array_agg(a.user_id), array_agg(d.day) into v_users, v_days
+  from old_rows o
+  join new_rows n on n.id = o.id and n.scheduled_date is distinct from o.scheduled_date
+  join scheduled_workout_attendees a on a.scheduled_workout_id = n.id
+  cross join lateral (values (o.scheduled_date), (n.scheduled_date)) as d(day);
+  perform refresh_athlete_days(v_users, v_days);
+  return null;
+end;
+$$;
+
+drop trigger if exists athlete_day_stats_attendee on scheduled_workout_attendees;
+drop trigger if exists athlete_day_stats_attendee_ins on scheduled_workout_attendees;
+create trigger athlete_day_stats_attendee_ins
+  after insert on scheduled_workout_attendees
+  referencing new table as new_rows
+  for each statement execute function athlete_day_stats_attendee_trg();
+drop trigger if exists athlete_day_stats_attendee_upd on scheduled_workout_attendees;
+create trigger athlete_day_stats_attendee_upd
+  after update on scheduled_workout_attendees
+  referencing old table as old_rows new table as new_rows
+  for each statement execute function athlete_day_stats_attendee_trg();
+drop trigger if exists athlete_day_stats_attendee_del on scheduled_workout_attendees;
+create trigger athlete_day_stats_attendee_del
+  after delete on scheduled_workout_attendees
+  referencing old table as old_rows
+  for each statement execute function athlete_day_stats_attendee_trg();
+
+drop trigger if exists athlete_day_stats_workout on workouts;
+drop trigger if exists athlete_day_stats_workout_ins on workouts;
+create trigger athlete_day_stats_workout_ins
+  after insert on workouts
+  referencing new table as new_rows
+  for each statement execute function athlete_day_stats_workout_trg();
+drop trigger if exists athlete_day_stats_workout_upd on workouts;
+create trigger athlete_day_stats_workout_upd
+  after update on workouts
+  referencing old table as old_rows new table as new_rows
+  for each statement execute function athlete_day_stats_workout_trg();
+drop trigger if exists athlete_day_stats_workout_del on workouts;
+create trigger athlete_day_stats_workout_del
+  after delete on workouts
+  referencing old table as old_rows
+  for each statement execute function athlete_day_stats_workout_trg();
+
+drop trigger if exists athlete_day_stats_set on workout_sets;
+drop trigger if exists athlete_day_stats_set_ins on workout_sets;
+create trigger athlete_day_stats_set_ins
+  after insert on workout_sets
+  referencing new table as new_rows
+  for each statement execute function athlete_day_stats_set_trg();
+drop trigger if exists athlete_day_stats_set_upd on workout_sets;
+create trigger athlete_day_stats_set_upd
+  after update on workout_sets
+  referencing old table as old_rows new table as new_rows
+  for each statement execute function athlete_day_stats_set_trg();
+drop trigger if exists athlete_day_stats_set_del on workout_sets;
+create trigger athlete_day_stats_set_del
+  after delete on workout_sets
+  referencing old table as old_rows
+  for each statement execute function athlete_day_stats_set_trg();
+
+-- Transition tables rule out "update of scheduled_date"; the function skips other updates
+drop trigger if exists athlete_day_stats_session on scheduled_workouts;
+create trigger athlete_day_stats_session
+  after update on scheduled_workouts
+  referencing old table as old_rows new table as new_rows
+  for each statement execute function athlete_day_stats_session_trg();
+
+-- --- Backfill ---
+
+insert into athlete_day_stats (user_id, day, planned, logged, volume)
+select user_id, day, sum(planned), sum(logged), sum(volume)
+from (
+  select a.user_id, sw.scheduled_date as day, 1 as planned,
+         (w.id is not null)::int as logged, 0 as volume
+  from scheduled_workout_attendees a
+  join scheduled_workouts sw on sw.id = a.scheduled_workout_id
+  left join workouts w on w.scheduled_workout_id = sw.id and w.user_id = a.user_id
+  union all
+  select w.user_id, coalesce(sw.scheduled_date, w.date), 0, 0, ws.reps * ws.value
+  from workouts w
+  left join scheduled_workouts sw on sw.id = w.scheduled_workout_id
+  join workout_sets ws on ws.workout_id = w.id
+  where ws.exertion_metric = 'kgs'
+) parts
+group by user_id, day
+on conflict (user_id, day) do update
+  set planned = excluded.planned, logged = excluded.logged, volume = excluded.volume;
+
+-- --- Reads ---
+
+-- Per athlete per week (weeks start Monday); `due` counts only sessions up to today
+create or replace function squad_compliance(p_from date, p_to date)
+returns table (user_id uuid, week date, planned bigint, due bigint, logged bigint, volume numeric)
+language sql
+stable
+as $$
+  select user_id, date_trunc('week', day)::date as week,
+         sum(planned), sum(planned) filter (where day <= current_date),
+         sum(logged), sum(volume)
+  from athlete_day_stats
+  where day between p_from and p_to
+  group by user_id, date_trunc('week', day)
+  order by week, user_id;
+$$;
+
+-- Who was booked into one session and whether they logged it
+create or replace function session_attendance(p_session_id uuid)
+returns table (user_id uuid, logged boolean, sets bigint, volume numeric)
+language sql
+stable
+as $$
+  select a.user_id, w.id is not null,
+         count(ws.id),
+         coalesce(sum(ws.reps * ws.value) filter (where ws.exertion_metric = 'kgs'), 0)
+  from scheduled_workout_attendees a
+  left join workouts w on w.scheduled_workout_id = a.scheduled_workout_id and w.user_id = a.user_id
+  left join workout_sets ws on ws.workout_id = w.id
+  where a.scheduled_workout_id = p_session_id
+  group by a.user_id, w.id;
+$$;
@@ -0,0 +1,33 @@
+-- Recurring sessions (gymapp/recurrence.py): copy a template session, with
+-- its planned sets and attendees, onto many dates in one call.
+-- Local equivalent: gymapp/fake_supabase.py::_repeat_session
+
+create or replace function repeat_session(p_template_id uuid, p_dates date[])
+returns setof scheduled_workouts
+language sql
+as $$
+  with created as (
+    insert into scheduled_workouts (user_id, scheduled_date, notes)
+    select t.user_id, d.day, t.notes
+    from scheduled_workouts t
+    cross join unnest(p_dates) as d(day)
+    where t.id = p_template_id
+    returning *
+  ),
+  planned as (
+    insert into scheduled_workout_exercises
+      (scheduled_workout_id, exercise_id, set_number, reps, exertion_metric, target_value)
+    select c.id, e.exercise_id, e.set_number, e.reps, e.exertion_metric, e.target_value
+    from created c
+    cross join scheduled_workout_exercises e
+    where e.scheduled_workout_id = p_template_id
+  ),
+  booked as (
+    insert into scheduled_workout_attendees (scheduled_workout_id, user_id, status)
+    select c.id, a.user_id, 'confirmed'
+    from created c
+    cross join scheduled_workout_attendees a
+    where a.scheduled_workout_id = p_template_id
+  )
+  select * from created order by scheduled_date;
+$$;
@@ -0,0 +1,118 @@
+-- Atomic plan writes for the coach page (gymapp/plans.py). Each function
+-- runs in one transaction, so a failure part-way leaves the session as it
+-- was, and each is one request.
+-- Local equivalents: gymapp/fake_supabase.py::_save_plan,
+-- gymapp/fake_supabase.py::_delete_session
+
+-- Natural keys the functions sync on. Duplicates have to go first: the old
+-- delete-and-reinsert save could leave two copies of a planned set or an
+-- attendee when it ran twice at once. Of each duplicated key only the copy
+-- with the greatest id is kept, so rerunning gives the same result. The
+-- copies normally hold the same values; to review them before deleting, run
+--   select scheduled_workout_id, exercise_id, set_number, count(*)
+--   from scheduled_workout_exercises group by 1, 2, 3 having count(*) > 1;
+--   select scheduled_workout_id, user_id, count(*)
+--   from scheduled_workout_attendees group by 1, 2 having count(*) > 1;
+delete from scheduled_workout_exercises a
+using scheduled_workout_exercises b
+where a.scheduled_workout_id = b.scheduled_workout_id
+  and a.exercise_id = b.exercise_id
+  and a.set_number = b.set_number
+  and a.id < b.id;
+
+alter table scheduled_workout_exercises
+  add constraint scheduled_workout_exercises_session_exercise_set_key
+  unique (scheduled_workout_id, exercise_id, set_number);
+
+delete from scheduled_workout_attendees a
+using scheduled_workout_attendees b
+where a.scheduled_workout_id = b.scheduled_workout_id
+  and a.user_id = b.user_id
+  and a.id < b.id;
+
+alter table scheduled_workout_attendees
+  add constraint scheduled_workout_attendees_session_user_key
+  unique (scheduled_workout_id, user_id);
+
+-- Create (p_session_id null) or update a session so that its planned sets and
+-- attendees are exactly p_exercises and p_attendee_ids. Rows that did not
+-- change are left alone. Returns the session id.
+--   p_session:   {"user_id", "scheduled_date", "notes"}
+--   p_exercises: [{"exercise_id", "set_number", "reps", "exertion_metric", "target_value"}]
+create or replace function save_plan(
+  p_session_id uuid,
+  p_session jsonb,
+  p_exercises jsonb,
+  p_attendee_ids uuid[]
+)
+returns uuid
+language plpgsql
+as $$
+declare
+  v_id uuid := p_session_id;
+begin
+  if v_id is null then
+    insert into scheduled_workouts (user_id, scheduled_date, notes)
+    values ((p_session->>'user_id')::uuid, (p_session->>'scheduled_date')::date, p_session->>'notes')
+    returning id into v_id;
+  else
+    update scheduled_workouts
+    set scheduled_date = (p_session->>'scheduled_date')::date,
+        notes = p_session->>'notes'
+    where id = v_id
+      and (scheduled_date, notes) is distinct from
+          ((p_session->>'scheduled_date')::date, p_session->>'notes');
+    if not found and not exists (select 1 from scheduled_workouts where id = v_id) then
+      raise exception 'session % does not exist', v_id using errcode = 'no_data_found';
+    end if;
+  end if;
+
+  -- Planned sets: one row per (exercise_id, set_number), the last listed
+  -- winning, since on conflict cannot update the same row twice
+  with plan as (
+    select distinct on (x.exercise_id, x.set_number)
+           x.exercise_id, x.set_number, x.reps, x.exertion_metric, coalesce(x.target_value, 0) as target_value
+    from jsonb_array_elements(p_exercises) with ordinality as e(item, ord)
+    cross join lateral jsonb_to_record(e.item)
+      as x(exercise_id uuid, set_number int, reps int, exertion_metric text, target_value numeric)
+    order by x.exercise_id, x.set_number, e.ord desc
+  ),
+  dropped as (
+    delete from scheduled_workout_exercises s
+    where s.scheduled_workout_id = v_id
+      and not exists (select 1 from plan p
+                      where p.exercise_id = s.exercise_id and p.set_number = s.set_number)
+  )
+  insert into scheduled_workout_exercises
+    (scheduled_workout_id, exercise_id, set_number, reps, exertion_metric, target_value)
+  select v_id, exercise_id, set_number, reps, exertion_metric, target_value
+  from plan
+  on conflict (scheduled_workout_id, exercise_id, set_number) do update
+    set reps = excluded.reps,
+        exertion_metric = excluded.exertion_metric,
+        target_value = excluded.target_value
+    where (scheduled_workout_exercises.reps, scheduled_workout_exercises.exertion_metric,
+           scheduled_workout_exercises.target_value)
+          is distinct from (excluded.reps, excluded.exertion_metric, excluded.target_value);
+
+  -- Attendees
+  delete from scheduled_workout_attendees
+  where scheduled_workout_id = v_id and user_id <> all(p_attendee_ids);
+
+  insert into scheduled_workout_attendees (scheduled_workout_id, user_id, status)
+  select v_id, uid, 'confirmed' from unnest(p_attendee_ids) as uid
+  on conflict (scheduled_workout_id, user_id) do nothing;
+
+  return v_id;
+end;
+$$;
+
+-- Delete a session with its planned sets and attendees
+create or replace function delete_session(p_session_id uuid)
+returns void
+language sql
+as $$
+  delete from scheduled_workout_attendees where scheduled_workout_id = p_session_id;
+  delete from scheduled_workout_exercises where scheduled_workout_id = p_session_id;
+  delete from scheduled_workouts where id = p_session_id;
+$$;
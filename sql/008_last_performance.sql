@@ -0,0 +1,70 @@
+-- "Last time" prefill for the athlete log form (gymapp/workouts.py): for
+-- each exercise of a session, the athlete's sets from the most recent other
+-- workout with it and their best set, for every exercise in one request.
+-- Local equivalent: gymapp/fake_supabase.py::_last_performance
+
+-- An athlete's workouts newest first, and one exercise's sets within a workout
+create index if not exists workouts_user_date_idx
+  on workouts (user_id, date desc, id desc);
+
+create index if not exists workout_sets_workout_exercise_idx
+  on workout_sets (workout_id, exercise_id, set_number);
+
+-- Workouts of p_user_id dated up to p_before, except the one logged for
+-- p_session_id (the session being filled in).
+--   last_sets: [{"set_number", "reps", "exertion_metric", "value"}] in set order
+--   best_*:    the set with the largest value across those workouts; sets
+--              logged without a value never count, and best_* is null when
+--              no set of the exercise has one
+create or replace function last_performance(
+  p_user_id uuid,
+  p_exercise_ids uuid[],
+  p_session_id uuid default null,
+  p_before date default null
+)
+returns table (
+  exercise_id uuid,
+  last_date date,
+  last_sets jsonb,
+  best_value numeric,
+  best_reps int,
+  best_metric text,
+  best_date date
+)
+language sql
+stable
+as $$
+  with mine as (
+    select w.id, w.date
+    from workouts w
+    where w.user_id = p_user_id
+      and (p_before is null or w.date <= p_before)
+      and w.scheduled_workout_id is distinct from p_session_id
+  )
+  select e.exercise_id, last.date, last.sets, best.value, best.reps, best.exertion_metric, best.date
+  from unnest(p_exercise_ids) as e(exercise_id)
+  cross join lateral (
+    select m.id, m.date
+    from mine m
+    where exists (select 1 from workout_sets ws
+                  where ws.workout_id = m.id and ws.exercise_id = e.exercise_id)
+    order by m.date desc, m.id desc
+    limit 1
+  ) latest
+  cross join lateral (
+    select latest.date,
+           jsonb_agg(jsonb_build_object('set_number', ws.set_number, 'reps', ws.reps,
+                                        'exertion_metric', ws.exertion_metric, 'value', ws.value)
+                     order by ws.set_number) as sets
+    from workout_sets ws
+    where ws.workout_id = latest.id and ws.exercise_id = e.exercise_id
+  ) last
+  left join lateral (
+    select ws.value, ws.reps, ws.exertion_metric, m.date
+    from mine m
+    join workout_sets ws on ws.workout_id = m.id and ws.exercise_id = e.exercise_id
+    where ws.value is not null
+    order by ws.value desc nulls last, ws.reps desc nulls last, m.date desc
+    limit 1
+  ) best on true;
+$$;
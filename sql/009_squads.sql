@@ -0,0 +1,243 @@
+-- Squads (gymapp/squads.py): named groups of athletes a coach books into a
+-- session in one go, and a paged server-side athlete search, so the coach
+-- pages never download the whole users table.
+-- Local equivalents: gymapp/fake_supabase.py::_search_athletes,
+-- gymapp/fake_supabase.py::_coach_squads, gymapp/fake_supabase.py::_squad_roster,
+-- gymapp/fake_supabase.py::_session_roster, gymapp/fake_supabase.py::_save_squad,
+-- gymapp/fake_supabase.py::_delete_squad, gymapp/fake_supabase.py::_save_plan
+
+create table if not exists squads (
+  id uuid primary key default gen_random_uuid(),
+  coach_id uuid not null references users (id) on delete cascade,
+  name text not null,
+  created_at timestamptz not null default now(),
+  unique (coach_id, name)
+);
+
+create table if not exists squad_members (
+  squad_id uuid not null references squads (id) on delete cascade,
+  user_id uuid not null references users (id) on delete cascade,
+  primary key (squad_id, user_id)
+);
+
+create index if not exists squad_members_user_idx on squad_members (user_id);
+
+-- --- Access: a coach sees and changes only their own squads ---
+-- Members are reached through their squad. The functions below run as the
+-- caller, so these policies bound them too.
+
+alter table squads enable row level security;
+alter table squad_members enable row level security;
+
+drop policy if exists squads_owner on squads;
+create policy squads_owner on squads
+  for all to authenticated
+  using (coach_id = auth.uid())
+  with check (coach_id = auth.uid());
+
+drop policy if exists squad_members_owner on squad_members;
+create policy squad_members_owner on squad_members
+  for all to authenticated
+  using (exists (select 1 from squads s where s.id = squad_id and s.coach_id = auth.uid()))
+  with check (exists (select 1 from squads s where s.id = squad_id and s.coach_id = auth.uid()));
+
+-- Substring search on names, and the (name, id) order results are paged in
+create extension if not exists pg_trgm;
+
+create index if not exists users_athlete_name_trgm_idx
+  on users using gin (name gin_trgm_ops) where not coach;
+
+create index if not exists users_athlete_name_idx
+  on users (name, id) where not coach;
+
+-- --- Reads ---
+
+-- One page of athletes whose name contains p_query, ordered by (name, id);
+-- pass the last row's name and id to get the next page
+create or replace function search_athletes(
+  p_query text default '',
+  p_after_name text default null,
+  p_after_id uuid default null,
+  p_limit int default 20
+)
+returns table (id uuid, name text)
+language sql
+stable
+as $$
+  select u.id, u.name
+  from users u
+  where not u.coach
+    and (coalesce(p_query, '') = ''
+         or u.name ilike '%' || replace(replace(replace(p_query, '\', '\\'), '%', '\%'), '_', '\_') || '%')
+    and (p_after_name is null or (u.name, u.id) > (p_after_name, p_after_id))
+  order by u.name, u.id
+  limit least(p_limit, 100);
+$$;
+
+-- A coach's squads with their sizes
+create or replace function coach_squads(p_coach_id uuid)
+returns table (id uuid, name text, members bigint)
+language sql
+stable
+as $$
+  select s.id, s.name, count(m.user_id)
+  from squads s
+  left join squad_members m on m.squad_id = s.id
+  where s.coach_id = p_coach_id
+  group by s.id, s.name
+  order by s.name;
+$$;
+
+-- Members of a squad, and attendees of a session, with their names
+create or replace function squad_roster(p_squad_id uuid)
+returns table (user_id uuid, name text)
+language sql
+stable
+as $$
+  select u.id, u.name
+  from squad_members m
+  join users u on u.id = m.user_id
+  where m.squad_id = p_squad_id
+  order by u.name;
+$$;
+
+create or replace function session_roster(p_session_id uuid)
+returns table (user_id uuid, name text)
+language sql
+stable
+as $$
+  select u.id, u.name
+  from scheduled_workout_attendees a
+  join users u on u.id = a.user_id
+  where a.scheduled_workout_id = p_session_id
+  order by u.name;
+$$;
+
+-- --- Writes ---
+
+-- Create (p_squad_id null) or rename one of the caller's squads and set its
+-- members; returns its id
+drop function if exists save_squad(uuid, uuid, text, uuid[]);
+
+create or replace function save_squad(p_squad_id uuid, p_name text, p_member_ids uuid[])
+returns uuid
+language plpgsql
+as $$
+declare
+  v_coach uuid := auth.uid();
+  v_id uuid := p_squad_id;
+begin
+  if v_coach is null then
+    raise exception 'not signed in' using errcode = 'insufficient_privilege';
+  end if;
+
+  if v_id is null then
+    insert into squads (coach_id, name) values (v_coach, p_name) returning id into v_id;
+  else
+    if not exists (select 1 from squads where id = v_id and coach_id = v_coach) then
+      raise exception 'squad % does not exist', v_id using errcode = 'no_data_found';
+    end if;
+    update squads set name = p_name where id = v_id and name is distinct from p_name;
+  end if;
+
+  delete from squad_members where squad_id = v_id and user_id <> all(p_member_ids);
+  insert into squad_members (squad_id, user_id)
+  select v_id, uid from unnest(p_member_ids) as uid
+  on conflict do nothing;
+  return v_id;
+end;
+$$;
+
+create or replace function delete_squad(p_squad_id uuid)
+returns void
+language sql
+as $$
+  delete from squads where id = p_squad_id and coach_id = auth.uid();
+$$;
+
+-- save_plan (sql/007_save_plan.sql) gains p_squad_ids: their members are
+-- booked along with p_attendee_ids, expanded by one insert ... select.
+-- Only the caller's squads can be booked
+drop function if exists save_plan(uuid, jsonb, jsonb, uuid[]);
+
+create or replace function save_plan(
+  p_session_id uuid,
+  p_session jsonb,
+  p_exercises jsonb,
+  p_attendee_ids uuid[],
+  p_squad_ids uuid[] default '{}'
+)
+returns uuid
+language plpgsql
+as $$
+declare
+  v_id uuid := p_session_id;
+  v_attendees uuid[];
+begin
+  if v_id is null then
+    insert into scheduled_workouts (user_id, scheduled_date, notes)
+    values ((p_session->>'user_id')::uuid, (p_session->>'scheduled_date')::date, p_session->>'notes')
+    returning id into v_id;
+  else
+    update scheduled_workouts
+    set scheduled_date = (p_session->>'scheduled_date')::date,
+        notes = p_session->>'notes'
+    where id = v_id
+      and (scheduled_date, notes) is distinct from
+          ((p_session->>'scheduled_date')::date, p_session->>'notes');
+    if not found and not exists (select 1 from scheduled_workouts where id = v_id) then
+      raise exception 'session % does not exist', v_id using errcode = 'no_data_found';
+    end if;
+  end if;
+
+  -- Planned sets: one row per (exercise_id, set_number), the last listed
+  -- winning, since on conflict cannot update the same row twice
+  with plan as (
+    select distinct on (x.exercise_id, x.set_number)
+           x.exercise_id, x.set_number, x.reps, x.exertion_metric, coalesce(x.target_value, 0) as target_value
+    from jsonb_array_elements(p_exercises) with ordinality as e(item, ord)
+    cross join lateral jsonb_to_record(e.item)
+      as x(exercise_id uuid, set_number int, reps int, exertion_metric text, target_value numeric)
+    order by x.exercise_id, x.set_number, e.ord desc
+  ),
+  dropped as (
+    delete from scheduled_workout_exercises s
+    where s.scheduled_workout_id = v_id
+      and not exists (select 1 from plan p
+                      where p.exercise_id = s.exercise_id and p.set_number = s.set_number)
+  )
+  insert into scheduled_workout_exercises
+    (scheduled_workout_id, exercise_id, set_number, reps, exertion_metric, target_value)
+  select v_id, exercise_id, set_number, reps, exertion_metric, target_value
+  from plan
+  on conflict (scheduled_workout_id, exercise_id, set_number) do update
+    set reps = excluded.reps,
+        exertion_metric = excluded.exertion_metric,
+        target_value = excluded.target_value
+    where (scheduled_workout_exercises.reps, scheduled_workout_exercises.exertion_metric,
+           scheduled_workout_exercises.target_value)
+          is distinct from (excluded.reps, excluded.exertion_metric, excluded.target_value);
+
+  -- Attendees: the athletes picked one by one plus every member of the
+  -- squads, which must be the caller's own
+  if exists (select 1 from unnest(p_squad_ids) as sid
+             where not exists (select 1 from squads s where s.id = sid and s.coach_id = auth.uid())) then
+    raise exception 'squads % are not all yours', p_squad_ids using errcode = 'insufficient_privilege';
+  end if;
+
+  v_attendees := array(
+    select unnest(p_attendee_ids)
+    union
+    select user_id from squad_members where squad_id = any(p_squad_ids)
+  );
+
+  delete from scheduled_workout_attendees
+  where scheduled_workout_id = v_id and user_id <> all(v_attendees);
+
+  insert into scheduled_workout_attendees (scheduled_workout_id, user_id, status)
+  select v_id, uid, 'confirmed' from unnest(v_attendees) as uid
+  on conflict (scheduled_workout_id, user_id) do nothing;
+
+  return v_id;
+end;
+$$;
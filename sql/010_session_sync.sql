@@ -0,0 +1,129 @@
+-- Delta sync of session data (gymapp/sync.py): sessions and attendees carry
+-- an updated_at watermark, deletes leave a tombstone, and one function
+-- returns every change since a watermark. The same tables are published to
+-- Realtime so app servers pull as soon as something changes.
+-- Local equivalent: gymapp/fake_supabase.py::_session_changes (the stand-in
+-- stamps rows and emits change events itself, see FakeSupabase.subscribe)
+
+alter table scheduled_workouts
+  add column if not exists updated_at timestamptz not null default clock_timestamp();
+
+alter table scheduled_workout_attendees
+  add column if not exists updated_at timestamptz not null default clock_timestamp();
+
+create index if not exists scheduled_workouts_updated_idx on scheduled_workouts (updated_at);
+create index if not exists scheduled_workout_attendees_updated_idx on scheduled_workout_attendees (updated_at);
+
+-- clock_timestamp() rather than now(): closer to commit time for long
+-- transactions; clients re-read a short overlap to cover the rest
+create or replace function touch_updated_at()
+returns trigger
+language plpgsql
+as $$
+begin
+  new.updated_at := clock_timestamp();
+  return new;
+end;
+$$;
+
+drop trigger if exists scheduled_workouts_touch on scheduled_workouts;
+create trigger scheduled_workouts_touch
+  before insert or update on scheduled_workouts
+  for each row execute function touch_updated_at();
+
+drop trigger if exists scheduled_workout_attendees_touch on scheduled_workout_attendees;
+create trigger scheduled_workout_attendees_touch
+  before insert or update on scheduled_workout_attendees
+  for each row execute function touch_updated_at();
+
+-- --- Tombstones: the deleted row as it was ---
+
+create table if not exists deleted_rows (
+  table_name text not null,
+  row_id uuid not null,
+  row jsonb not null,
+  deleted_at timestamptz not null default clock_timestamp()
+);
+
+create index if not exists deleted_rows_deleted_idx on deleted_rows (deleted_at);
+
+-- Tombstones hold whole rows of every user's sessions: no policies, so only
+-- the service role (which bypasses row level security) reads them, and only
+-- the trigger function, running as the table's owner, writes them
+alter table deleted_rows enable row level security;
+
+create or replace function record_deleted_row()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+  insert into deleted_rows (table_name, row_id, row) values (tg_table_name, old.id, to_jsonb(old));
+  return null;
+end;
+$$;
+
+drop trigger if exists scheduled_workouts_tombstone on scheduled_workouts;
+create trigger scheduled_workouts_tombstone
+  after delete on scheduled_workouts
+  for each row execute function record_deleted_row();
+
+drop trigger if exists scheduled_workout_attendees_tombstone on scheduled_workout_attendees;
+create trigger scheduled_workout_attendees_tombstone
+  after delete on scheduled_workout_attendees
+  for each row execute function record_deleted_row();
+
+-- Clients older than this resync from scratch (gymapp.sync.SYNC_MAX_AGE);
+-- schedule with pg_cron where available
+create or replace function purge_deleted_rows()
+returns void
+language sql
+as $$
+  delete from deleted_rows where deleted_at < now() - interval '2 days';
+$$;
+
+revoke all on function purge_deleted_rows() from public, anon, authenticated;
+
+-- --- Reads ---
+
+-- Every session and attendee row written or deleted after p_since, oldest
+-- first. A full page (p_limit rows) means the caller should resync.
+-- App servers share one watermark per process, so they read this with the
+-- service role, whose view no user's row level security narrows; nobody
+-- else may call it.
+create or replace function session_changes(p_since timestamptz, p_limit int default 1000)
+returns table (table_name text, op text, row jsonb, changed_at timestamptz)
+language sql
+stable
+as $$
+  select * from (
+    select 'scheduled_workouts'::text, 'upsert'::text, to_jsonb(s), s.updated_at
+    from scheduled_workouts s
+    where s.updated_at > p_since
+    union all
+    select 'scheduled_workout_attendees', 'upsert', to_jsonb(a), a.updated_at
+    from scheduled_workout_attendees a
+    where a.updated_at > p_since
+    union all
+    select d.table_name, 'delete', d.row, d.deleted_at
+    from deleted_rows d
+    where d.deleted_at > p_since
+      and d.table_name in ('scheduled_workouts', 'scheduled_workout_attendees')
+  ) changes (table_name, op, row, changed_at)
+  order by changed_at
+  limit p_limit;
+$$;
+
+revoke all on function session_changes(timestamptz, int) from public, anon, authenticated;
+grant execute on function session_changes(timestamptz, int) to service_role;
+
+-- --- Realtime: change events wake the app servers' sync ---
+
+do $$
+begin
+  alter publication supabase_realtime add table scheduled_workouts, scheduled_workout_attendees;
+exception
+  when duplicate_object or undefined_object then null;
+end;
+$$;
@@ -0,0 +1,43 @@
+-- CSV import (gymapp/importer.py): new exercises, sessions, their planned
+-- sets and attendees in one transaction, so a failure part-way writes
+-- nothing, and in one request.
+-- Local equivalent: gymapp/fake_supabase.py::_import_plan
+
+-- Ids are generated by the importer, so rows can refer to each other
+-- without reading ids back. Returns the number of sessions created.
+--   p_exercises: [{"id", "name", "description", "video_url"}]
+--   p_sessions:  [{"id", "scheduled_date", "notes", "attendee_ids": [uuid],
+--                  "planned": [{"exercise_id", "sets", "reps", "exertion_metric"}]}]
+-- Each planned exercise becomes sets rows numbered 1..sets.
+create or replace function import_plan(p_coach_id uuid, p_exercises jsonb, p_sessions jsonb)
+returns int
+language plpgsql
+as $$
+declare
+  v_sessions int;
+begin
+  insert into exercises (id, name, description, video_url)
+  select x.id, x.name, x.description, x.video_url
+  from jsonb_to_recordset(p_exercises) as x(id uuid, name text, description text, video_url text);
+
+  insert into scheduled_workouts (id, user_id, scheduled_date, notes)
+  select s.id, p_coach_id, s.scheduled_date, s.notes
+  from jsonb_to_recordset(p_sessions) as s(id uuid, scheduled_date date, notes text);
+  get diagnostics v_sessions = row_count;
+
+  insert into scheduled_workout_exercises
+    (scheduled_workout_id, exercise_id, set_number, reps, exertion_metric, target_value)
+  select s.id, p.exercise_id, n.set_number, p.reps, p.exertion_metric, 0
+  from jsonb_to_recordset(p_sessions) as s(id uuid, planned jsonb)
+  cross join lateral jsonb_to_recordset(s.planned)
+    as p(exercise_id uuid, sets int, reps int, exertion_metric text)
+  cross join lateral generate_series(1, p.sets) as n(set_number);
+
+  insert into scheduled_workout_attendees (scheduled_workout_id, user_id, status)
+  select distinct s.id, a.user_id::uuid, 'confirmed'
+  from jsonb_to_recordset(p_sessions) as s(id uuid, attendee_ids jsonb)
+  cross join lateral jsonb_array_elements_text(s.attendee_ids) as a(user_id);
+
+  return v_sessions;
+end;
+$$;
@@ -0,0 +1,49 @@
+"""Shared fixtures: every test runs against a fresh in-memory Supabase."""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+# Read at import by gymapp modules: keep the outbox and logs out of the way
+os.environ.setdefault("OUTBOX_PATH", os.path.join(tempfile.mkdtemp(prefix="gymapp-tests-"), "outbox.sqlite3"))
+os.environ.setdefault("SYNC_INTERVAL", "3600")
+os.environ.setdefault("PERF_LOG", "off")
+
+import pytest  # noqa: E402
+
+from gymapp import cache, db  # noqa: E402
+from gymapp.fake_supabase import FakeSupabase  # noqa: E402
+
+
+@pytest.fixture
+def fake():
+    """A small seeded program served to ``gymapp.db``, with empty caches."""
+    store = FakeSupabase.seeded(athletes=20, exercises=30, weeks=4, squad_size=8)
+    db.use_client(store)
+    cache.clear_all()
+    # No Streamlit session here: queries go out with the anon key
+    with db.pin_token(""):
+        yield store
+    db.use_client(None)
+    cache.clear_all()
+
+
+@pytest.fixture
+def signed_in(fake):
+    """``signed_in(user_id)``: a context in which requests carry ``user_id``'s token."""
+    def sign_in(user_id):
+        token = f"test-access-{user_id}"
+        fake.auth_tokens[token] = {"id": user_id}
+        return db.pin_token(token)
+    return sign_in
+
+
+@pytest.fixture
+def coach_id(fake):
+    return next(u["id"] for u in fake.tables["users"] if u["coach"])
+
+
+@pytest.fixture
+def athlete_ids(fake):
+    return [u["id"] for u in fake.tables["users"] if not u["coach"]]
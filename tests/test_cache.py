@@ -0,0 +1,79 @@
+from gymapp import cache, db, reference
+from gymapp.cache import TTLCache
+
+
+def test_get_loads_once_until_invalidated():
+    c = TTLCache("test", ttl=60, maxsize=10)
+    loads = []
+    load = lambda: loads.append(1) or len(loads)  # noqa: E731
+
+    assert c.get("a", load, tables=("users",)) == 1
+    assert c.get("a", load, tables=("users",)) == 1
+    c.invalidate_table("exercises")
+    assert c.get("a", load, tables=("users",)) == 1
+    c.invalidate_table("users")
+    assert c.get("a", load, tables=("users",)) == 2
+    assert c.stats()["hits"] == 2 and c.stats()["invalidations"] == 1
+
+
+def test_expired_and_evicted_entries_reload():
+    expired = TTLCache("test", ttl=0, maxsize=10)
+    expired.get("a", lambda: 1)
+    assert expired.get("a", lambda: 2) == 2
+
+    small = TTLCache("test", ttl=60, maxsize=2)
+    for key in "abc":
+        small.get(key, lambda key=key: key)
+    assert small.peek("a") is None
+    assert small.peek("b") == "b" and small.peek("c") == "c"
+
+
+def test_load_racing_a_write_is_not_cached():
+    c = TTLCache("test", ttl=60, maxsize=10)
+
+    def load():
+        c.invalidate_table("users")  # a write lands mid-read
+        return "stale"
+
+    assert c.get("a", load, tables=("users",)) == "stale"
+    assert c.peek("a") is None
+
+
+def test_patch_rewrites_keeps_or_drops_entries():
+    c = TTLCache("test", ttl=60, maxsize=10)
+    c.get("rewrite", lambda: [1], tables=("sessions",))
+    c.get("keep", lambda: [2], tables=("sessions",))
+    c.get("drop", lambda: [3], tables=("sessions",))
+    c.get("other", lambda: [4], tables=("users",))
+    seen = []
+
+    def fn(key, value):
+        seen.append(key)
+        return {"rewrite": value + [9], "keep": value, "drop": cache.DROP}[key]
+
+    c.patch(["sessions"], fn)
+    assert sorted(seen) == ["drop", "keep", "rewrite"]
+    assert c.peek("rewrite") == [1, 9]
+    assert c.peek("keep") == [2]
+    assert c.peek("drop") is None
+    assert c.peek("other") == [4]
+
+
+def test_writes_through_db_invalidate_cached_reads(fake):
+    before = reference.exercises()
+    fake.reset_stats()
+    assert reference.exercises() == before
+    assert fake.stats()["round_trips"] == 0
+
+    db.table("exercises").insert({"name": "Zercher Squat"}).execute()
+    assert "Zercher Squat" in [e["name"] for e in reference.exercises()]
+    assert len(reference.exercises()) == len(before) + 1
+
+
+def test_rpc_writes_invalidate_listed_tables(fake):
+    names = {e["name"] for e in reference.exercises()}
+    fake.tables["exercises"].append({"id": "new-exercise", "name": "Nordic Curl"})
+    assert {e["name"] for e in reference.exercises()} == names  # served from the cache
+
+    db.rpc("session_roster", {"p_session_id": None}, writes=("exercises",)).execute()
+    assert "Nordic Curl" in {e["name"] for e in reference.exercises()}
@@ -0,0 +1,37 @@
+import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from gymapp import cache, compliance
+
+PAGE = str(Path(__file__).resolve().parent.parent / "pages" / "6_Coach_Compliance.py")
+
+
+@pytest.fixture
+def open_page(fake):
+    def run(user_id):
+        at = AppTest.from_file(PAGE, default_timeout=30)
+        at.session_state["user"] = SimpleNamespace(id=user_id, email="", user_metadata={})
+        at.session_state["user_id"] = user_id
+        return at.run()
+    return run
+
+
+def test_athletes_are_turned_away_before_the_rollup_is_loaded(fake, athlete_ids, open_page):
+    at = open_page(athlete_ids[0])
+    assert [e.value for e in at.error] == ["Only coaches can access this page."]
+    assert not any(r["target"] == "squad_compliance" for r in fake.requests)
+    assert cache.rollups.stats()["entries"] == 0
+
+
+def test_coaches_see_the_whole_squad(fake, coach_id, open_page):
+    at = open_page(coach_id)
+    assert not at.exception and not at.error
+    today = datetime.date.today()
+    fake.reset_stats()
+    weekly = compliance.weekly((today - datetime.timedelta(weeks=12)).isoformat(), today.isoformat())
+    assert fake.stats()["round_trips"] == 0  # the page's rollup, from the cache
+    assert weekly["user_id"].nunique() > 1
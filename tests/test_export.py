@@ -0,0 +1,62 @@
+import csv
+import io
+
+import pytest
+
+from gymapp import export
+
+
+@pytest.fixture
+def small_pages(fake, monkeypatch):
+    """Responses capped well below one chunk of workouts' sets, as PostgREST caps them."""
+    fake.max_rows = 50
+    monkeypatch.setattr(export._pages, "__defaults__", (50, lambda query: query))
+    return fake
+
+
+def test_every_set_is_exported_across_capped_pages(small_pages):
+    exported = [r["set_id"] for r in export.rows("workout_sets")]
+    assert sorted(exported) == sorted(s["id"] for s in small_pages.tables["workout_sets"])
+    # A chunk of workouts holds several responses' worth of sets
+    chunks = -(-len(small_pages.tables["workouts"]) // export.SETS_WORKOUT_CHUNK)
+    assert sum(r["target"] == "workout_sets" for r in small_pages.requests) > 2 * chunks
+
+
+def test_date_range_filters_by_workout_date(small_pages):
+    dates = sorted({w["date"] for w in small_pages.tables["workouts"]})
+    start, end = dates[1], dates[-2]
+    in_range = {w["id"] for w in small_pages.tables["workouts"] if start <= w["date"] <= end}
+
+    exported = list(export.rows("workout_sets", start, end))
+    assert {r["workout_id"] for r in exported} == in_range
+    assert len(exported) == sum(s["workout_id"] in in_range for s in small_pages.tables["workout_sets"])
+
+
+def test_rows_carry_names_not_ids(fake):
+    names = {u["id"]: u["name"] for u in fake.tables["users"]}
+    exercises = {e["id"]: e["name"] for e in fake.tables["exercises"]}
+    workouts = {w["id"]: w for w in fake.tables["workouts"]}
+    s = fake.tables["workout_sets"][0]
+
+    row = next(r for r in export.rows("workout_sets") if r["set_id"] == s["id"])
+    assert row["athlete"] == names[workouts[s["workout_id"]]["user_id"]]
+    assert row["exercise"] == exercises[s["exercise_id"]]
+
+
+def test_csv_export_has_a_header_and_one_line_per_row(small_pages):
+    out = export.export("scheduled_workouts", "csv")
+    lines = list(csv.DictReader(io.TextIOWrapper(out, encoding="utf-8")))
+    assert len(lines) == len(small_pages.tables["scheduled_workouts"])
+    assert set(lines[0]) == set(export.DATASETS["scheduled_workouts"])
+
+
+def test_export_stops_past_the_size_limit(small_pages, monkeypatch):
+    monkeypatch.setattr(export, "EXPORT_MAX_BYTES", 1024)
+    monkeypatch.setattr(export._batches, "__defaults__", (10,))
+    with pytest.raises(ValueError, match="larger than"):
+        export.export("workout_sets", "csv")
+
+
+def test_unknown_dataset_is_rejected(fake):
+    with pytest.raises(ValueError):
+        list(export.rows("passwords"))
@@ -0,0 +1,54 @@
+from gymapp import importer, reference
+
+HEADER = "date,title,exercise,sets,reps,metric,athletes\n"
+
+
+def _athletes(fake):
+    return [{"id": u["id"], "name": u["name"]} for u in fake.tables["users"] if not u["coach"]]
+
+
+def test_windows_csv_is_read_with_a_warning(fake):
+    report = importer.read_exercises("name,description\nCafé Squat,Pausé\n".encode("cp1252"), reference.catalogue())
+    assert report.ok
+    assert [(e["name"], e["description"]) for e in report.exercises] == [("Café Squat", "Pausé")]
+    assert "Windows-1252" in report.warnings[0][1]
+
+
+def test_unreadable_files_are_reported_not_raised(fake):
+    undecodable = importer.read_exercises(b"name\n\x81\x8d\n", reference.catalogue())
+    assert [line for line, _ in undecodable.errors] == [1] and "UTF-8" in undecodable.errors[0][1]
+
+    huge_field = importer.read_exercises(("name\n\"" + "x" * 200_000 + "\"\n").encode(), reference.catalogue())
+    assert len(huge_field.errors) == 1 and "not a readable CSV file" in huge_field.errors[0][1]
+    assert huge_field.exercises == []
+
+
+def test_shared_athlete_names_are_errors(fake):
+    athletes = _athletes(fake)
+    athletes.append({"id": "twin", "name": athletes[0]["name"]})
+    exercise = fake.tables["exercises"][0]["name"]
+    report = importer.read_sessions(
+        f"{HEADER}2026-03-02,Strength,{exercise},3,5,kgs,{athletes[0]['name']};{athletes[1]['name']}\n",
+        reference.catalogue(), athletes)
+    assert [line for line, _ in report.errors] == [2]
+    assert "more than one athlete is called" in report.errors[0][1]
+
+
+def test_commit_writes_everything_in_one_request(fake, coach_id):
+    athletes = _athletes(fake)
+    report = importer.read_exercises("name\nSled Drag\n", reference.catalogue())
+    importer.read_sessions(
+        f"{HEADER}2026-03-02,Conditioning,Sled Drag,4,1,seconds,{athletes[0]['name']}\n"
+        f"2026-03-02,Conditioning,{fake.tables['exercises'][0]['name']},3,5,kgs,{athletes[1]['name']}\n",
+        reference.catalogue(), athletes, report)
+    assert report.ok, report.errors
+
+    fake.reset_stats()
+    importer.commit(report, coach_id)
+    assert fake.stats()["round_trips"] == 1
+    session = next(s for s in fake.tables["scheduled_workouts"] if s["notes"] == "Conditioning")
+    sets = [e for e in fake.tables["scheduled_workout_exercises"] if e["scheduled_workout_id"] == session["id"]]
+    booked = {a["user_id"] for a in fake.tables["scheduled_workout_attendees"]
+              if a["scheduled_workout_id"] == session["id"]}
+    assert len(sets) == 7 and booked == {athletes[0]["id"], athletes[1]["id"]}
+    assert "Sled Drag" in {e["name"] for e in fake.tables["exercises"]}
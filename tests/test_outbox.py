@@ -0,0 +1,114 @@
+import pytest
+
+from gymapp import db, outbox
+
+
+@pytest.fixture(autouse=True)
+def queue(tmp_path, monkeypatch):
+    monkeypatch.setattr(outbox, "OUTBOX_PATH", str(tmp_path / "outbox.sqlite3"))
+
+
+@pytest.fixture
+def attended(fake):
+    """An athlete and two sessions they attend but have not logged."""
+    logged = {(w["user_id"], w["scheduled_workout_id"]) for w in fake.tables["workouts"]}
+    by_user = {}
+    for a in fake.tables["scheduled_workout_attendees"]:
+        if (a["user_id"], a["scheduled_workout_id"]) not in logged:
+            by_user.setdefault(a["user_id"], []).append(a["scheduled_workout_id"])
+    user_id, session_ids = next((u, s) for u, s in by_user.items() if len(s) >= 2)
+    return user_id, session_ids[:2]
+
+
+def _set(exercise_id, set_number, value):
+    return {"exercise_id": exercise_id, "set_number": set_number, "reps": 5,
+            "exertion_metric": "kgs", "value": value, "notes": ""}
+
+
+def _logged_sets(fake, user_id, session_id):
+    workout_ids = [w["id"] for w in fake.tables["workouts"]
+                   if w["user_id"] == user_id and w["scheduled_workout_id"] == session_id]
+    return workout_ids, sorted((s["set_number"], s["value"]) for s in fake.tables["workout_sets"]
+                               if s["workout_id"] in workout_ids)
+
+
+def test_saves_of_one_session_coalesce(fake, attended):
+    user_id, (session_id, _) = attended
+    outbox.enqueue(user_id, session_id, "2026-03-02", "first", [_set("ex", 1, 50), _set("ex", 2, 55)], "")
+    outbox.enqueue(user_id, session_id, "2026-03-02", "second", [_set("ex", 2, 60), _set("ex", 3, 65)], "")
+
+    assert outbox.size() == 1
+    queued = outbox.pending(user_id, session_id)
+    assert queued["notes"] == "second"
+    assert {k: s["value"] for k, s in queued["sets"].items()} == {("ex", 1): 50, ("ex", 2): 60, ("ex", 3): 65}
+
+
+def test_flush_uploads_and_replays_idempotently(fake, attended):
+    user_id, (session_id, _) = attended
+    outbox.enqueue(user_id, session_id, "2026-03-02", "", [_set("ex", 1, 50), _set("ex", 2, 55)], "")
+    assert outbox.flush() == 1
+    assert outbox.size() == 0
+    assert outbox.pending(user_id, session_id) is None
+
+    outbox.enqueue(user_id, session_id, "2026-03-02", "", [_set("ex", 2, 60)], "")
+    assert outbox.flush() == 1
+    workout_ids, sets = _logged_sets(fake, user_id, session_id)
+    assert len(workout_ids) == 1
+    assert sets == [(1, 50), (2, 60)]
+
+
+def test_one_bad_entry_does_not_hold_up_the_rest(fake, attended, monkeypatch):
+    user_id, (good, bad) = attended
+    push = outbox._push
+
+    def failing_push(entries):
+        if any(e["scheduled_workout_id"] == bad for e in entries):
+            raise ValueError("rejected")
+        push(entries)
+
+    monkeypatch.setattr(outbox, "_push", failing_push)
+    outbox.enqueue(user_id, good, "2026-03-02", "", [_set("ex", 1, 50)], "")
+    outbox.enqueue(user_id, bad, "2026-03-04", "", [_set("ex", 1, 70)], "")
+
+    assert outbox.flush() == 1
+    assert _logged_sets(fake, user_id, good)[1] == [(1, 50)]
+    queued = outbox.pending(user_id, bad)
+    assert queued["attempts"] == 1 and queued["last_error"] == "rejected" and not queued["failed"]
+
+
+def test_gives_up_after_max_attempts_until_retried(fake, attended, monkeypatch):
+    user_id, (session_id, _) = attended
+    monkeypatch.setattr(outbox, "MAX_ATTEMPTS", 1)
+    push = outbox._push
+    calls = []
+
+    def flaky_push(entries):
+        calls.append(entries)
+        if len(calls) == 1:
+            raise ValueError("rejected")
+        push(entries)
+
+    monkeypatch.setattr(outbox, "_push", flaky_push)
+    outbox.enqueue(user_id, session_id, "2026-03-02", "", [_set("ex", 1, 50)], "")
+
+    assert outbox.flush() == 0
+    assert outbox.pending(user_id, session_id)["failed"]
+    assert [f["scheduled_workout_id"] for f in outbox.failed(user_id)] == [session_id]
+    assert outbox.flush() == 0  # no longer picked up
+    assert len(calls) == 1
+
+    outbox.retry(user_id, session_id)
+    assert outbox.flush() == 1
+    assert outbox.failed(user_id) == []
+    assert _logged_sets(fake, user_id, session_id)[1] == [(1, 50)]
+
+
+def test_expired_token_waits_without_using_attempts(fake, attended, monkeypatch):
+    user_id, (session_id, _) = attended
+    monkeypatch.setattr(db, "token_expiring", lambda token: True)
+    outbox.enqueue(user_id, session_id, "2026-03-02", "", [_set("ex", 1, 50)], "stale")
+
+    assert outbox.flush() == 0
+    queued = outbox.pending(user_id, session_id)
+    assert queued["attempts"] == 0 and "expired" in queued["last_error"]
+    assert not any(r["target"] == "workouts" for r in fake.requests)
@@ -0,0 +1,131 @@
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from gymapp import plans, schedule
+
+PAGE = str(Path(__file__).resolve().parent.parent / "pages" / "3_Coach_Workout_Plans.py")
+
+
+@pytest.fixture
+def exercise_ids(fake):
+    return [e["id"] for e in fake.tables["exercises"][:3]]
+
+
+def _plan(fake, session_id):
+    return sorted(
+        (e["exercise_id"], e["set_number"], e["reps"])
+        for e in fake.tables["scheduled_workout_exercises"] if e["scheduled_workout_id"] == session_id
+    )
+
+
+def _booked(fake, session_id):
+    return sorted(a["user_id"] for a in fake.tables["scheduled_workout_attendees"]
+                  if a["scheduled_workout_id"] == session_id)
+
+
+def _fields(coach_id, notes="Strength"):
+    return {"user_id": coach_id, "scheduled_date": "2026-03-02", "notes": notes}
+
+
+def test_new_session_gets_its_plan_and_attendees(fake, coach_id, athlete_ids, exercise_ids):
+    a, b = exercise_ids[:2]
+    planned = [{"exercise_id": a, "sets": 2, "reps": 5, "exertion_metric": "kgs"},
+               {"exercise_id": b, "sets": 1, "reps": 10, "exertion_metric": "kgs"}]
+
+    session_id = plans.save_plan(None, _fields(coach_id), planned, athlete_ids[:3])
+
+    assert _plan(fake, session_id) == sorted([(a, 1, 5), (a, 2, 5), (b, 1, 10)])
+    assert _booked(fake, session_id) == sorted(athlete_ids[:3])
+
+
+def test_resave_replaces_plan_and_attendees(fake, coach_id, athlete_ids, exercise_ids):
+    a, b, c = exercise_ids
+    session_id = plans.save_plan(None, _fields(coach_id), [
+        {"exercise_id": a, "sets": 3, "reps": 5, "exertion_metric": "kgs"},
+        {"exercise_id": b, "sets": 2, "reps": 5, "exertion_metric": "kgs"},
+    ], athlete_ids[:3])
+    kept_id = next(e["id"] for e in fake.tables["scheduled_workout_exercises"]
+                   if e["scheduled_workout_id"] == session_id and e["exercise_id"] == a and e["set_number"] == 1)
+
+    plans.save_plan(session_id, _fields(coach_id, "Power"), [
+        {"exercise_id": a, "sets": 1, "reps": 3, "exertion_metric": "kgs"},
+        {"exercise_id": c, "sets": 1, "reps": 8, "exertion_metric": "kgs"},
+    ], athlete_ids[1:4])
+
+    assert _plan(fake, session_id) == sorted([(a, 1, 3), (c, 1, 8)])
+    assert _booked(fake, session_id) == sorted(athlete_ids[1:4])
+    assert kept_id in {e["id"] for e in fake.tables["scheduled_workout_exercises"]}  # updated in place
+    session = next(s for s in fake.tables["scheduled_workouts"] if s["id"] == session_id)
+    assert session["notes"] == "Power"
+
+
+def test_repeated_exercise_is_refused_before_saving(fake, coach_id, exercise_ids):
+    a, b = exercise_ids[:2]
+    planned = [
+        {"exercise_id": a, "name": "Bench Press", "sets": 3, "reps": 5, "exertion_metric": "kgs"},
+        {"exercise_id": b, "name": "Row", "sets": 3, "reps": 8, "exertion_metric": "kgs"},
+        {"exercise_id": a, "name": "Bench Press", "sets": 2, "reps": 10, "exertion_metric": "kgs"},
+    ]
+    assert plans.repeated_exercises(planned) == ["Bench Press"]
+    fake.reset_stats()
+    with pytest.raises(ValueError, match="Bench Press"):
+        plans.save_plan(None, _fields(coach_id), planned, [])
+    assert fake.stats()["round_trips"] == 0
+
+
+def test_squads_expand_to_their_members(fake, coach_id, athlete_ids, signed_in):
+    squad = next(s for s in fake.tables["squads"] if s["coach_id"] == coach_id)
+    members = {m["user_id"] for m in fake.tables["squad_members"] if m["squad_id"] == squad["id"]}
+    extra = next(a for a in athlete_ids if a not in members)
+
+    with signed_in(coach_id):
+        session_id = plans.save_plan(None, _fields(coach_id), [], [extra], [squad["id"]])
+    assert _booked(fake, session_id) == sorted(members | {extra})
+
+
+def test_only_own_squads_can_be_booked(fake, coach_id, signed_in):
+    other = next(s for s in fake.tables["squads"] if s["coach_id"] != coach_id)
+    sessions = len(fake.tables["scheduled_workouts"])
+    with signed_in(coach_id), pytest.raises(PermissionError):
+        plans.save_plan(None, _fields(coach_id), [], [], [other["id"]])
+    assert len(fake.tables["scheduled_workouts"]) == sessions
+
+
+def test_saving_a_missing_session_changes_nothing(fake, coach_id, athlete_ids):
+    before = {t: [dict(r) for r in fake.rows(t)] for t in plans.PLAN_TABLES}
+    with pytest.raises(ValueError):
+        plans.save_plan("no-such-session", _fields(coach_id), [], athlete_ids[:1])
+    assert {t: fake.rows(t) for t in plans.PLAN_TABLES} == before
+
+
+def test_save_and_delete_refresh_cached_calendars(fake, coach_id, exercise_ids):
+    window = ("2026-03-01", "2026-03-31")
+    assert schedule.coach_sessions(coach_id, *window) == []
+    session_id = plans.save_plan(None, _fields(coach_id), [], [])
+    assert [s["id"] for s in schedule.coach_sessions(coach_id, *window)] == [session_id]
+
+    plans.delete_session(session_id)
+    assert schedule.coach_sessions(coach_id, *window) == []
+    assert _plan(fake, session_id) == [] and _booked(fake, session_id) == []
+
+
+def test_page_warns_about_a_repeated_exercise_instead_of_saving(fake, coach_id, athlete_ids):
+    at = AppTest.from_file(PAGE, default_timeout=30)
+    at.session_state["user"] = SimpleNamespace(id=coach_id, email="", user_metadata={})
+    at.session_state["user_id"] = coach_id
+    at.run()
+    name = fake.tables["exercises"][0]["name"]
+    for i, reps in enumerate((5, 10)):
+        next(b for b in at.button if b.label == "Add Exercise").click().run()
+        at.selectbox(key=f"exercise_name_{i}").set_value(name).run()
+        at.number_input(key=f"reps_{i}").set_value(reps).run()
+    at.multiselect(key="athlete_multiselect_new").set_value(athlete_ids[:1]).run()
+    sessions = len(fake.tables["scheduled_workouts"])
+
+    next(b for b in at.button if b.label == "Save Workout Plan").click().run()
+    assert not at.exception
+    assert any(f"{name} is listed more than once" in w.value for w in at.warning)
+    assert len(fake.tables["scheduled_workouts"]) == sessions
@@ -0,0 +1,55 @@
+import datetime
+
+import pytest
+
+from gymapp import plans, recurrence
+
+
+def test_weekly_dates_on_chosen_weekdays_inclusive():
+    # 2026-03-04 is a Wednesday
+    dates = recurrence.weekly_dates(datetime.date(2026, 3, 4), datetime.date(2026, 3, 16), [0, 2])
+    assert dates == ["2026-03-04", "2026-03-09", "2026-03-11", "2026-03-16"]
+
+
+def test_every_other_week_counts_from_the_start_week():
+    dates = recurrence.weekly_dates(datetime.date(2026, 3, 4), datetime.date(2026, 4, 1), [0, 4], every=2)
+    # Friday of the start week, then Monday and Friday two weeks on, and so on
+    assert dates == ["2026-03-06", "2026-03-16", "2026-03-20", "2026-03-30"]
+
+
+def test_weeks_count_from_the_anchor():
+    # A Sunday template repeated every other Sunday: copies start the day
+    # after it, but two weeks on from it
+    template = datetime.date(2026, 10, 18)
+    dates = recurrence.weekly_dates(template + datetime.timedelta(days=1), datetime.date(2026, 11, 30), [6],
+                                    every=2, anchor=template)
+    assert dates == ["2026-11-01", "2026-11-15", "2026-11-29"]
+
+
+def test_no_dates_when_end_precedes_start():
+    assert recurrence.weekly_dates(datetime.date(2026, 3, 4), datetime.date(2026, 3, 1), range(7)) == []
+
+
+def test_repeat_copies_plan_and_attendees(fake, coach_id, athlete_ids):
+    planned = [{"exercise_id": fake.tables["exercises"][0]["id"], "sets": 3, "reps": 5, "exertion_metric": "kgs"}]
+    attendee_ids = athlete_ids[:2]
+    template = plans.save_plan(None, {"user_id": coach_id, "scheduled_date": "2026-03-02", "notes": "Template"},
+                               planned, attendee_ids)
+    dates = recurrence.weekly_dates(datetime.date(2026, 3, 3), datetime.date(2026, 3, 17), [0])
+
+    created = recurrence.repeat(template, dates)
+
+    assert sorted(s["scheduled_date"] for s in created) == dates
+    for session in created:
+        sets = [e for e in fake.tables["scheduled_workout_exercises"] if e["scheduled_workout_id"] == session["id"]]
+        booked = [a["user_id"] for a in fake.tables["scheduled_workout_attendees"]
+                  if a["scheduled_workout_id"] == session["id"]]
+        assert sorted(s["set_number"] for s in sets) == [1, 2, 3]
+        assert sorted(booked) == sorted(attendee_ids)
+
+
+def test_repeat_refuses_too_many_dates(fake):
+    fake.reset_stats()
+    with pytest.raises(ValueError):
+        recurrence.repeat("any", ["2026-01-01"] * (recurrence.MAX_OCCURRENCES + 1))
+    assert fake.stats()["round_trips"] == 0
@@ -0,0 +1,45 @@
+import pytest
+
+from gymapp import squads
+
+
+def test_search_ignores_case_and_surrounding_spaces(fake):
+    rows, _ = squads.search_athletes("  ATHLETE 00")
+    fake.reset_stats()
+    assert squads.search_athletes("athlete 00") == (rows, None)
+    assert fake.stats()["round_trips"] == 0  # same cache entry
+    assert [r["name"] for r in rows] == [f"Athlete 00{i}" for i in range(10)]
+
+
+def test_search_pages_on_name_and_id(fake):
+    first, cursor = squads.search_athletes("athlete", page_size=8)
+    second, last = squads.search_athletes("athlete", after=cursor, page_size=8)
+    third, end = squads.search_athletes("athlete", after=last, page_size=8)
+    names = [r["name"] for r in first + second + third]
+    assert names == sorted(u["name"] for u in fake.tables["users"] if not u["coach"])
+    assert end is None
+
+
+def test_squads_belong_to_the_signed_in_coach(fake, coach_id, athlete_ids, signed_in):
+    with signed_in(coach_id):
+        squad_id = squads.save(None, "Juniors", athlete_ids[:3])
+        assert {"id": squad_id, "name": "Juniors", "members": 3} in squads.for_coach(coach_id)
+        squads.save(squad_id, "Seniors", athlete_ids[2:4])
+    assert [m["user_id"] for m in fake.tables["squad_members"] if m["squad_id"] == squad_id] == athlete_ids[2:4]
+    assert next(s for s in fake.tables["squads"] if s["id"] == squad_id)["coach_id"] == coach_id
+
+
+def test_other_coaches_squads_cannot_be_changed(fake, coach_id, athlete_ids, signed_in):
+    other = next(s for s in fake.tables["squads"] if s["coach_id"] != coach_id)
+    members = [m for m in fake.tables["squad_members"] if m["squad_id"] == other["id"]]
+    with signed_in(coach_id):
+        with pytest.raises(ValueError):
+            squads.save(other["id"], "Mine now", athlete_ids[:1])
+        squads.delete(other["id"])
+    assert other in fake.tables["squads"] and other["name"] != "Mine now"
+    assert [m for m in fake.tables["squad_members"] if m["squad_id"] == other["id"]] == members
+
+
+def test_saving_a_squad_needs_a_signed_in_coach(fake, athlete_ids):
+    with pytest.raises(PermissionError):
+        squads.save(None, "Nobody's", athlete_ids[:1])
@@ -0,0 +1,85 @@
+import datetime
+import threading
+
+import pytest
+
+from gymapp import db, schedule, sync
+
+WINDOW = ("2026-03-01", "2026-03-31")
+
+
+@pytest.fixture(autouse=True)
+def fresh_sync(fake, monkeypatch):
+    """Sync state is per process; start each test from a process that has just begun syncing."""
+    monkeypatch.setattr(sync, "_watermark", None)
+    monkeypatch.setattr(sync, "_next_pull", 0.0)
+    monkeypatch.setattr(sync, "_seen", {})
+    monkeypatch.setattr(sync, "_due", threading.Event())
+    sync.pull()
+
+
+def _elsewhere(fake, table, payload):
+    """Write as another process would: the store changes, this process's caches don't hear of it."""
+    return fake.table(table).insert(payload).execute().data[0]
+
+
+def test_first_pull_only_starts_the_clock(fake, monkeypatch):
+    monkeypatch.setattr(sync, "_watermark", None)
+    fake.reset_stats()
+    assert sync.pull(force=True) == 0
+    assert fake.stats()["round_trips"] == 0
+
+
+def test_no_pull_until_due(fake):
+    fake.reset_stats()
+    assert sync.pull() == 0
+    assert fake.stats()["round_trips"] == 0
+    sync.notify()
+    sync.pull()
+    assert fake.stats()["round_trips"] == 1
+
+
+def test_pull_patches_cached_coach_window(fake, coach_id):
+    assert schedule.coach_sessions(coach_id, *WINDOW) == []
+    created = _elsewhere(fake, "scheduled_workouts",
+                         {"user_id": coach_id, "scheduled_date": "2026-03-10", "notes": "Added elsewhere"})
+
+    assert sync.pull(force=True) == 1
+    fake.reset_stats()
+    assert [s["id"] for s in schedule.coach_sessions(coach_id, *WINDOW)] == [created["id"]]
+    assert fake.stats()["round_trips"] == 0  # patched, not reloaded
+
+    fake.table("scheduled_workouts").delete().eq("id", created["id"]).execute()
+    assert sync.pull(force=True) == 1
+    assert schedule.coach_sessions(coach_id, *WINDOW) == []
+
+
+def test_pull_books_athlete_into_cached_window(fake, coach_id, athlete_ids):
+    athlete = athlete_ids[0]
+    before = schedule.athlete_sessions(athlete, *WINDOW)
+    session = _elsewhere(fake, "scheduled_workouts",
+                         {"user_id": coach_id, "scheduled_date": "2026-03-12", "notes": "Booked elsewhere"})
+    _elsewhere(fake, "scheduled_workout_attendees",
+               {"scheduled_workout_id": session["id"], "user_id": athlete, "status": "confirmed"})
+
+    assert sync.pull(force=True) == 2
+    fake.reset_stats()
+    after = [s["id"] for s in schedule.athlete_sessions(athlete, *WINDOW)]
+    assert sorted(after) == sorted([*(s["id"] for s in before), session["id"]])
+    assert fake.stats()["round_trips"] == 0
+
+
+def test_changes_in_the_overlap_are_applied_once(fake, coach_id):
+    now = datetime.datetime.now(datetime.timezone.utc).isoformat()
+    change = {"table_name": "scheduled_workouts", "op": "upsert", "changed_at": now,
+              "row": {"id": "s1", "user_id": coach_id, "scheduled_date": "2026-03-05", "notes": ""}}
+    assert sync.apply([change]) == 1
+    assert sync.apply([change]) == 0
+
+
+def test_no_service_key_means_no_pull(fake, monkeypatch):
+    monkeypatch.setattr(db, "service_token", lambda: None)
+    sync.notify()
+    fake.reset_stats()
+    assert sync.pull(force=True) == 0
+    assert fake.stats()["round_trips"] == 0
@@ -0,0 +1,70 @@
+from gymapp import workouts
+
+PLANNED = {"set_number": 2, "exertion_metric": "kgs"}
+
+
+def _entry(set_number, value, reps=5):
+    return {"exercise_id": "ex", "set_number": set_number, "reps": reps, "exertion_metric": "kgs", "value": value}
+
+
+def test_only_new_or_changed_sets_are_written():
+    existing = {("ex", 1): {**_entry(1, 60), "notes": "easy"}, ("ex", 2): _entry(2, 60)}
+    rows = workouts.changed_set_rows("w1", [_entry(1, 60), _entry(2, 62.5), _entry(3, 65)], existing)
+    assert [(r["set_number"], r["value"], r["notes"]) for r in rows] == [(2, 62.5, ""), (3, 65, "")]
+    assert all(r["workout_id"] == "w1" for r in rows)
+
+
+def test_previous_set_matches_set_number_then_falls_back():
+    last = {"ex": {"last_sets": [_entry(1, 50), {**_entry(3, 55), "exertion_metric": "lbs"}]}}
+    assert workouts.previous_set(last, "ex", {**PLANNED, "set_number": 1})["value"] == 50
+    assert workouts.previous_set(last, "ex", PLANNED) is None  # last set was in lbs
+    assert workouts.previous_set({}, "ex", PLANNED) is None
+
+
+def test_prefill_keeps_fractional_loads():
+    assert workouts.prefill({("ex", 2): _entry(2, 62.5)}, {}, "ex", PLANNED) == 62.5
+    assert workouts.prefill({}, {"ex": {"last_sets": [_entry(2, 42.5)]}}, "ex", PLANNED) == 42.5
+    assert workouts.prefill({}, {"ex": {"last_sets": [_entry(2, None)]}}, "ex", PLANNED) == 0.0
+
+
+def test_describe_last_with_missing_values():
+    perf = {"last_date": "2026-03-02", "last_sets": [_entry(1, None), _entry(2, 60)],
+            "best_value": None, "best_reps": None, "best_metric": None, "best_date": None}
+    assert workouts.describe_last(perf) == "Last (2026-03-02): – × 5, 60 × 5"
+
+    perf.update(best_value=70, best_reps=3, best_metric="kgs", best_date="2026-02-23")
+    assert workouts.describe_last(perf).endswith("· Best: 70 kgs × 3 (2026-02-23)")
+
+
+def test_last_performance_skips_unlogged_values(fake):
+    user_id, workout_id = next((w["user_id"], w["id"]) for w in fake.tables["workouts"])
+    s = next(s for s in fake.tables["workout_sets"] if s["workout_id"] == workout_id)
+    for other in fake.tables["workout_sets"]:
+        if other["exercise_id"] == s["exercise_id"]:
+            other["value"] = None
+    s["value"] = 40
+
+    perf = workouts.last_performance(user_id, [s["exercise_id"]])[s["exercise_id"]]
+    assert perf["best_value"] == 40
+
+
+def _grid():
+    planned = {"ex": [{"set_number": 1, "reps": 5, "exertion_metric": "kgs"},
+                      {"set_number": 2, "reps": 5, "exertion_metric": "kgs"}]}
+    existing = {("ex", 1): _entry(1, 60), ("ex", 2): _entry(2, 60)}
+    return workouts.sets_frame(planned, {"ex": "Bench Press"}, existing), existing
+
+
+def test_grid_edits_replace_prefilled_amounts():
+    frame, existing = _grid()
+    entries = workouts.grid_entries(frame, {1: {workouts.GRID_VALUE: 62.5}})
+    assert [e["value"] for e in entries] == [60.0, 62.5]
+    assert [r["set_number"] for r in workouts.changed_set_rows("w1", entries, existing)] == [2]
+
+
+def test_cleared_grid_cell_is_logged_as_an_empty_set():
+    frame, existing = _grid()
+    entries = workouts.grid_entries(frame, {"0": {workouts.GRID_VALUE: None}})
+    assert [e["value"] for e in entries] == [None, 60.0]
+    rows = workouts.changed_set_rows("w1", entries, existing)
+    assert [(r["set_number"], r["value"]) for r in rows] == [(1, None)]